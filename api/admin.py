@@ -3,19 +3,55 @@
 Отображение моделей оборудования.
     EquipmentAdmin: класс для отображения сущности Equipment.
     EquipmentTypeAdmin: класс для отображения сущности EquipmentType.
+    EquipmentImportAdmin: класс для отображения состояния импорта.
+    EquipmentJobAdmin: класс для отображения задач создания оборудования.
+    ArchivedEquipmentAdmin: класс для отображения архива оборудования.
 """
 from django.contrib import admin
 
-from api.models import Equipment, EquipmentType
+from api.bulk import delete_equipment
+from api.models import (ArchivedEquipment, Equipment, EquipmentImport,
+                        EquipmentJob, EquipmentType)
 
 
 @admin.register(Equipment)
 class EquipmentAdmin(admin.ModelAdmin):
     """Отображение таблицы Equipment."""
-    pass
+
+    def delete_model(self, request, obj):
+        """Удаление объекта через пакетное удаление с обновлением индексов."""
+        delete_equipment([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        """Удаление выбранных объектов одним набором запросов."""
+        delete_equipment(queryset.values_list('pk', flat=True))
 
 
 @admin.register(EquipmentType)
 class EquipmentTypeAdmin(admin.ModelAdmin):
     """Отображение таблицы EquipmentType."""
     pass
+
+
+@admin.register(EquipmentImport)
+class EquipmentImportAdmin(admin.ModelAdmin):
+    """Отображение таблицы EquipmentImport."""
+    list_display = ('source', 'user', 'rows_committed', 'created', 'failed',
+                    'finished')
+
+
+@admin.register(EquipmentJob)
+class EquipmentJobAdmin(admin.ModelAdmin):
+    """Отображение таблицы EquipmentJob."""
+    list_display = ('id', 'status', 'type', 'total', 'processed', 'worker',
+                    'created_at', 'finished_at')
+    list_filter = ('status',)
+    exclude = ('serial_numbers',)
+
+
+@admin.register(ArchivedEquipment)
+class ArchivedEquipmentAdmin(admin.ModelAdmin):
+    """Отображение таблицы ArchivedEquipment."""
+    list_display = ('id', 'serial_number', 'type', 'decommissioned_at',
+                    'archived_at')
+    search_fields = ('serial_number',)
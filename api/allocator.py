@@ -0,0 +1,198 @@
+"""
+Модуль выдачи свободных серийных номеров по маске типа оборудования.
+    SerialSpaceExhausted: свободных номеров по маске не осталось.
+    reserved_serial_numbers: поиск зарезервированных серийных номеров.
+    allocate_serial_numbers: выдача и резервирование свободных номеров.
+    purge_expired_reservations: удаление истёкших резервов занятых номеров.
+
+Номера маски перечисляются MaskSpace. Для каждого типа в
+SerialAllocation хранится порядковый номер, с которого продолжается
+выдача: номера до него уже выданы или заняты и повторно не проверяются.
+Номера после него проверяются окнами, одним набором запросов IN к
+уникальным индексам Equipment и SerialReservation на окно. Выданные
+номера резервируются в SerialReservation на
+EQUIPMENT_SERIAL_RESERVATION_SECONDS секунд. Номера с истёкшим резервом,
+которые так и не были заняты, выдаются повторно в первую очередь.
+Действующий резерв не даёт занять номер другому пользователю
+(api.bulk.serial_number_errors). Резерв номера удаляется при создании
+оборудования с этим номером (api.bulk.insert_equipment); оставшиеся
+резервы занятых номеров удаляет команда purge_reservations.
+
+Выдача выполняется в одной транзакции под блокировкой строки
+SerialAllocation типа, поэтому параллельные запросы не получают
+одинаковых номеров. Уникальный индекс SerialReservation защищает и
+backend-ы без SELECT ... FOR UPDATE: при конфликте выдача повторяется.
+"""
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from api.bulk import chunks, existing_serial_numbers
+from api.masks import MaskSpace
+from api.models import SerialAllocation, SerialReservation
+
+# Наименьшее окно проверки номеров.
+MIN_WINDOW = 64
+ALLOCATE_ATTEMPTS = 3
+
+
+class SerialSpaceExhausted(Exception):
+    """Свободных номеров по маске не осталось."""
+
+
+def reserved_serial_numbers(serial_numbers: Iterable[str]) -> set:
+    """
+    Получить серийные номера, которые есть в SerialReservation.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+    """
+    serial_numbers = list(set(serial_numbers))
+    if not serial_numbers:
+        return set()
+    batch_size = connection.ops.bulk_batch_size(['serial_number'],
+                                                serial_numbers)
+    reserved = set()
+    for chunk in chunks(serial_numbers, batch_size):
+        reserved.update(SerialReservation.objects.filter(
+            serial_number__in=chunk).values_list('serial_number', flat=True))
+    return reserved
+
+
+def allocate_serial_numbers(equipment_type, count: int, user=None) -> tuple:
+    """
+    Выдать count свободных номеров по маске типа и зарезервировать их.
+
+    Возвращает список номеров и время окончания резерва.
+    Если свободных номеров меньше count, ничего не выдаётся и
+    выбрасывается SerialSpaceExhausted.
+
+    args:
+        equipment_type: объект EquipmentType.
+        count: число номеров.
+        user: пользователь, для которого резервируются номера.
+    """
+    for attempt in range(ALLOCATE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _allocate(equipment_type, count, user)
+        except IntegrityError:
+            if attempt == ALLOCATE_ATTEMPTS - 1:
+                raise
+
+
+def _allocate(equipment_type, count: int, user) -> tuple:
+    """
+    Выдать номера внутри транзакции.
+
+    args:
+        equipment_type: объект EquipmentType.
+        count: число номеров.
+        user: пользователь, для которого резервируются номера.
+    """
+    mask = equipment_type.serial_number_mask
+    space = MaskSpace(mask)
+    now = timezone.now()
+    state, _ = SerialAllocation.objects.select_for_update().get_or_create(
+        type_id=equipment_type.pk, defaults={"mask": mask})
+    if state.mask != mask:
+        state.mask, state.next_ordinal = mask, 0
+
+    serials = _reuse_expired(equipment_type, space, count, now)
+    ordinal = state.next_ordinal
+    while len(serials) < count and ordinal < space.size:
+        window = min(space.size - ordinal,
+                     max(MIN_WINDOW, 2 * (count - len(serials))),
+                     settings.EQUIPMENT_BULK_BATCH_SIZE * 10)
+        candidates = [space.serial(value)
+                      for value in range(ordinal, ordinal + window)]
+        taken = (existing_serial_numbers(candidates)
+                 | reserved_serial_numbers(candidates))
+        for offset, serial in enumerate(candidates):
+            if serial in taken:
+                continue
+            serials.append(serial)
+            if len(serials) == count:
+                ordinal += offset + 1
+                break
+        else:
+            ordinal += window
+
+    if len(serials) < count:
+        raise SerialSpaceExhausted(
+            f"Only {len(serials)} free serial numbers are left for the mask '{mask}'.")  # noqa
+
+    state.next_ordinal = ordinal
+    state.save()
+    expires_at = now + timedelta(
+        seconds=settings.EQUIPMENT_SERIAL_RESERVATION_SECONDS)
+    SerialReservation.objects.bulk_create([
+        SerialReservation(serial_number=serial, type_id=equipment_type.pk,
+                          user=user if getattr(user, "pk", None) else None,
+                          expires_at=expires_at)
+        for serial in serials
+    ], batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+    return serials, expires_at
+
+
+def purge_expired_reservations() -> int:
+    """
+    Удалить истёкшие резервы номеров, которые уже заняты оборудованием.
+
+    Истёкшие резервы свободных номеров остаются: по ним выдача
+    возвращается к номерам, которые уже пройдены SerialAllocation.
+    Возвращает число удалённых резервов.
+    """
+    expired = SerialReservation.objects.filter(
+        expires_at__lte=timezone.now()).order_by('id')
+    purged = 0
+    last_id = 0
+    while True:
+        rows = dict(expired.filter(id__gt=last_id).values_list(
+            'id', 'serial_number')[:settings.EQUIPMENT_BULK_BATCH_SIZE])
+        if not rows:
+            return purged
+        last_id = max(rows)
+        used = existing_serial_numbers(rows.values())
+        ids = [pk for pk, serial in rows.items() if serial in used]
+        with transaction.atomic():
+            purged += SerialReservation.objects.filter(
+                id__in=ids, expires_at__lte=timezone.now()).delete()[0]
+
+
+def _reuse_expired(equipment_type, space: MaskSpace, count: int,
+                   now) -> list:
+    """
+    Освободить истёкшие резервы типа и вернуть номера, которые можно выдать.
+
+    Резервы, номера которых заняты или не подходят под текущую маску,
+    удаляются без повторной выдачи.
+
+    args:
+        equipment_type: объект EquipmentType.
+        space: перечисление номеров маски типа.
+        count: сколько номеров нужно.
+        now: текущее время.
+    """
+    expired = dict(SerialReservation.objects.select_for_update().filter(
+        type_id=equipment_type.pk, expires_at__lte=now,
+    ).order_by('id').values_list('id', 'serial_number')[:count])
+    if not expired:
+        return []
+    for chunk in chunks(list(expired), connection.ops.bulk_batch_size(
+            ['id'], list(expired))):
+        SerialReservation.objects.filter(id__in=chunk).delete()
+    used = existing_serial_numbers(expired.values())
+    free = []
+    for serial in expired.values():
+        if serial in used:
+            continue
+        try:
+            space.ordinal(serial)
+        except ValueError:
+            continue
+        free.append(serial)
+    return free
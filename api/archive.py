@@ -0,0 +1,74 @@
+"""
+Модуль архива списанного оборудования.
+    ARCHIVE_PARAM: параметр запроса, добавляющий архив к ответу.
+    include_archive: запрошен ли архив.
+    decommissioned_ids: id списанного оборудования для переноса в архив.
+    archive_equipment: перенос части списанного оборудования в архив.
+
+Списанное оборудование (Equipment.decommissioned_at) переносится в
+ArchivedEquipment частями, каждая в своей короткой транзакции: строки
+части блокируются, копируются в архив и удаляются из Equipment через
+api.bulk.delete_equipment, поэтому индекс поиска, статистика и журнал
+изменений обновляются так же, как при удалении. Списки и поиск читают
+только Equipment, архив добавляется параметром ?include_archive=1.
+Запись в архив меняет archive_version, от которой зависят валидаторы
+списка с архивом.
+"""
+from typing import Iterable
+
+from django.db import transaction
+
+from api.bulk import delete_equipment
+from api.conditional import archive_version
+from api.models import ArchivedEquipment, Equipment
+
+ARCHIVE_PARAM = 'include_archive'
+ARCHIVED_FIELDS = ('id', 'type_id', 'serial_number', 'notation',
+                   'updated_at', 'decommissioned_at')
+
+
+def include_archive(request) -> bool:
+    """
+    Запрошен ли архив параметром ?include_archive=.
+
+    args:
+        request: запрос клиента.
+    """
+    return request.query_params.get(ARCHIVE_PARAM) in ("1", "true", "True")
+
+
+def decommissioned_ids(before, limit: int) -> list:
+    """
+    id оборудования, списанного не позже before, по возрастанию.
+
+    args:
+        before: граница даты списания.
+        limit: наибольшее число id.
+    """
+    return list(Equipment.objects.filter(
+        decommissioned_at__lte=before,
+    ).order_by('id').values_list('id', flat=True)[:limit])
+
+
+def archive_equipment(ids: Iterable[int], before) -> int:
+    """
+    Перенести оборудование в архив в одной транзакции.
+
+    Переносятся только строки, которые на момент блокировки всё ещё
+    списаны не позже before. Возвращает число перенесённых строк.
+
+    args:
+        ids: id оборудования.
+        before: граница даты списания.
+    """
+    with transaction.atomic():
+        rows = list(Equipment.objects.select_for_update().filter(
+            id__in=list(ids), decommissioned_at__lte=before,
+        ).values(*ARCHIVED_FIELDS))
+        if not rows:
+            return 0
+        ArchivedEquipment.objects.bulk_create(
+            [ArchivedEquipment(**row) for row in rows])
+        delete_equipment([row['id'] for row in rows])
+        archive_version.bump()
+    return len(rows)
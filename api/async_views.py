@@ -0,0 +1,334 @@
+"""
+Асинхронные представления для сущностей Equipment и EquipmentType.
+    aauthenticate: аутентификация запроса классами DRF.
+    asave: проверка и сохранение сериалайзера.
+    AsyncAPIView: базовое асинхронное представление.
+    AsyncEquipmentList: Создание и получение объектов Equipment.
+    AsyncEquipmentDetail: Детальная обработка объектов Equipment.
+    AsyncEquipmentTypeList: Получения списка объектов EquipmentType.
+
+Чтение выполняется через асинхронный ORM (aget, acount, async for),
+формат ответов совпадает с синхронными представлениями из api.views.
+Аутентификация, проверка и запись выполняются теми же классами, что и
+в синхронных представлениях (DEFAULT_AUTHENTICATION_CLASSES,
+EquipmentSerializer), через sync_to_async: транзакции в Django доступны
+только в синхронном коде.
+
+Выборочные поля, keyset пагинация, размер страницы, архив и условные
+запросы поддерживают только синхронные представления: асинхронные
+отвечают на такие запросы 400, а не игнорируют их.
+"""
+import json
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotAuthenticated
+from rest_framework.request import Request
+from rest_framework.serializers import ValidationError, as_serializer_error
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.bulk import delete_equipment
+from api.models import Equipment, EquipmentType
+from api.search import EquipmentSearchIndex, EquipmentTypeSearchIndex
+from api.serializers import (EquipmentCreatedSerializer,
+                             EquipmentGetListSerializer, EquipmentSerializer,
+                             EquipmentTypeSerializer)
+from api.type_cache import type_cache
+
+NOT_FOUND = "No Equipment matches the given query."
+PARSE_ERROR = "JSON parse error."
+UNSUPPORTED_PARAMS = ('fields', 'expand', 'page_size', 'pagination',
+                      'cursor', 'include_archive', 'job')
+UNSUPPORTED_HEADERS = ('If-Match', 'If-None-Match', 'If-Modified-Since',
+                       'If-Unmodified-Since')
+
+
+async def aauthenticate(request) -> tuple:
+    """
+    Аутентификация запроса классами DEFAULT_AUTHENTICATION_CLASSES.
+
+    Запрос оборачивается в Request DRF, пользователь определяется в
+    потоке sync_to_async с теми же проверками (CSRF для сессии, кэш
+    пользователей JWT). Возвращает пару (пользователь, ошибка).
+
+    args:
+        request: запрос клиента.
+    """
+    drf_request = Request(request, authenticators=[
+        auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = await sync_to_async(lambda: drf_request.user)()
+    except APIException as exc:
+        return None, exc.detail
+    if not user or not user.is_authenticated:
+        return None, NotAuthenticated.default_detail
+    return user, None
+
+
+async def asave(serializer) -> Optional[dict]:
+    """
+    Проверить и сохранить сериалайзер. Возвращает ошибки или None.
+
+    args:
+        serializer: сериалайзер с данными запроса.
+    """
+    def save():
+        if not serializer.is_valid():
+            return serializer.errors
+        try:
+            serializer.save()
+        except ValidationError as exc:
+            return as_serializer_error(exc)
+        return None
+
+    return await sync_to_async(save)()
+
+
+class AsyncAPIView(View):
+    """
+    Базовое асинхронное представление.
+
+    Проверяет аутентификацию (IsAuthenticated), отклоняет параметры,
+    которые поддерживают только синхронные представления, разбирает
+    JSON тело запроса и пагинирует списки в формате PageNumberPagination.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """CSRF проверяется только для сессионной аутентификации, как в DRF."""
+        view = super().as_view(**initkwargs)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        """Аутентификация перед вызовом обработчика."""
+        user, error = await aauthenticate(request)
+        if user is None:
+            response = JsonResponse({"detail": str(error)}, status=401)
+            response["WWW-Authenticate"] = 'Bearer realm="api"'
+            return response
+        request.user = user
+        error = self.unsupported(request)
+        if error is not None:
+            return JsonResponse({"detail": error}, status=400)
+        return await super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    def unsupported(request) -> Optional[str]:
+        """
+        Сообщение об ошибке, если запрос использует возможности только
+        синхронных представлений, иначе None.
+
+        args:
+            request: запрос клиента.
+        """
+        for param in UNSUPPORTED_PARAMS:
+            if param in request.GET:
+                return (f"Parameter '{param}' is not supported by the "
+                        f"async API.")
+        for header in UNSUPPORTED_HEADERS:
+            if header in request.headers:
+                return (f"Conditional header '{header}' is not supported by "
+                        f"the async API.")
+        return None
+
+    @staticmethod
+    def get_json(request):
+        """
+        Тело запроса в виде JSON или None, если оно не разбирается.
+
+        args:
+            request: запрос клиента.
+        """
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+
+    @staticmethod
+    def search_terms(request) -> list:
+        """
+        Слова параметра ?search=, как в SearchFilter.
+
+        args:
+            request: запрос клиента.
+        """
+        value = request.GET.get('search', '').replace('\x00', '')
+        return value.replace(',', ' ').split()
+
+    @staticmethod
+    async def paginate(request, items) -> dict:
+        """
+        Страница queryset или списка в формате PageNumberPagination.
+
+        args:
+            request: запрос клиента.
+            items: queryset или список.
+        """
+        page_size = settings.REST_FRAMEWORK['PAGE_SIZE']
+        is_list = isinstance(items, list)
+        count = len(items) if is_list else await items.acount()
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        offset = (page - 1) * page_size
+        results = items[offset:offset + page_size]
+        if not is_list:
+            results = [item async for item in results]
+
+        url = request.build_absolute_uri()
+        if page <= 1:
+            previous_url = None
+        elif page == 2:
+            previous_url = remove_query_param(url, 'page')
+        else:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return {
+            "count": count,
+            "next": (replace_query_param(url, 'page', page + 1)
+                     if offset + page_size < count else None),
+            "previous": previous_url,
+            "results": results,
+        }
+
+
+class AsyncEquipmentList(AsyncAPIView):
+    """Асинхронное представление для вывода и создания объектов Equipment."""
+    read_from_replica = True
+
+    async def get(self, request, *args, **kwargs):
+        """Список объектов Equipment в формате EquipmentGetSerializer."""
+        queryset = Equipment.objects.order_by('id')
+        terms = self.search_terms(request)
+        if terms:
+            # Поиск выбирает самые редкие триграммы запросом к БД.
+            queryset = await sync_to_async(EquipmentSearchIndex().search)(
+                queryset, terms)
+        data = await self.paginate(
+            request, queryset.values('id', 'type_id', 'notation'))
+        data["results"] = await equipment_representation(data["results"])
+        return JsonResponse(data)
+
+    async def post(self, request, *args, **kwargs):
+        """Пакетное создание объектов Equipment через EquipmentSerializer."""
+        payload = self.get_json(request)
+        if payload is None:
+            return JsonResponse({"detail": PARSE_ERROR}, status=400)
+        serializer = EquipmentSerializer(data=payload,
+                                         context={"request": request})
+        errors = await asave(serializer)
+        if errors:
+            return JsonResponse(errors, status=400)
+        return JsonResponse(
+            EquipmentCreatedSerializer(serializer.instance, many=True).data,
+            safe=False, status=201)
+
+
+class AsyncEquipmentDetail(AsyncAPIView):
+    """Асинхронное представление для работы с объектом Equipment."""
+    read_from_replica = True
+
+    async def get(self, request, pk, *args, **kwargs):
+        """Объект Equipment в формате EquipmentGetSerializer."""
+        row = await Equipment.objects.filter(pk=pk).values(
+            'id', 'type_id', 'notation').afirst()
+        if row is None:
+            return JsonResponse({"detail": NOT_FOUND}, status=404)
+        return JsonResponse((await equipment_representation([row]))[0])
+
+    async def put(self, request, pk, *args, **kwargs):
+        """Изменение объекта Equipment."""
+        return await self.update(request, pk, partial=False)
+
+    async def patch(self, request, pk, *args, **kwargs):
+        """Частичное изменение объекта Equipment."""
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial: bool):
+        """
+        Изменение объекта Equipment через EquipmentSerializer.
+
+        args:
+            request: запрос клиента.
+            pk: id объекта.
+            partial: частичное изменение.
+        """
+        try:
+            equipment = await Equipment.objects.aget(pk=pk)
+        except Equipment.DoesNotExist:
+            return JsonResponse({"detail": NOT_FOUND}, status=404)
+        payload = self.get_json(request)
+        if payload is None:
+            return JsonResponse({"detail": PARSE_ERROR}, status=400)
+        serializer = EquipmentSerializer(equipment, data=payload,
+                                         partial=partial,
+                                         context={"request": request})
+        errors = await asave(serializer)
+        if errors:
+            return JsonResponse(errors, status=400)
+        return JsonResponse(serializer.data)
+
+    async def delete(self, request, pk, *args, **kwargs):
+        """Удаление объекта Equipment."""
+        if not await Equipment.objects.filter(pk=pk).aexists():
+            return JsonResponse({"detail": NOT_FOUND}, status=404)
+        await sync_to_async(delete_equipment)([pk])
+        return HttpResponse(status=204)
+
+
+class AsyncEquipmentTypeList(AsyncAPIView):
+    """Асинхронное представление для вывода списка объектов EquipmentType."""
+    read_from_replica = True
+
+    async def get(self, request, *args, **kwargs):
+        """Список объектов EquipmentType в формате EquipmentTypeSerializer."""
+        terms = self.search_terms(request)
+        if terms:
+            items = EquipmentTypeSearchIndex().search(
+                EquipmentType.objects.order_by('id'), terms)
+        else:
+            items = list((await type_cache.aall()).values())
+        data = await self.paginate(request, items)
+        data["results"] = EquipmentTypeSerializer(data["results"],
+                                                  many=True).data
+        return JsonResponse(data)
+
+
+async def equipment_representation(rows: list) -> list:
+    """
+    Строки Equipment в формате EquipmentGetSerializer.
+
+    Серийные номера страницы загружаются одним запросом, тип - из кэша
+    типов оборудования.
+
+    args:
+        rows: словари с ключами id, type_id, notation.
+    """
+    if not rows:
+        return []
+    types = await type_cache.aall()
+    keys = {(row['type_id'], row['notation']) for row in rows}
+    query = EquipmentGetListSerializer.serial_numbers_query(keys)
+    serial_numbers = EquipmentGetListSerializer.group_serial_numbers(
+        keys, [row async for row in query])
+
+    type_data = {}
+    for type_id, _ in keys:
+        equipment_type = types.get(type_id)
+        type_data[type_id] = (EquipmentTypeSerializer(equipment_type).data
+                              if equipment_type is not None else None)
+    return [
+        {
+            "id": row['id'],
+            "serial_numbers": serial_numbers.get(
+                (row['type_id'], row['notation']), []),
+            "type": type_data[row['type_id']],
+            "notation": row['notation'],
+        }
+        for row in rows
+    ]
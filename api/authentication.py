@@ -0,0 +1,175 @@
+"""
+Модуль аутентификации API.
+    user_cache_key: ключ пользователя в кэше аутентификации.
+    invalidate_user: удаление пользователя из кэша аутентификации.
+    CachedJWTAuthentication: JWT аутентификация с кэшем пользователей.
+
+JWTAuthentication загружает пользователя из БД при каждом запросе.
+CachedJWTAuthentication проверяет токен так же, а пользователя берёт из
+кэша Django (CACHES[EQUIPMENT_AUTH_CACHE_ALIAS]) на время
+EQUIPMENT_AUTH_USER_CACHE_TTL. Сохранение и удаление пользователя
+(деактивация, смена пароля) сбрасывает запись сигналами.
+
+В кэше хранятся только поля USER_CACHE_FIELDS (id, имя, is_active,
+is_staff), но не хэш пароля. Пользователь из кэша - объект модели с
+отложенными остальными полями, как после .only(): обращение к ним
+загружает их из БД, save() сохраняет только загруженные поля.
+
+При EQUIPMENT_JWT_STATELESS_USER пользователь создаётся из полей токена
+(TOKEN_USER_CLASS) без обращения к БД и кэшу: деактивация пользователя
+в этом режиме действует только после истечения выданных токенов.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+USER_CACHE_FIELDS = ('is_active', 'is_staff')
+
+
+def user_cache_key(user_id) -> str:
+    """
+    Ключ пользователя в кэше аутентификации.
+
+    args:
+        user_id: значение USER_ID_FIELD пользователя.
+    """
+    return f"auth-user:{user_id}"
+
+
+def _cache():
+    """Кэш Django, в котором хранятся пользователи."""
+    return caches[settings.EQUIPMENT_AUTH_CACHE_ALIAS]
+
+
+def invalidate_user(user_id) -> None:
+    """
+    Удалить пользователя из кэша аутентификации.
+
+    args:
+        user_id: значение USER_ID_FIELD пользователя.
+    """
+    _cache().delete(user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT аутентификация, загружающая пользователя из кэша."""
+
+    def get_user(self, validated_token):
+        """
+        Пользователь токена из кэша или из БД при промахе.
+
+        args:
+            validated_token: проверенный JWT токен.
+        """
+        if settings.EQUIPMENT_JWT_STATELESS_USER:
+            return self.get_token_user(validated_token)
+        user_id = self.get_user_id(validated_token)
+        key = user_cache_key(user_id)
+        data = _cache().get(key)
+        if isinstance(data, dict):
+            user = self.cached_user(data)
+        else:
+            user = self.load_user(user_id)
+            _cache().set(key, self.cache_data(user),
+                         settings.EQUIPMENT_AUTH_USER_CACHE_TTL)
+        return self.check_user(user, validated_token)
+
+    def cache_fields(self) -> list:
+        """Имена полей пользователя, которые хранятся в кэше."""
+        names = {self.user_model._meta.pk.attname,
+                 api_settings.USER_ID_FIELD, self.user_model.USERNAME_FIELD,
+                 *USER_CACHE_FIELDS}
+        return [field.attname
+                for field in self.user_model._meta.concrete_fields
+                if field.attname in names]
+
+    def cache_data(self, user) -> dict:
+        """
+        Поля пользователя для записи в кэш.
+
+        args:
+            user: пользователь из БД.
+        """
+        return {name: getattr(user, name) for name in self.cache_fields()}
+
+    def cached_user(self, data: dict):
+        """
+        Пользователь из полей кэша, остальные поля отложены.
+
+        args:
+            data: поля пользователя из кэша.
+        """
+        fields = [field.attname
+                  for field in self.user_model._meta.concrete_fields]
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), fields,
+            [data.get(name, DEFERRED) for name in fields])
+
+    @staticmethod
+    def get_user_id(validated_token):
+        """
+        Идентификатор пользователя из токена.
+
+        args:
+            validated_token: проверенный JWT токен.
+        """
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"))
+
+    @staticmethod
+    def get_token_user(validated_token):
+        """
+        Пользователь из полей токена (TOKEN_USER_CLASS).
+
+        args:
+            validated_token: проверенный JWT токен.
+        """
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification"))
+        return api_settings.TOKEN_USER_CLASS(validated_token)
+
+    def load_user(self, user_id):
+        """
+        Загрузить пользователя из БД.
+
+        args:
+            user_id: значение USER_ID_FIELD пользователя.
+        """
+        try:
+            return self.user_model.objects.get(
+                **{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"),
+                                       code="user_not_found")
+
+    @staticmethod
+    def check_user(user, validated_token):
+        """
+        Проверки JWTAuthentication: активность и смена пароля.
+
+        args:
+            user: пользователь.
+            validated_token: проверенный JWT токен.
+        """
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"),
+                                       code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(
+                    user.password):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed")
+        return user
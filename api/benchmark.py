@@ -0,0 +1,297 @@
+"""
+Модуль нагрузочных замеров API.
+    generate_mask: случайная маска серийного номера.
+    generate_serial: случайный серийный номер по маске.
+    generate_inventory: синтетический набор типов и оборудования.
+    BenchmarkContext: данные, на которых выполняются сценарии.
+    SCENARIOS: сценарии замеров через маршруты api/urls.py.
+    run_benchmarks: выполнение сценариев и сбор статистики.
+    compare_results: сравнение результатов с базовыми.
+
+Результаты сохраняются в JSON и сравниваются по медиане времени.
+"""
+import random
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from api.bulk import delete_equipment, insert_equipment
+from api.masks import MASK_ALPHABETS
+from api.models import Equipment, EquipmentType
+from api.type_cache import type_cache
+
+# Сколько объектов оборудования в среднем делят пару (тип, примечание).
+NOTATION_GROUP_SIZE = 5
+BATCH_CREATE_SIZE = 100
+
+
+def generate_mask(rng: random.Random, min_length: int = 8,
+                  max_length: int = 12) -> str:
+    """
+    Случайная маска, в основном из классов X, N, A.
+
+    args:
+        rng: генератор случайных чисел.
+        min_length: минимальная длина маски.
+        max_length: максимальная длина маски.
+    """
+    symbols = rng.choices('XXXNNAAaZ', k=rng.randint(min_length, max_length))
+    # Первый символ X даёт достаточно вариантов для уникальных номеров.
+    symbols[0] = 'X'
+    return ''.join(symbols)
+
+
+def generate_serial(mask: str, rng: random.Random) -> str:
+    """
+    Случайный серийный номер, соответствующий маске.
+
+    args:
+        mask: маска серийного номера.
+        rng: генератор случайных чисел.
+    """
+    return ''.join(rng.choice(MASK_ALPHABETS[symbol])
+                   if symbol in MASK_ALPHABETS else symbol
+                   for symbol in mask)
+
+
+def generate_inventory(types: int, equipment: int, seed: int = 0,
+                       batch_size: Optional[int] = None,
+                       on_batch: Optional[Callable[[int], None]] = None
+                       ) -> tuple:
+    """
+    Создать типы оборудования и соответствующее маскам оборудование.
+
+    Оборудование вставляется пачками через insert_equipment, поэтому
+    поисковый индекс строится так же, как при обычном создании.
+    Возвращает число созданных типов и оборудования.
+
+    args:
+        types: число типов оборудования.
+        equipment: число объектов оборудования.
+        seed: зерно генератора, одинаковое зерно даёт одинаковые данные.
+        batch_size: размер пачки вставки.
+        on_batch: функция, получающая число вставленных объектов.
+    """
+    rng = random.Random(seed)
+    batch_size = batch_size or settings.EQUIPMENT_BULK_BATCH_SIZE
+    EquipmentType.objects.bulk_create([
+        EquipmentType(name=f"Benchmark type {seed}-{index}",
+                      serial_number_mask=generate_mask(rng))
+        for index in range(types)
+    ], batch_size=batch_size)
+    # bulk_create не вызывает сигналы, кэш типов сбрасывается явно.
+    type_cache.invalidate()
+    # bulk_create заполняет id не на всех СУБД.
+    created_types = list(EquipmentType.objects.filter(
+        name__startswith=f"Benchmark type {seed}-").order_by('id'))
+    if not created_types:
+        return 0, 0
+
+    used = set(Equipment.objects.values_list('serial_number', flat=True))
+    created = 0
+    while created < equipment:
+        objects = []
+        for index in range(created, min(created + batch_size, equipment)):
+            equipment_type = created_types[
+                (index // NOTATION_GROUP_SIZE) % len(created_types)]
+            serial = generate_serial(equipment_type.serial_number_mask, rng)
+            while serial in used:
+                serial = generate_serial(equipment_type.serial_number_mask,
+                                         rng)
+            used.add(serial)
+            objects.append(Equipment(
+                type=equipment_type, serial_number=serial,
+                notation=f"Batch {seed}-{index // NOTATION_GROUP_SIZE}"))
+        insert_equipment(objects)
+        created += len(objects)
+        if on_batch is not None:
+            on_batch(created)
+    return len(created_types), created
+
+
+@dataclass
+class BenchmarkContext:
+    """Данные, на которых выполняются сценарии."""
+    client: Client
+    rng: random.Random
+    ids: list
+    types: list
+    search_terms: list
+    created: list = field(default_factory=list)
+
+    @classmethod
+    def load(cls, client: Client, seed: int = 0, sample: int = 1000):
+        """
+        Выбрать объекты для сценариев из текущей БД.
+
+        args:
+            client: авторизованный тестовый клиент.
+            seed: зерно генератора.
+            sample: число объектов в выборке.
+        """
+        rng = random.Random(seed)
+        ids = list(Equipment.objects.order_by('id').values_list(
+            'id', flat=True)[:sample])
+        types = list(EquipmentType.objects.order_by('id')[:sample])
+        if not ids or not types:
+            raise ValueError("The database contains no equipment.")
+        serials = Equipment.objects.filter(id__in=ids).values_list(
+            'serial_number', flat=True)
+        search_terms = [serial[:4] for serial in serials]
+        return cls(client, rng, ids, types, search_terms)
+
+    def new_serials(self, equipment_type, count: int) -> list:
+        """
+        Серийные номера для создания, не занятые в БД.
+
+        args:
+            equipment_type: тип оборудования.
+            count: число номеров.
+        """
+        serials = set()
+        while len(serials) < count:
+            serials.add(generate_serial(equipment_type.serial_number_mask,
+                                        self.rng))
+        existing = set(Equipment.objects.filter(
+            serial_number__in=serials).values_list('serial_number', flat=True))
+        return [serial for serial in serials if serial not in existing]
+
+    def create(self, count: int):
+        """
+        Создание оборудования через equipment-list.
+
+        args:
+            count: число серийных номеров в запросе.
+        """
+        equipment_type = self.rng.choice(self.types)
+        response = self.client.post(
+            reverse('equipment-list'),
+            {"type": equipment_type.id, "notation": "benchmark",
+             "serial_number": self.new_serials(equipment_type, count)},
+            content_type="application/json")
+        if response.status_code == 201:
+            self.created.extend(item["id"] for item in response.json())
+        return response
+
+    def cleanup(self) -> None:
+        """Удалить созданное сценариями оборудование."""
+        delete_equipment(self.created)
+        self.created = []
+
+
+def _invalid_serials(context: BenchmarkContext):
+    """Проверка маски: запрос с номерами, не подходящими под маску."""
+    equipment_type = context.rng.choice(context.types)
+    serials = [generate_serial(equipment_type.serial_number_mask,
+                               context.rng) for _ in range(BATCH_CREATE_SIZE)]
+    serials = ["!" + serial[1:] for serial in serials]
+    return context.client.post(
+        reverse('equipment-list'),
+        {"type": equipment_type.id, "notation": "benchmark",
+         "serial_number": serials},
+        content_type="application/json")
+
+
+# Имя сценария: (функция запроса, ожидаемый статус ответа).
+SCENARIOS = {
+    "list": (lambda context: context.client.get(
+        reverse('equipment-list'), {'page': context.rng.randint(1, 5)}), 200),
+    "detail": (lambda context: context.client.get(reverse(
+        'equipment-detail', args=[context.rng.choice(context.ids)])), 200),
+    "search": (lambda context: context.client.get(
+        reverse('equipment-list'),
+        {'search': context.rng.choice(context.search_terms)}), 200),
+    "create_single": (lambda context: context.create(1), 201),
+    "create_batch": (lambda context: context.create(BATCH_CREATE_SIZE), 201),
+    "mask_validation": (_invalid_serials, 400),
+}
+
+
+def _percentile(values: list, percent: float) -> float:
+    """
+    Перцентиль по ближайшему рангу.
+
+    args:
+        values: отсортированные значения.
+        percent: перцентиль от 0 до 100.
+    """
+    rank = max(int(round(percent / 100 * len(values))) - 1, 0)
+    return values[min(rank, len(values) - 1)]
+
+
+def run_benchmarks(context: BenchmarkContext, scenarios: list,
+                   iterations: int, warmup: int) -> dict:
+    """
+    Выполнить сценарии и вернуть статистику времени в миллисекундах.
+
+    args:
+        context: данные сценариев.
+        scenarios: имена сценариев из SCENARIOS.
+        iterations: число измеряемых запросов сценария.
+        warmup: число неизмеряемых запросов перед замером.
+    """
+    results = {}
+    try:
+        for name in scenarios:
+            request, expected_status = SCENARIOS[name]
+            for _ in range(warmup):
+                request(context)
+            durations = []
+            queries = []
+            for _ in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = request(context)
+                    durations.append((time.perf_counter() - started) * 1000)
+                if response.status_code != expected_status:
+                    raise AssertionError(
+                        f"Scenario '{name}' returned "
+                        f"{response.status_code}, expected {expected_status}.")  # noqa
+                queries.append(len(captured.captured_queries))
+            durations.sort()
+            results[name] = {
+                "iterations": iterations,
+                "median_ms": round(statistics.median(durations), 3),
+                "p95_ms": round(_percentile(durations, 95), 3),
+                "mean_ms": round(statistics.fmean(durations), 3),
+                "min_ms": round(durations[0], 3),
+                "queries": max(queries),
+            }
+    finally:
+        context.cleanup()
+    return results
+
+
+def compare_results(baseline: dict, current: dict,
+                    threshold: float) -> list:
+    """
+    Сравнить медианы сценариев с базовыми результатами.
+
+    Возвращает строки (сценарий, базовая медиана, текущая медиана,
+    отношение, регрессия). Регрессия - рост медианы больше threshold
+    или рост числа запросов.
+
+    args:
+        baseline: результаты базового замера.
+        current: результаты текущего замера.
+        threshold: допустимый относительный рост, 0.2 - это 20%.
+    """
+    rows = []
+    for name, result in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = (result["median_ms"] / base["median_ms"]
+                 if base["median_ms"] else 1.0)
+        regressed = (ratio > 1 + threshold
+                     or result["queries"] > base["queries"])
+        rows.append((name, base["median_ms"], result["median_ms"], ratio,
+                     regressed))
+    return rows
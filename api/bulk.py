@@ -0,0 +1,377 @@
+"""
+Модуль пакетных операций с оборудованием.
+    chunks: разбиение списка на части для запросов IN.
+    existing_serial_numbers: поиск уже занятых серийных номеров.
+    existing_serial_numbers_batch_size: размер части номеров для проверки.
+    existing_serial_numbers_query: запрос занятых номеров из части списка.
+    duplicate_serial_numbers: поиск повторов внутри списка номеров.
+    held_serial_numbers: поиск номеров, удерживаемых чужим резервом.
+    release_reservations: удаление резервов занятых номеров.
+    serial_number_errors: карта ошибок для списка серийных номеров.
+    serial_numbers_by_id: серийные номера объектов по их id.
+    rows_by_serial_number: строки объектов по серийным номерам.
+    insert_equipment: пакетная вставка объектов Equipment.
+    create_equipment: пакетное создание объектов Equipment.
+    update_equipment: пакетное изменение объектов Equipment.
+    delete_equipment: пакетное удаление объектов Equipment.
+"""
+from collections import Counter
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.changes import record_changes
+from api.conditional import equipment_version
+from api.masks import invalid_serial_numbers
+from api.models import (ArchivedEquipment, Equipment, EquipmentChange,
+                        SerialReservation)
+from api.search import index_equipment
+from api.stats import apply_stats_deltas
+
+
+def chunks(values: list, size: int) -> Iterable[list]:
+    """
+    Разбиение списка на части.
+
+    args:
+        values: список для разбиения.
+        size: размер части.
+    """
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def existing_serial_numbers(serial_numbers: Iterable[str]) -> set:
+    """
+    Получить серийные номера, которые уже есть в БД.
+
+    Номера проверяются запросами IN, размер которых ограничен
+    возможностями backend-а БД. Номер занят, если он есть в Equipment
+    или в ArchivedEquipment: обе таблицы проверяются одним запросом
+    UNION на часть номеров.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+    """
+    serial_numbers = list(set(serial_numbers))
+    if not serial_numbers:
+        return set()
+    existing = set()
+    for chunk in chunks(serial_numbers,
+                        existing_serial_numbers_batch_size(serial_numbers)):
+        existing.update(existing_serial_numbers_query(chunk))
+    return existing
+
+
+def existing_serial_numbers_batch_size(serial_numbers: list) -> int:
+    """
+    Размер части номеров для existing_serial_numbers_query: номера части
+    передаются в запрос дважды, по разу на таблицу.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+    """
+    return connection.ops.bulk_batch_size(['serial_number'] * 2,
+                                          serial_numbers)
+
+
+def existing_serial_numbers_query(serial_numbers: list):
+    """
+    Запрос занятых серийных номеров из части списка.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+    """
+    return Equipment.objects.filter(
+        serial_number__in=serial_numbers,
+    ).values_list('serial_number', flat=True).union(
+        ArchivedEquipment.objects.filter(
+            serial_number__in=serial_numbers,
+        ).values_list('serial_number', flat=True), all=True)
+
+
+def duplicate_serial_numbers(serial_numbers: Iterable[str]) -> set:
+    """
+    Получить серийные номера, которые встречаются в списке больше раза.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+    """
+    return {serial for serial, count in Counter(serial_numbers).items()
+            if count > 1}
+
+
+def serial_numbers_by_id(ids: Iterable[int]) -> dict:
+    """
+    Получить серийные номера объектов Equipment по их id.
+
+    args:
+        ids: id объектов.
+    """
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    batch_size = connection.ops.bulk_batch_size(['id'], ids)
+    serial_numbers = {}
+    for chunk in chunks(ids, batch_size):
+        serial_numbers.update(Equipment.objects.filter(id__in=chunk)
+                              .values_list('id', 'serial_number'))
+    return serial_numbers
+
+
+def rows_by_serial_number(serial_numbers: Iterable[str], fields: tuple,
+                          model=Equipment) -> dict:
+    """
+    Получить строки values() объектов по серийным номерам.
+
+    Номера ищутся запросами IN по уникальному индексу serial_number,
+    число запросов зависит от числа частей, а не номеров.
+
+    args:
+        serial_numbers: серийные номера.
+        fields: поля values(), включая serial_number.
+        model: Equipment или ArchivedEquipment.
+    """
+    serial_numbers = list(set(serial_numbers))
+    if not serial_numbers:
+        return {}
+    batch_size = connection.ops.bulk_batch_size(['serial_number'],
+                                                serial_numbers)
+    rows = {}
+    for chunk in chunks(serial_numbers, batch_size):
+        for row in model.objects.filter(serial_number__in=chunk).values(
+                *fields):
+            rows[row['serial_number']] = row
+    return rows
+
+
+def held_serial_numbers(serial_numbers: Iterable[str], user=None) -> set:
+    """
+    Получить серийные номера с действующим резервом SerialReservation.
+
+    Номера, выданные пользователю user, не считаются удерживаемыми:
+    он может занять их сам. Истёкшие резервы номера не удерживают.
+
+    args:
+        serial_numbers: серийные номера для проверки.
+        user: пользователь, который занимает номера.
+    """
+    serial_numbers = list(set(serial_numbers))
+    if not serial_numbers:
+        return set()
+    reservations = SerialReservation.objects.filter(
+        expires_at__gt=timezone.now())
+    if getattr(user, "pk", None) is not None:
+        reservations = reservations.exclude(user_id=user.pk)
+    held = set()
+    for chunk in chunks(serial_numbers, connection.ops.bulk_batch_size(
+            ['serial_number'], serial_numbers)):
+        held.update(reservations.filter(serial_number__in=chunk).values_list(
+            'serial_number', flat=True))
+    return held
+
+
+def release_reservations(serial_numbers: list) -> int:
+    """
+    Удалить резервы SerialReservation номеров, занятых оборудованием.
+
+    Вызывается внутри транзакции вставки, поэтому резерв исчезает
+    вместе с появлением объекта. Возвращает число удалённых резервов.
+
+    args:
+        serial_numbers: занятые серийные номера.
+    """
+    if not serial_numbers:
+        return 0
+    released = 0
+    for chunk in chunks(serial_numbers, connection.ops.bulk_batch_size(
+            ['serial_number'], serial_numbers)):
+        released += SerialReservation.objects.filter(
+            serial_number__in=chunk).delete()[0]
+    return released
+
+
+def serial_number_errors(equipment_type, serial_numbers: list,
+                         exclude: Iterable[str] = (),
+                         existing: Optional[set] = None,
+                         user=None) -> dict:
+    """
+    Проверить серийные номера по маске типа, по БД, по резервам и на
+    повторы.
+
+    Возвращает карту {серийный номер: текст ошибки}. Проверка в БД
+    выполняется одним набором запросов IN для всего списка.
+
+    args:
+        equipment_type: объект EquipmentType.
+        serial_numbers: серийные номера для проверки.
+        exclude: номера, которые не считаются занятыми (номер
+            изменяемого объекта).
+        existing: уже найденные занятые номера, если проверка в БД
+            выполнена заранее (например, асинхронным ORM).
+        user: пользователь, чьи резервы номеров не считаются занятыми.
+    """
+    errors = {}
+    mask = equipment_type.serial_number_mask
+    for serial in invalid_serial_numbers(equipment_type, serial_numbers):
+        errors[serial] = f"Serial number '{serial}' does not match the mask '{mask}'."  # noqa
+
+    candidates = [serial for serial in serial_numbers if serial not in errors]
+    if existing is None:
+        existing = existing_serial_numbers(candidates)
+    for serial in (existing & set(candidates)) - set(exclude):
+        errors[serial] = f"Serial number '{serial}' already exists."
+    free = [serial for serial in candidates
+            if serial not in errors and serial not in exclude]
+    for serial in held_serial_numbers(free, user):
+        errors[serial] = f"Serial number '{serial}' is reserved."
+    for serial in duplicate_serial_numbers(candidates):
+        errors.setdefault(serial, f"Serial number '{serial}' is duplicated in the request.")  # noqa
+    return errors
+
+
+def insert_equipment(objects: list) -> list:
+    """
+    Вставить объекты Equipment пакетно.
+
+    Вставка выполняется через bulk_create частями по
+    EQUIPMENT_BULK_BATCH_SIZE. Если backend не возвращает первичные ключи
+    после вставки, они дочитываются по серийным номерам. Вызывается
+    внутри транзакции, в ней же записываются поисковый индекс и журнал
+    изменений и удаляются резервы занятых номеров. Версия таблицы для
+    условных запросов меняется после фиксации транзакции.
+
+    args:
+        objects: несохранённые объекты Equipment.
+    """
+    created = Equipment.objects.bulk_create(
+        objects, batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+    if created and created[0].pk is None:
+        _load_primary_keys(created)
+    index_equipment(created)
+    release_reservations([obj.serial_number for obj in created])
+    apply_stats_deltas(Counter((obj.type_id, obj.notation)
+                               for obj in created))
+    record_changes(EquipmentChange.EQUIPMENT, [obj.pk for obj in created],
+                   EquipmentChange.CREATE)
+    equipment_version.bump()
+    return created
+
+
+def create_equipment(serial_numbers: list, **fields) -> list:
+    """
+    Создать объекты Equipment для всех серийных номеров в одной транзакции.
+
+    args:
+        serial_numbers: серийные номера новых объектов.
+        fields: общие поля объектов (type, notation).
+    """
+    objects = [Equipment(serial_number=serial, **fields)
+               for serial in serial_numbers]
+    with transaction.atomic():
+        return insert_equipment(objects)
+
+
+def update_equipment(ids: list, **changes) -> int:
+    """
+    Изменить поля объектов Equipment запросами UPDATE в одной транзакции.
+
+    args:
+        ids: id изменяемых объектов.
+        changes: новые значения полей (type, notation).
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    changes["updated_at"] = timezone.now()
+    batch_size = connection.ops.bulk_batch_size(['id'], ids)
+    updated = 0
+    deltas = Counter()
+    with transaction.atomic():
+        for chunk in chunks(ids, batch_size):
+            groups = _locked_groups(chunk)
+            for type_id, notation in groups.values():
+                deltas[(type_id, notation)] -= 1
+                deltas[(_type_id(changes.get("type", type_id)),
+                        changes.get("notation", notation))] += 1
+            updated += Equipment.objects.filter(id__in=chunk).update(
+                **changes)
+            record_changes(EquipmentChange.EQUIPMENT, groups,
+                           EquipmentChange.UPDATE)
+        apply_stats_deltas(deltas)
+        equipment_version.bump()
+    return updated
+
+
+def delete_equipment(ids: list) -> int:
+    """
+    Удалить объекты Equipment запросами DELETE в одной транзакции.
+
+    Триграммы поискового индекса удаляются каскадом одним запросом на
+    каждую часть id.
+
+    args:
+        ids: id удаляемых объектов.
+    """
+    ids = list(ids)
+    if not ids:
+        return 0
+    batch_size = connection.ops.bulk_batch_size(['id'], ids)
+    deleted = 0
+    deltas = Counter()
+    with transaction.atomic():
+        for chunk in chunks(ids, batch_size):
+            groups = _locked_groups(chunk)
+            deltas.subtract(groups.values())
+            _, counts = Equipment.objects.filter(id__in=chunk).delete()
+            deleted += counts.get(Equipment._meta.label, 0)
+            record_changes(EquipmentChange.EQUIPMENT, groups,
+                           EquipmentChange.DELETE)
+        apply_stats_deltas(deltas)
+        equipment_version.bump()
+    return deleted
+
+
+def _locked_groups(ids: list) -> dict:
+    """
+    Заблокировать строки Equipment и вернуть {id: (тип, примечание)}.
+
+    Вызывается внутри транзакции перед изменением или удалением строк,
+    чтобы изменения статистики и журнал изменений считались по
+    зафиксированным строкам.
+
+    args:
+        ids: id объектов.
+    """
+    return {pk: (type_id, notation) for pk, type_id, notation
+            in Equipment.objects.select_for_update().filter(
+                id__in=ids).values_list('id', 'type_id', 'notation')}
+
+
+def _type_id(value) -> int:
+    """
+    id типа из объекта EquipmentType или id.
+
+    args:
+        value: объект EquipmentType или его id.
+    """
+    return getattr(value, "pk", value)
+
+
+def _load_primary_keys(objects: list) -> None:
+    """
+    Заполнить первичные ключи объектов, созданных через bulk_create.
+
+    args:
+        objects: созданные объекты Equipment без id.
+    """
+    by_serial = {obj.serial_number: obj for obj in objects}
+    serials = list(by_serial)
+    batch_size = connection.ops.bulk_batch_size(['serial_number'], serials)
+    for chunk in chunks(serials, batch_size):
+        rows = Equipment.objects.filter(serial_number__in=chunk).values_list(
+            'serial_number', 'id')
+        for serial, pk in rows:
+            by_serial[serial].pk = pk
@@ -0,0 +1,228 @@
+"""
+Модуль журнала изменений оборудования для синхронизации клиентов.
+    record_changes: запись изменений объектов в журнал.
+    feed_horizon: граница сжатия журнала.
+    latest_cursor: курсор последнего видимого изменения.
+    ChangesGone: курсор старше границы сжатия.
+    changes_since: изменения после курсора.
+    compact_changes: сжатие журнала.
+
+Каждое создание, изменение и удаление Equipment и EquipmentType
+добавляет строку EquipmentChange в той же транзакции: пакетные функции
+api.bulk пишут журнал явно, сохранение отдельных объектов и удаление
+типов обрабатывают сигналы. Курсор - id строки журнала.
+
+Строка журнала становится видимой через EQUIPMENT_CHANGES_SETTLE_SECONDS
+после записи: id выдаются до фиксации транзакции, и строка с меньшим id
+может быть зафиксирована позже строки с большим. Транзакции записи
+должны укладываться в это окно.
+
+Сжатие удаляет строки, после которых есть более новая строка того же
+объекта (клиент получит её, каков бы ни был курсор), и все строки
+старше EQUIPMENT_CHANGES_RETENTION_DAYS. Курсор старше удалённых строк
+получает ChangesGone: клиенту нужна полная синхронизация.
+"""
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+from rest_framework import serializers
+
+from api.models import (ChangeFeedState, Equipment, EquipmentChange,
+                        EquipmentType)
+from api.type_cache import type_cache
+
+_datetime_field = serializers.DateTimeField()
+
+
+class ChangesGone(Exception):
+    """Курсор старше границы сжатия журнала."""
+
+
+def record_changes(model: str, ids: Iterable[int], action: str) -> None:
+    """
+    Записать изменения объектов в журнал.
+
+    Вызывается в транзакции изменения объектов.
+
+    args:
+        model: EquipmentChange.EQUIPMENT или EquipmentChange.EQUIPMENT_TYPE.
+        ids: id изменённых объектов.
+        action: EquipmentChange.CREATE, UPDATE или DELETE.
+    """
+    now = timezone.now()
+    EquipmentChange.objects.bulk_create(
+        (EquipmentChange(model=model, object_id=pk, action=action,
+                         created_at=now) for pk in ids),
+        batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+
+
+def feed_horizon() -> int:
+    """Id последней строки, удалённой сжатием по возрасту."""
+    return ChangeFeedState.objects.filter(pk=1).values_list(
+        'horizon', flat=True).first() or 0
+
+
+def _visible():
+    """Строки журнала, которые уже можно отдавать клиентам."""
+    settled = timezone.now() - timedelta(
+        seconds=settings.EQUIPMENT_CHANGES_SETTLE_SECONDS)
+    return EquipmentChange.objects.filter(created_at__lte=settled)
+
+
+def latest_cursor() -> int:
+    """Курсор последнего видимого изменения."""
+    latest = _visible().aggregate(latest=Max('id'))['latest']
+    return max(latest or 0, feed_horizon())
+
+
+def changes_since(since: int, limit: int) -> dict:
+    """
+    Изменения после курсора.
+
+    Возвращает до limit строк журнала с данными объектов на момент
+    чтения, курсор для следующего запроса и признак has_more. Несколько
+    строк одного объекта в пачке сводятся к последней. Данные
+    удалённого объекта - null.
+
+    args:
+        since: курсор клиента.
+        limit: наибольшее число строк журнала в пачке.
+    """
+    if since < feed_horizon():
+        raise ChangesGone(
+            f"Cursor {since} is older than the change log. Resync the "
+            f"full inventory and continue from the current cursor.")
+
+    rows = list(_visible().filter(id__gt=since).order_by('id').values_list(
+        'id', 'model', 'object_id', 'action')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for cursor, model, object_id, action in rows:
+        latest.pop((model, object_id), None)
+        latest[(model, object_id)] = (cursor, action)
+
+    equipment = _equipment_data([object_id for (model, object_id), (_, action)
+                                 in latest.items()
+                                 if model == EquipmentChange.EQUIPMENT
+                                 and action != EquipmentChange.DELETE])
+    changes = []
+    for (model, object_id), (cursor, action) in latest.items():
+        data = None
+        if action != EquipmentChange.DELETE:
+            if model == EquipmentChange.EQUIPMENT:
+                data = equipment.get(object_id)
+            else:
+                data = _type_data(object_id)
+            if data is None:
+                # Объект удалён после записи строки журнала: его
+                # строка удаления ещё не видна или будет в следующей пачке.
+                action = EquipmentChange.DELETE
+        changes.append({"cursor": cursor, "model": model, "id": object_id,
+                        "action": action, "data": data})
+
+    return {
+        "changes": changes,
+        "next": rows[-1][0] if rows else since,
+        "has_more": has_more,
+    }
+
+
+def _equipment_data(ids: list) -> dict:
+    """
+    Текущие данные объектов Equipment {id: dict}.
+
+    args:
+        ids: id объектов.
+    """
+    if not ids:
+        return {}
+    data = {}
+    batch_size = connection.ops.bulk_batch_size(['id'], ids)
+    for start in range(0, len(ids), batch_size):
+        for row in Equipment.objects.filter(
+                id__in=ids[start:start + batch_size]).values(
+                'id', 'serial_number', 'type_id', 'notation', 'updated_at'):
+            data[row['id']] = {
+                "id": row['id'],
+                "serial_number": row['serial_number'],
+                "type": row['type_id'],
+                "notation": row['notation'],
+                "updated_at": _datetime_field.to_representation(
+                    row['updated_at']),
+            }
+    return data
+
+
+def _type_data(type_id: int) -> Optional[dict]:
+    """
+    Текущие данные типа оборудования или None.
+
+    args:
+        type_id: id типа.
+    """
+    # Импорт здесь: api.fast_read зависит от сериалайзеров, которые
+    # зависят от api.bulk, а api.bulk - от этого модуля.
+    from api.fast_read import type_representation
+
+    equipment_type = type_cache.get(type_id)
+    if equipment_type is None:
+        return None
+    return type_representation(equipment_type)
+
+
+def compact_changes(retention_days: Optional[int] = None) -> tuple:
+    """
+    Сжать журнал изменений.
+
+    Возвращает число удалённых строк, замещённых более новыми строками
+    тех же объектов, и число строк, удалённых по возрасту.
+
+    args:
+        retention_days: сколько дней хранить строки, по умолчанию
+            EQUIPMENT_CHANGES_RETENTION_DAYS.
+    """
+    if retention_days is None:
+        retention_days = settings.EQUIPMENT_CHANGES_RETENTION_DAYS
+    newer = EquipmentChange.objects.filter(
+        model=OuterRef('model'), object_id=OuterRef('object_id'),
+        id__gt=OuterRef('id'))
+    superseded = 0
+    for ids in _id_batches(_visible().filter(Exists(newer))):
+        with transaction.atomic():
+            superseded += EquipmentChange.objects.filter(
+                id__in=ids).delete()[0]
+
+    expired = 0
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    for ids in _id_batches(EquipmentChange.objects.filter(
+            created_at__lt=cutoff)):
+        with transaction.atomic():
+            state, _ = ChangeFeedState.objects.select_for_update(
+            ).get_or_create(pk=1)
+            state.horizon = max(state.horizon, ids[-1])
+            state.save(update_fields=['horizon'])
+            expired += EquipmentChange.objects.filter(id__in=ids).delete()[0]
+    return superseded, expired
+
+
+def _id_batches(queryset) -> Iterable[list]:
+    """
+    Части id строк queryset по возрастанию для удаления.
+
+    Каждая следующая часть выбирается заново после удаления предыдущей.
+
+    args:
+        queryset: queryset строк журнала.
+    """
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[
+            :settings.EQUIPMENT_BULK_BATCH_SIZE])
+        if not ids:
+            return
+        yield ids
@@ -0,0 +1,84 @@
+"""
+Модуль сжатия ответов.
+    accepts_encoding: принимает ли клиент кодирование ответа.
+    CompressionMiddleware: сжатие ответов brotli или gzip.
+
+brotli - необязательная зависимость: без него ответы сжимаются только
+gzip. Ответы короче EQUIPMENT_COMPRESS_MIN_BYTES не сжимаются.
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+ENCODING_RE = re.compile(r'([a-z*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?', re.I)
+
+
+def accepts_encoding(request, encoding: str) -> bool:
+    """
+    Принимает ли клиент кодирование по заголовку Accept-Encoding.
+
+    args:
+        request: запрос клиента.
+        encoding: название кодирования (br, gzip).
+    """
+    header = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for part in header.split(","):
+        match = ENCODING_RE.match(part.strip())
+        if match and match.group(1).lower() == encoding:
+            try:
+                return float(match.group(2) or 1) > 0
+            except ValueError:
+                return False
+    return False
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Сжатие ответов по заголовку Accept-Encoding.
+
+    brotli выбирается, если он установлен и принимается клиентом, для
+    ответов целиком в памяти, кроме HTML: у brotli нет случайных байтов
+    GZipMiddleware, защищающих страницы с CSRF токеном от BREACH.
+    Остальные ответы, включая потоковые, сжимает GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if (not response.streaming
+                and len(response.content) < settings.EQUIPMENT_COMPRESS_MIN_BYTES):  # noqa
+            return response
+        if response.has_header("Content-Encoding"):
+            return response
+        if (brotli is not None and not response.streaming
+                and not response.get("Content-Type", "").startswith(
+                    "text/html")
+                and accepts_encoding(request, "br")):
+            return self.compress_brotli(response)
+        return super().process_response(request, response)
+
+    @staticmethod
+    def compress_brotli(response):
+        """
+        Сжать ответ brotli, если он становится короче.
+
+        args:
+            response: ответ представления.
+        """
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(
+            response.content, quality=settings.EQUIPMENT_BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = "br"
+        return response
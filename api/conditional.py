@@ -0,0 +1,164 @@
+"""
+Модуль условных запросов (ETag / Last-Modified).
+    TableVersion: версия таблицы в БД, меняется при каждой записи.
+    equipment_version: версия таблицы Equipment.
+    archive_version: версия таблицы ArchivedEquipment.
+    make_etag: построение ETag из частей состояния ресурса.
+    ConditionalMixin: проверка If-None-Match / If-Modified-Since / If-Match
+        в представлениях DRF.
+
+Валидаторы считаются без сериализации: для объекта - по полям
+updated_at объекта, связанных записей и типа, для списков - по версиям
+таблиц и параметрам запроса, одним запросом версии по первичному ключу.
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Optional
+
+from django.db import router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from api.models import DataVersion
+
+
+class TableVersion:
+    """
+    Версия таблицы в строке DataVersion.
+
+    Значение версии - время последней записи в наносекундах, поэтому оно
+    же служит Last-Modified списка. Версия хранится в БД, поэтому все
+    процессы видят одну версию, а читатель реплики получает версию той
+    же реплики, что и данные. Версия меняется после фиксации транзакции
+    записи отдельным коротким UPDATE: строка версии не блокируется на
+    время транзакции, и параллельные записи не ждут друг друга.
+
+    args:
+        name: имя таблицы.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def current(self) -> int:
+        """Текущая версия таблицы."""
+        version = DataVersion.objects.filter(name=self.name).values_list(
+            'version', flat=True).first()
+        if version is None:
+            state, _ = DataVersion.objects.db_manager(
+                router.db_for_write(DataVersion)).get_or_create(
+                    name=self.name, defaults={"version": time.time_ns()})
+            version = state.version
+        return version
+
+    def bump(self) -> None:
+        """
+        Отметить запись в таблицу.
+
+        Вызывается в транзакции записи: версия меняется после её
+        фиксации, при откате не меняется.
+        """
+        transaction.on_commit(self._bump)
+
+    def _bump(self) -> None:
+        """Сменить версию таблицы вне транзакции записи."""
+        now = time.time_ns()
+        updated = DataVersion.objects.filter(name=self.name).update(
+            version=Greatest(F('version') + 1, Value(now)))
+        if not updated:
+            DataVersion.objects.get_or_create(name=self.name,
+                                              defaults={"version": now})
+
+
+equipment_version = TableVersion('equipment')
+archive_version = TableVersion('archive')
+
+
+def make_etag(*parts) -> str:
+    """
+    Построить ETag из частей состояния ресурса.
+
+    args:
+        parts: значения, от которых зависит представление ресурса.
+    """
+    return quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def version_timestamp(version: int) -> int:
+    """
+    Перевести версию таблицы в unix-время в секундах.
+
+    args:
+        version: версия таблицы в наносекундах.
+    """
+    return version // 1_000_000_000
+
+
+def datetime_timestamp(value: Optional[datetime]) -> Optional[int]:
+    """
+    Перевести дату изменения в unix-время в секундах.
+
+    args:
+        value: значение поля updated_at.
+    """
+    return int(value.timestamp()) if value is not None else None
+
+
+class ConditionalMixin:
+    """
+    Условные запросы для представлений DRF.
+
+    Представление реализует get_resource_state, возвращающий пару
+    (etag, last_modified) или None, если ресурс не найден. GET и HEAD с
+    совпадающим If-None-Match или неизменённым If-Modified-Since получают
+    304 без тела, запись при несовпадающем If-Match получает 412.
+    If-Match сравнивается строго: слабый ETag сжатого ответа не
+    совпадает ни с одним и тоже получает 412.
+    Проверка выполняется после аутентификации и прав доступа.
+    """
+
+    def get_resource_state(self) -> Optional[tuple]:
+        """Пара (etag, last_modified в unix-времени) или None."""
+        raise NotImplementedError
+
+    def handle_conditional(self, handler, request, *args, **kwargs):
+        """
+        Выполнить обработчик с проверкой условных заголовков.
+
+        args:
+            handler: обработчик DRF (list, retrieve, update, ...).
+            request: запрос клиента.
+        """
+        state = self.get_resource_state()
+        if state is not None:
+            etag, last_modified = state
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return self._set_validators(response, state)
+
+        response = handler(request, *args, **kwargs)
+        if request.method not in ('GET', 'HEAD'):
+            state = self.get_resource_state()
+        if state is not None and 200 <= response.status_code < 300:
+            self._set_validators(response, state)
+        return response
+
+    @staticmethod
+    def _set_validators(response, state: tuple):
+        """
+        Установить заголовки ETag и Last-Modified.
+
+        args:
+            response: ответ представления.
+            state: пара (etag, last_modified).
+        """
+        etag, last_modified = state
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
@@ -0,0 +1,41 @@
+"""
+Общие фикстуры тестов приложения api.
+    create_user: пользователь API.
+    create_equipment_type: тип оборудования с маской из букв и цифр.
+    logged_client: клиент с авторизованным пользователем.
+    equipment_type: тип оборудования с маской из цифр.
+"""
+import pytest
+from django.contrib.auth.models import User
+
+from api.models import EquipmentType
+
+
+@pytest.fixture
+def create_user():
+    """Фикстура для создания пользователя."""
+    username = "test_user"
+    password = "12345678"
+
+    return User.objects.create_user(username=username, password=password)
+
+
+@pytest.fixture
+def create_equipment_type():
+    """Создание типа оборудования."""
+    return EquipmentType.objects.create(name='Type1',
+                                        serial_number_mask='XXAAAAAXAA')
+
+
+@pytest.fixture
+def logged_client(client, create_user):
+    """Клиент с авторизованным пользователем."""
+    client.force_login(create_user)
+    return client
+
+
+@pytest.fixture
+def equipment_type():
+    """Тип оборудования с маской из цифр."""
+    return EquipmentType.objects.create(name="Digits",
+                                        serial_number_mask="NNNN")
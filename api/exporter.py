@@ -0,0 +1,107 @@
+"""
+Модуль потокового экспорта оборудования в NDJSON и CSV.
+    iter_export_rows: чтение строк выгрузки частями.
+    export_lines: строки файла выгрузки в выбранном формате.
+
+Строки читаются через values() с join на EquipmentType частями по
+первичному ключу (id > последний выгруженный), поэтому память не
+зависит от размера таблицы на любом backend-е, включая MySQL, где
+iterator() буферизует весь результат на стороне клиента.
+
+Условия отфильтрованного queryset (поиск) не повторяются для каждой
+части: id подходящих строк выбираются одним запросом по возрастанию, а
+строки читаются частями по этим id. В памяти MySQL при этом
+оказываются только id найденных строк.
+"""
+import csv
+import json
+from itertools import islice
+from typing import Iterator
+
+from django.db import connections
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+EXPORT_FIELDS = ('id', 'serial_number', 'notation', 'type_id', 'type__name',
+                 'type__serial_number_mask')
+EXPORT_COLUMNS = ('id', 'serial_number', 'notation', 'type', 'type_name',
+                  'type_serial_number_mask')
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_export_rows(queryset, chunk_size: int) -> Iterator[tuple]:
+    """
+    Прочитать строки выгрузки частями по первичному ключу.
+
+    args:
+        queryset: отфильтрованный queryset объектов Equipment.
+        chunk_size: число строк в одном запросе.
+    """
+    if queryset.query.has_filters():
+        yield from _iter_rows_by_ids(queryset, chunk_size)
+        return
+    rows = queryset.order_by('id').values_list(*EXPORT_FIELDS)
+    last_id = None
+    while True:
+        chunk = rows if last_id is None else rows.filter(id__gt=last_id)
+        chunk = list(chunk[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+def _iter_rows_by_ids(queryset, chunk_size: int) -> Iterator[tuple]:
+    """
+    Прочитать строки отфильтрованного queryset частями по id.
+
+    Фильтр выполняется один раз: запрос id читается потоком, строки
+    выбираются запросами id IN (...) по части id.
+
+    args:
+        queryset: отфильтрованный queryset объектов Equipment.
+        chunk_size: число строк в одном запросе.
+    """
+    chunk_size = min(chunk_size, connections[queryset.db].ops.bulk_batch_size(
+        ['id'], range(chunk_size)))
+    ids = queryset.order_by('id').values_list('id', flat=True).iterator(
+        chunk_size=chunk_size)
+    rows = queryset.model._default_manager.using(queryset.db).order_by(
+        'id').values_list(*EXPORT_FIELDS)
+    while True:
+        chunk = list(islice(ids, chunk_size))
+        if not chunk:
+            return
+        yield from rows.filter(id__in=chunk)
+
+
+class _Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def export_lines(queryset, file_format: str,
+                 chunk_size: int) -> Iterator[str]:
+    """
+    Строки файла выгрузки.
+
+    args:
+        queryset: отфильтрованный queryset объектов Equipment.
+        file_format: формат выгрузки, ndjson или csv.
+        chunk_size: число строк в одном запросе.
+    """
+    rows = iter_export_rows(queryset, chunk_size)
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_COLUMNS)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, row)),
+                         ensure_ascii=False) + '\n'
@@ -0,0 +1,190 @@
+"""
+Модуль быстрого чтения оборудования без полей ModelSerializer.
+    EQUIPMENT_ROW_FIELDS: поля values() для строк Equipment.
+    equipment_row_fields: поля values(), нужные для выбранных полей ответа.
+    type_representation: тип оборудования в формате EquipmentTypeSerializer.
+    type_representations: представления всех типов из кэша типов.
+    select_fields: выбор полей из готовых представлений.
+    equipment_representations: строки Equipment в формате
+        EquipmentGetSerializer.
+    FastReadMixin: быстрый путь чтения в представлениях DRF.
+
+Строки собираются из values() в словари с тем же порядком ключей и
+форматом значений, что и у сериалайзеров; совпадение ответов
+проверяется тестами. Представления типов строятся один раз на версию
+кэша типов.
+"""
+import threading
+from itertools import chain
+
+from rest_framework import serializers
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
+
+from api.fieldsets import EQUIPMENT_FIELDSET, Fieldset
+from api.metrics import timing
+from api.models import ArchivedEquipment
+from api.renderers import FastJSONRenderer
+from api.serializers import EquipmentGetListSerializer
+from api.type_cache import type_cache
+
+EQUIPMENT_ROW_FIELDS = ('id', 'type_id', 'notation')
+
+_datetime_field = serializers.DateTimeField()
+_types_lock = threading.Lock()
+_types = (None, {})
+
+
+def type_representation(equipment_type) -> dict:
+    """
+    Тип оборудования в формате EquipmentTypeSerializer.
+
+    args:
+        equipment_type: объект EquipmentType.
+    """
+    updated_at = equipment_type.updated_at
+    return {
+        "id": equipment_type.id,
+        "name": equipment_type.name,
+        "serial_number_mask": equipment_type.serial_number_mask,
+        "updated_at": (_datetime_field.to_representation(updated_at)
+                       if updated_at is not None else None),
+    }
+
+
+def type_representations() -> dict:
+    """Представления всех типов {id: dict} для текущей версии кэша типов."""
+    global _types
+    version = type_cache.version()
+    cached_version, representations = _types
+    if cached_version == version:
+        return representations
+    representations = {pk: type_representation(equipment_type)
+                       for pk, equipment_type in type_cache.all().items()}
+    with _types_lock:
+        _types = (version, representations)
+    return representations
+
+
+def select_fields(items: list, fieldset: Fieldset) -> list:
+    """
+    Копии представлений только с выбранными полями.
+
+    Представления из type_representations общие для всех запросов,
+    поэтому они копируются, а не изменяются.
+
+    args:
+        items: представления объектов.
+        fieldset: поля ответа.
+    """
+    fields = fieldset.fields
+    return [{name: item[name] for name in fields} for item in items]
+
+
+def equipment_row_fields(fieldset: Fieldset = None) -> tuple:
+    """
+    Поля values() для строк Equipment под выбранные поля ответа.
+
+    args:
+        fieldset: поля ответа, None - все поля.
+    """
+    if fieldset is None or fieldset == EQUIPMENT_FIELDSET.full:
+        return EQUIPMENT_ROW_FIELDS
+    fields = set(fieldset.fields)
+    if 'serial_numbers' in fields:
+        fields |= {'type', 'notation'}
+    return ('id',) + tuple(
+        column for name, column in (('serial_number', 'serial_number'),
+                                    ('type', 'type_id'),
+                                    ('notation', 'notation'))
+        if name in fields)
+
+
+def equipment_representations(rows: list, fieldset: Fieldset = None,
+                              include_archive: bool = False) -> list:
+    """
+    Строки Equipment в формате EquipmentGetSerializer.
+
+    Серийные номера всех строк загружаются одним запросом и только если
+    поле serial_numbers выбрано.
+
+    args:
+        rows: словари с полями equipment_row_fields(fieldset).
+        fieldset: поля ответа, None - все поля.
+        include_archive: добавить к serial_numbers номера из архива
+            (ещё один запрос).
+    """
+    if not rows:
+        return []
+    if fieldset == EQUIPMENT_FIELDSET.full:
+        fieldset = None
+    fields = fieldset.fields if fieldset is not None else None
+    serial_numbers = {}
+    if fields is None or 'serial_numbers' in fields:
+        keys = {(row['type_id'], row['notation']) for row in rows}
+        query = EquipmentGetListSerializer.serial_numbers_query
+        rows_query = query(keys)
+        if include_archive:
+            rows_query = chain(rows_query, query(keys, ArchivedEquipment))
+        serial_numbers = EquipmentGetListSerializer.group_serial_numbers(
+            keys, rows_query)
+    with timing("serialize"):
+        types = type_representations()
+        if fields is None:
+            return [
+                {
+                    "id": row['id'],
+                    "serial_numbers": serial_numbers.get(
+                        (row['type_id'], row['notation']), []),
+                    "type": types.get(row['type_id']),
+                    "notation": row['notation'],
+                }
+                for row in rows
+            ]
+
+        values = {
+            "id": lambda row: row['id'],
+            "serial_number": lambda row: row['serial_number'],
+            "serial_numbers": lambda row: serial_numbers.get(
+                (row['type_id'], row['notation']), []),
+            "type": ((lambda row: types.get(row['type_id']))
+                     if fieldset.expanded('type')
+                     else (lambda row: row['type_id'])),
+            "notation": lambda row: row['notation'],
+        }
+        getters = [(name, values[name]) for name in fields]
+        return [{name: getter(row) for name, getter in getters}
+                for row in rows]
+
+
+class FastReadMixin:
+    """
+    Быстрый путь чтения для представлений DRF.
+
+    При fast_read = True GET и HEAD запросы отдают строки, собранные из
+    values(), вместо сериалайзера. Ответы кодируются FastJSONRenderer.
+    """
+    fast_read = True
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def use_fast_read(self, request) -> bool:
+        """
+        Использовать ли быстрый путь для запроса.
+
+        args:
+            request: запрос клиента.
+        """
+        return self.fast_read and request.method in ('GET', 'HEAD')
+
+    def rows_response(self, items, build) -> Response:
+        """
+        Пагинированный ответ из строк.
+
+        args:
+            items: queryset со строками values(), объектами или список.
+            build: функция, переводящая строки страницы в представления.
+        """
+        page = self.paginate_queryset(items)
+        if page is not None:
+            return self.get_paginated_response(build(list(page)))
+        return Response(build(list(items)))
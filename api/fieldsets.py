@@ -0,0 +1,167 @@
+"""
+Модуль выборочных полей ответа (?fields= и ?expand=).
+    Fieldset: поля ответа, выбранные клиентом.
+    FieldsetSpec: доступные, выводимые по умолчанию и раскрываемые поля.
+    EQUIPMENT_FIELDSET: поля ответа для оборудования.
+    EQUIPMENT_TYPE_FIELDSET: поля ответа для типов оборудования.
+    EQUIPMENT_LOOKUP_FIELDS: поля ответа поиска по серийным номерам.
+    SparseFieldsSerializerMixin: выборочные поля в сериалайзере.
+    SparseFieldsMixin: разбор параметров полей в представлении.
+
+Без параметров ответ не меняется. ?fields=id,serial_number задаёт поля
+и их порядок. ?expand=type,serial_numbers раскрывает связанные данные:
+нераскрытый type выводится как id типа, нераскрытый serial_numbers не
+выводится (поле, явно указанное в ?fields=, раскрывается). Если задан
+только ?expand=, выводятся поля по умолчанию с раскрытием только
+указанных. Невыбранные поля не вычисляются, и их запросы к БД не
+выполняются.
+"""
+from dataclasses import dataclass
+
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """Поля ответа в порядке вывода и раскрытые поля."""
+    fields: tuple
+    expand: frozenset
+
+    def expanded(self, name: str) -> bool:
+        """
+        Раскрыто ли поле.
+
+        args:
+            name: имя поля.
+        """
+        return name in self.expand
+
+
+@dataclass(frozen=True)
+class FieldsetSpec:
+    """
+    Описание полей ответа ресурса.
+
+    args:
+        available: все поля, которые может запросить клиент.
+        default: поля ответа без параметров.
+        expandable: поля, которые выводятся полностью только при
+            раскрытии.
+        hidden: раскрываемые поля, которые без раскрытия не выводятся.
+    """
+    available: tuple
+    default: tuple
+    expandable: tuple = ()
+    hidden: tuple = ()
+
+    @property
+    def full(self) -> Fieldset:
+        """Поля ответа без параметров."""
+        return Fieldset(self.default, frozenset(self.expandable))
+
+    def parse(self, params) -> Fieldset:
+        """
+        Поля ответа по параметрам запроса.
+
+        args:
+            params: параметры запроса (request.query_params).
+        """
+        fields_value = params.get(FIELDS_PARAM)
+        expand_value = params.get(EXPAND_PARAM)
+        if fields_value is None and expand_value is None:
+            return self.full
+
+        expand = set(_split(expand_value))
+        self._check(EXPAND_PARAM, expand, self.expandable)
+        if fields_value is None:
+            fields = [name for name in self.default
+                      if name not in self.hidden or name in expand]
+        else:
+            fields = _split(fields_value)
+            self._check(FIELDS_PARAM, fields, self.available)
+            fields += [name for name in self.available
+                       if name in expand and name not in fields]
+            expand.update(name for name in fields if name in self.hidden)
+        return Fieldset(tuple(dict.fromkeys(fields)), frozenset(expand))
+
+    @staticmethod
+    def _check(param: str, names, allowed: tuple) -> None:
+        """
+        Проверить, что все имена допустимы.
+
+        args:
+            param: имя параметра запроса.
+            names: имена полей из параметра.
+            allowed: допустимые имена.
+        """
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise ValidationError({param: [
+                f"Unknown fields: {', '.join(unknown)}. "
+                f"Use any of: {', '.join(allowed)}."]})
+
+
+def _split(value) -> list:
+    """
+    Имена полей из значения параметра через запятую.
+
+    args:
+        value: значение параметра или None.
+    """
+    return [name.strip() for name in (value or '').split(',')
+            if name.strip()]
+
+
+EQUIPMENT_FIELDSET = FieldsetSpec(
+    available=('id', 'serial_number', 'serial_numbers', 'type', 'notation'),
+    default=('id', 'serial_numbers', 'type', 'notation'),
+    expandable=('type', 'serial_numbers'),
+    hidden=('serial_numbers',),
+)
+EQUIPMENT_TYPE_FIELDSET = FieldsetSpec(
+    available=('id', 'name', 'serial_number_mask', 'updated_at'),
+    default=('id', 'name', 'serial_number_mask', 'updated_at'),
+)
+EQUIPMENT_LOOKUP_FIELDS = Fieldset(('id', 'serial_number', 'type', 'notation'),
+                                   frozenset({'type'}))
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Выборочные поля сериалайзера по Fieldset из context['fieldset'].
+
+    Применяется только к сериалайзеру ответа, а не к вложенным.
+    Нераскрытые поля заменяются полями из collapsed_fields.
+    """
+    fieldset_spec: FieldsetSpec = None
+    collapsed_fields = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if getattr(self, 'field_name', None):
+            return fields
+        fieldset = self.context.get('fieldset') or self.fieldset_spec.full
+        for name, factory in self.collapsed_fields.items():
+            if name in fieldset.fields and not fieldset.expanded(name):
+                fields[name] = factory()
+        return {name: fields[name] for name in fieldset.fields}
+
+
+class SparseFieldsMixin:
+    """Разбор ?fields= и ?expand= в представлениях DRF."""
+    fieldset_spec: FieldsetSpec = None
+
+    def get_fieldset(self) -> Fieldset:
+        """Поля ответа для текущего запроса."""
+        if self.request.method not in ('GET', 'HEAD'):
+            return self.fieldset_spec.full
+        return self.fieldset_spec.parse(self.request.query_params)
+
+    def get_serializer_context(self):
+        """Контекст сериалайзера с полями ответа."""
+        context = super().get_serializer_context()
+        context['fieldset'] = self.get_fieldset()
+        return context
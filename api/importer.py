@@ -0,0 +1,264 @@
+"""
+Модуль потокового импорта оборудования из файлов CSV и NDJSON.
+    read_rows: построчное чтение файла импорта.
+    ImportReport: итог импорта.
+    EquipmentImporter: импорт строк частями с возобновлением.
+
+Файл читается построчно, в памяти держится только текущая часть строк.
+Каждая часть проверяется по маскам типов и вставляется в отдельной
+транзакции вместе с отметкой о числе обработанных строк в
+EquipmentImport, поэтому после сбоя импорт продолжается с первой
+незафиксированной части. Номер, занятый другим запросом после проверки
+части, попадает в ошибки своей строки, остальные строки части
+вставляются.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterator, Optional
+
+from django.db import IntegrityError, transaction
+
+from api.bulk import (duplicate_serial_numbers, existing_serial_numbers,
+                      held_serial_numbers, insert_equipment)
+from api.masks import invalid_serial_numbers
+from api.models import Equipment, EquipmentImport
+from api.type_cache import type_cache
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_FIELDS = ('type', 'serial_number', 'notation')
+
+
+def read_rows(stream, file_format: str) -> Iterator[tuple]:
+    """
+    Прочитать строки файла импорта.
+
+    Возвращает кортежи (номер строки, данные строки, ошибка разбора).
+    Номера строк данных начинаются с 1.
+
+    args:
+        stream: текстовый поток файла.
+        file_format: формат файла, csv или ndjson.
+    """
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row, None
+        return
+
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield number, None, "Invalid JSON."
+            continue
+        if not isinstance(row, dict):
+            yield number, None, "Row must be a JSON object."
+            continue
+        yield number, row, None
+
+
+@dataclass
+class ImportReport:
+    """Итог импорта оборудования."""
+    source: str
+    rows: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        """Представление отчёта для ответа API."""
+        return {
+            "source": self.source,
+            "rows": self.rows,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": [
+                {"row": row, "serial_number": serial, "error": error}
+                for row, serial, error in self.errors
+            ],
+        }
+
+
+class EquipmentImporter:
+    """
+    Импорт оборудования частями.
+
+    args:
+        source: ключ импорта для возобновления (путь или имя файла).
+        chunk_size: число строк в одной транзакции.
+        resume: продолжить с последней зафиксированной части.
+        on_chunk: функция, вызываемая после каждой части с отчётом
+            и ошибками этой части.
+        max_errors: сколько ошибок хранить в отчёте, None - все.
+        user: пользователь, который импортирует файл: его резервы
+            номеров не считаются занятыми. Сохраняется в EquipmentImport
+            и используется при возобновлении.
+    """
+
+    def __init__(self, source: str, chunk_size: int, resume: bool = False,
+                 on_chunk: Optional[Callable] = None,
+                 max_errors: Optional[int] = None, user=None):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.resume = resume
+        self.on_chunk = on_chunk
+        self.max_errors = max_errors
+        self.user = user if getattr(user, "pk", None) is not None else None
+
+    def run(self, rows: Iterator[tuple]) -> ImportReport:
+        """
+        Выполнить импорт строк.
+
+        args:
+            rows: строки из read_rows.
+        """
+        state, _ = EquipmentImport.objects.get_or_create(source=self.source)
+        if not self.resume:
+            state.rows_committed = state.created = state.failed = 0
+            state.finished = False
+            state.user = self.user
+            state.save()
+        elif self.user is None:
+            self.user = state.user
+
+        report = ImportReport(source=self.source, rows=state.rows_committed,
+                              created=state.created, failed=state.failed)
+        rows = islice(rows, state.rows_committed, None)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            created, errors = self._commit_chunk(state, chunk)
+            report.rows += len(chunk)
+            report.created += created
+            report.failed += len(errors)
+            if self.max_errors is None:
+                report.errors.extend(errors)
+            else:
+                free = self.max_errors - len(report.errors)
+                report.errors.extend(errors[:max(free, 0)])
+            if self.on_chunk is not None:
+                self.on_chunk(report, errors)
+
+        state.finished = True
+        state.save(update_fields=['finished'])
+        return report
+
+    def _commit_chunk(self, state: EquipmentImport, chunk: list) -> tuple:
+        """
+        Проверить и вставить одну часть строк в отдельной транзакции.
+
+        args:
+            state: запись EquipmentImport.
+            chunk: строки части.
+        """
+        valid, errors = self._validate_chunk(chunk)
+        with transaction.atomic():
+            created, taken = self._insert_rows(valid)
+            state.rows_committed += len(chunk)
+            state.created += len(created)
+            state.failed += len(errors) + len(taken)
+            state.save(update_fields=['rows_committed', 'created', 'failed'])
+        if taken:
+            errors = sorted(errors + taken, key=lambda error: error[0])
+        return len(created), errors
+
+    @staticmethod
+    def _insert_rows(rows: list) -> tuple:
+        """
+        Вставить проверенные строки части.
+
+        Вызывается в транзакции части. Если номер занят другим запросом
+        после проверки, занятые номера перечитываются в этой транзакции
+        и становятся ошибками своих строк, остальные строки вставляются.
+        Возвращает созданные объекты и ошибки.
+
+        args:
+            rows: строки (номер строки, тип, серийный номер, примечание).
+        """
+        def build(rows):
+            return [Equipment(type=equipment_type, serial_number=serial,
+                              notation=notation)
+                    for _, equipment_type, serial, notation in rows]
+
+        try:
+            with transaction.atomic():
+                return insert_equipment(build(rows)), []
+        except IntegrityError:
+            taken = existing_serial_numbers(serial for _, _, serial, _ in rows)
+        errors = [(number, serial, f"Serial number '{serial}' already exists.")
+                  for number, _, serial, _ in rows if serial in taken]
+        return insert_equipment(build(
+            [row for row in rows if row[2] not in taken])), errors
+
+    def _validate_chunk(self, chunk: list) -> tuple:
+        """
+        Проверить строки части.
+
+        Возвращает строки для вставки вида (номер строки, тип, серийный
+        номер, примечание) и ошибки вида (номер строки, серийный номер,
+        текст ошибки).
+
+        args:
+            chunk: строки части.
+        """
+        errors = []
+        parsed = []
+        for number, row, parse_error in chunk:
+            if parse_error:
+                errors.append((number, None, parse_error))
+                continue
+            serial = str(row.get('serial_number') or '').strip()
+            notation = str(row.get('notation') or '').strip()
+            type_id = str(row.get('type') or '').strip()
+            if not serial or not notation or not type_id.isdigit():
+                errors.append((number, serial or None,
+                               "Fields 'type', 'serial_number' and "
+                               "'notation' are required."))
+                continue
+            parsed.append((number, int(type_id), serial, notation))
+
+        types = type_cache.all()
+        invalid = set()
+        by_type = {}
+        for _, type_id, serial, _ in parsed:
+            by_type.setdefault(type_id, []).append(serial)
+        for type_id, serials in by_type.items():
+            if type_id in types:
+                invalid.update((type_id, serial) for serial in
+                               invalid_serial_numbers(types[type_id],
+                                                      serials))
+        existing = existing_serial_numbers(
+            serial for _, _, serial, _ in parsed)
+        held = held_serial_numbers((serial for _, _, serial, _ in parsed),
+                                   user=self.user)
+        duplicates = duplicate_serial_numbers(
+            serial for _, _, serial, _ in parsed)
+
+        valid = []
+        seen = set()
+        for number, type_id, serial, notation in parsed:
+            equipment_type = types.get(type_id)
+            if equipment_type is None:
+                error = f"Equipment type '{type_id}' does not exist."
+            elif (type_id, serial) in invalid:
+                error = f"Serial number '{serial}' does not match the mask '{equipment_type.serial_number_mask}'."  # noqa
+            elif serial in existing:
+                error = f"Serial number '{serial}' already exists."
+            elif serial in held:
+                error = f"Serial number '{serial}' is reserved."
+            elif serial in duplicates and serial in seen:
+                error = f"Serial number '{serial}' is duplicated in the file."
+            else:
+                seen.add(serial)
+                valid.append((number, equipment_type, serial, notation))
+                continue
+            errors.append((number, serial, error))
+        errors.sort(key=lambda error: error[0])
+        return valid, errors
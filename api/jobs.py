@@ -0,0 +1,226 @@
+"""
+Модуль очереди задач пакетного создания оборудования.
+    enqueue_job: постановка задачи создания оборудования в очередь.
+    claim_job: захват следующей задачи обработчиком.
+    run_job: выполнение захваченной задачи.
+    run_worker: цикл обработчика очереди.
+
+Очередь хранится в таблице EquipmentJob. Обработчик захватывает задачу
+условным UPDATE по статусу, поэтому одну задачу берёт только один
+обработчик. Перед вставкой номера проверяются так же, как в
+EquipmentSerializer.validate: при ошибках задача завершается со
+статусом failed и ничего не создаёт. Номера вставляются частями по
+EQUIPMENT_BULK_BATCH_SIZE, каждая часть фиксируется в одной транзакции
+вместе с прогрессом задачи: id созданных объектов части добавляются в
+EquipmentJobCreated, а счётчик processed служит курсором. Задача, обработчик которой не отмечался
+дольше EQUIPMENT_JOB_STALE_SECONDS, захватывается заново и продолжается
+с первой незафиксированной части.
+"""
+import logging
+import time
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import (IntegrityError, close_old_connections, connection,
+                       transaction)
+from django.db.models import Q
+from django.utils import timezone
+
+from api.bulk import (chunks, existing_serial_numbers, insert_equipment,
+                      serial_number_errors)
+from api.models import Equipment, EquipmentJob, EquipmentJobCreated
+
+logger = logging.getLogger("api.jobs")
+
+
+def enqueue_job(user, equipment_type, notation: str,
+                serial_numbers: list) -> EquipmentJob:
+    """
+    Поставить задачу создания оборудования в очередь.
+
+    args:
+        user: пользователь, создавший задачу.
+        equipment_type: объект EquipmentType.
+        notation: примечание новых объектов.
+        serial_numbers: серийные номера новых объектов.
+    """
+    return EquipmentJob.objects.create(
+        user=user if getattr(user, "pk", None) else None,
+        type=equipment_type, notation=notation,
+        serial_numbers=serial_numbers, total=len(serial_numbers))
+
+
+def claim_job(worker: str) -> Optional[EquipmentJob]:
+    """
+    Захватить следующую задачу из очереди.
+
+    Берётся старейшая задача в статусе pending или задача в статусе
+    running, обработчик которой перестал отмечаться. Возвращает None,
+    если задач нет.
+
+    args:
+        worker: имя обработчика.
+    """
+    stale = timezone.now() - timedelta(
+        seconds=settings.EQUIPMENT_JOB_STALE_SECONDS)
+    candidates = EquipmentJob.objects.filter(
+        Q(status=EquipmentJob.PENDING)
+        | Q(status=EquipmentJob.RUNNING, heartbeat_at__lt=stale)
+    ).order_by('id').values_list('id', 'status', 'heartbeat_at')
+
+    for pk, job_status, heartbeat_at in candidates[:10]:
+        now = timezone.now()
+        claimed = EquipmentJob.objects.filter(
+            pk=pk, status=job_status, heartbeat_at=heartbeat_at,
+        ).update(status=EquipmentJob.RUNNING, worker=worker,
+                 heartbeat_at=now, started_at=now)
+        if claimed:
+            return EquipmentJob.objects.get(pk=pk)
+    return None
+
+
+class _LostJob(Exception):
+    """Задачу захватил другой обработчик."""
+
+
+def run_job(job: EquipmentJob) -> EquipmentJob:
+    """
+    Выполнить захваченную задачу.
+
+    args:
+        job: задача в статусе running, захваченная claim_job.
+    """
+    try:
+        _run(job)
+    except _LostJob:
+        logger.warning("Job %s was taken over by another worker.", job.pk)
+    except Exception as exc:
+        logger.exception("Job %s failed.", job.pk)
+        _finish(job, EquipmentJob.FAILED, error=str(exc) or repr(exc))
+    return job
+
+
+def _run(job: EquipmentJob) -> None:
+    """
+    Проверить номера задачи и вставить их частями.
+
+    args:
+        job: выполняемая задача.
+    """
+    remaining = job.serial_numbers[job.processed:]
+    errors = serial_number_errors(job.type, remaining, user=job.user)
+    if errors:
+        _finish(job, EquipmentJob.FAILED, errors=errors)
+        return
+
+    for chunk in chunks(remaining, settings.EQUIPMENT_BULK_BATCH_SIZE):
+        with transaction.atomic():
+            created, chunk_errors = _insert_chunk(job, chunk)
+            job.processed += len(chunk)
+            if chunk_errors:
+                job.errors = {**job.errors, **chunk_errors}
+            _save_progress(job, errors_changed=bool(chunk_errors))
+            EquipmentJobCreated.objects.bulk_create(
+                [EquipmentJobCreated(job=job, equipment_id=obj.pk)
+                 for obj in created],
+                batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+
+    _finish(job, EquipmentJob.DONE)
+
+
+def _insert_chunk(job: EquipmentJob, chunk: list) -> tuple:
+    """
+    Вставить часть номеров задачи.
+
+    Номера проверены перед вставкой, но могли быть заняты другим
+    запросом с тех пор. Такие номера попадают в ошибки задачи, остальные
+    объекты части создаются. Возвращает созданные объекты и ошибки.
+
+    args:
+        job: выполняемая задача.
+        chunk: серийные номера части.
+    """
+    def build(serial_numbers):
+        return [Equipment(serial_number=serial, type_id=job.type_id,
+                          notation=job.notation)
+                for serial in serial_numbers]
+
+    try:
+        with transaction.atomic():
+            return insert_equipment(build(chunk)), {}
+    except IntegrityError:
+        taken = existing_serial_numbers(chunk)
+    errors = {serial: f"Serial number '{serial}' already exists."
+              for serial in taken}
+    return insert_equipment(build(
+        [serial for serial in chunk if serial not in taken])), errors
+
+
+def _save_progress(job: EquipmentJob, errors_changed: bool) -> None:
+    """
+    Сохранить прогресс задачи, если она всё ещё принадлежит обработчику.
+
+    args:
+        job: выполняемая задача.
+        errors_changed: записать ли ошибки задачи.
+    """
+    job.heartbeat_at = timezone.now()
+    fields = {"processed": job.processed, "heartbeat_at": job.heartbeat_at}
+    if errors_changed:
+        fields["errors"] = job.errors
+    saved = EquipmentJob.objects.filter(
+        pk=job.pk, status=EquipmentJob.RUNNING, worker=job.worker,
+    ).update(**fields)
+    if not saved:
+        raise _LostJob()
+
+
+def _finish(job: EquipmentJob, job_status: str, errors: Optional[dict] = None,
+            error: str = "") -> None:
+    """
+    Завершить задачу.
+
+    args:
+        job: выполняемая задача.
+        job_status: итоговый статус.
+        errors: ошибки по номерам.
+        error: текст ошибки выполнения.
+    """
+    job.status = job_status
+    job.finished_at = timezone.now()
+    job.error = error
+    if errors is not None:
+        job.errors = errors
+    EquipmentJob.objects.filter(
+        pk=job.pk, status=EquipmentJob.RUNNING, worker=job.worker,
+    ).update(status=job.status, finished_at=job.finished_at,
+             heartbeat_at=job.finished_at, errors=job.errors, error=error)
+
+
+def run_worker(worker: str, once: bool = False,
+               poll_interval: float = 1.0) -> int:
+    """
+    Обрабатывать задачи очереди.
+
+    Возвращает число выполненных задач.
+
+    args:
+        worker: имя обработчика.
+        once: завершиться, когда очередь опустеет.
+        poll_interval: пауза между проверками пустой очереди (секунды).
+    """
+    done = 0
+    while True:
+        if not connection.in_atomic_block:
+            close_old_connections()
+        job = claim_job(worker)
+        if job is None:
+            if once:
+                return done
+            time.sleep(poll_interval)
+            continue
+        logger.info("Worker %s runs job %s (%s serial numbers).",
+                    worker, job.pk, job.total)
+        run_job(job)
+        done += 1
@@ -0,0 +1,50 @@
+"""
+Команда переноса списанного оборудования в архив.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.archive import archive_equipment, decommissioned_ids
+
+
+class Command(BaseCommand):
+    """
+    Перенос оборудования, списанного раньше заданного срока, из Equipment
+    в ArchivedEquipment частями по batch-size строк. Каждая часть
+    переносится в отдельной транзакции, поэтому строки Equipment
+    блокируются ненадолго.
+    """
+    help = "Move decommissioned equipment into the archive table in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days", type=int,
+            default=settings.EQUIPMENT_ARCHIVE_AFTER_DAYS,
+            help="Archive equipment decommissioned at least this many "
+                 "days ago.")
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.EQUIPMENT_BULK_BATCH_SIZE,
+            help="Number of equipment rows moved per transaction.")
+        parser.add_argument(
+            "--pause", type=float, default=0,
+            help="Seconds to sleep between batches.")
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options["older_than_days"])
+        archived = 0
+        while True:
+            ids = decommissioned_ids(before, options["batch_size"])
+            if not ids:
+                break
+            archived += archive_equipment(ids, before)
+            self.stdout.write(f"Archived {archived} equipment rows.")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {archived} decommissioned equipment rows to the archive."))
@@ -0,0 +1,113 @@
+"""
+Команда замеров API с сохранением и сравнением результатов.
+"""
+import json
+import platform
+from datetime import datetime, timezone
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+
+from api.benchmark import (SCENARIOS, BenchmarkContext, compare_results,
+                           run_benchmarks)
+from api.models import Equipment, EquipmentType
+
+
+class Command(BaseCommand):
+    """
+    Замеры списка, детального просмотра, поиска, создания и проверки
+    масок через маршруты API на текущей БД.
+    """
+    help = "Benchmark the equipment API and compare with a JSON baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True,
+                            help="User the requests are made as.")
+        parser.add_argument("--scenario", choices=list(SCENARIOS),
+                            action="append",
+                            help="Scenario to run. All by default.")
+        parser.add_argument("--iterations", type=int, default=50,
+                            help="Measured requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=5,
+                            help="Unmeasured requests per scenario.")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed for request parameters.")
+        parser.add_argument("--output",
+                            help="Write the results to this JSON file.")
+        parser.add_argument("--compare",
+                            help="Baseline JSON file to compare with.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.2,
+            help="Allowed relative growth of the median, 0.2 is 20%%.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(
+            username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive.")
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as file:
+                baseline = json.load(file)
+
+        client = Client()
+        client.force_login(user)
+        try:
+            context = BenchmarkContext.load(client, seed=options["seed"])
+        except ValueError as exc:
+            raise CommandError(f"{exc} Run generate_inventory first.")
+        results = run_benchmarks(context, options["scenario"] or list(SCENARIOS),  # noqa
+                                 options["iterations"], options["warmup"])
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name}: median {result['median_ms']} ms, "
+                f"p95 {result['p95_ms']} ms, {result['queries']} queries")
+
+        if options["output"]:
+            report = {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "environment": {
+                    "python": platform.python_version(),
+                    "django": django.get_version(),
+                    "database": connection.vendor,
+                },
+                "dataset": {
+                    "types": EquipmentType.objects.count(),
+                    "equipment": Equipment.objects.count(),
+                },
+                "results": results,
+            }
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+
+        if baseline is not None:
+            self.report_comparison(baseline, results, options["threshold"])
+
+    def report_comparison(self, baseline: dict, results: dict,
+                          threshold: float) -> None:
+        """
+        Вывести сравнение и завершиться ошибкой при регрессии.
+
+        args:
+            baseline: базовый отчёт.
+            results: текущие результаты.
+            threshold: допустимый относительный рост медианы.
+        """
+        regressions = []
+        for name, base, current, ratio, regressed in compare_results(
+                baseline["results"], results, threshold):
+            line = f"{name}: {base} ms -> {current} ms ({ratio:.2f}x)"
+            if regressed:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f"{line} REGRESSION"))
+            else:
+                self.stdout.write(line)
+        if regressions:
+            raise CommandError(
+                f"Regressions past {threshold:.0%}: {', '.join(regressions)}.")  # noqa
@@ -0,0 +1,27 @@
+"""
+Команда сжатия журнала изменений оборудования.
+"""
+from django.core.management.base import BaseCommand
+
+from api.changes import compact_changes
+
+
+class Command(BaseCommand):
+    """
+    Удаление строк журнала, замещённых более новыми строками тех же
+    объектов, и строк старше срока хранения.
+    """
+    help = ("Remove superseded change log entries and entries older than "
+            "the retention period.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days", type=int, default=None,
+            help="Days to keep change log entries. Defaults to "
+                 "EQUIPMENT_CHANGES_RETENTION_DAYS.")
+
+    def handle(self, *args, **options):
+        superseded, expired = compact_changes(options["retention_days"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {superseded} superseded and {expired} expired change "
+            f"log entries."))
@@ -0,0 +1,97 @@
+"""
+Команда сравнения синхронных и асинхронных представлений под
+параллельной нагрузкой.
+"""
+import asyncio
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import AsyncClient
+from django.urls import reverse
+
+ROUTES = {
+    "sync": "equipment-list",
+    "async": "async-equipment-list",
+}
+
+
+class Command(BaseCommand):
+    """
+    Параллельные запросы к списку оборудования через ASGI обработчик.
+
+    Задержка БД имитируется обёрткой execute_wrapper на каждом новом
+    соединении. Асинхронный ORM Django выполняет запросы через
+    sync_to_async в общем потоке, поэтому выигрыш заметен прежде всего
+    на ожидании вне БД; команда показывает фактическую разницу.
+    """
+    help = "Compare throughput of the sync and async equipment list views."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--username", required=True,
+                            help="User the requests are made as.")
+        parser.add_argument("--requests", type=int, default=50,
+                            help="Total number of requests per view.")
+        parser.add_argument("--concurrency", type=int, default=10,
+                            help="Requests in flight at the same time.")
+        parser.add_argument("--latency-ms", type=float, default=0,
+                            help="Simulated delay added to every query.")
+        parser.add_argument("--view", choices=list(ROUTES), action="append",
+                            help="View to measure. Both by default.")
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(
+            username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' does not exist.")
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")  # noqa
+
+        latency = options["latency_ms"] / 1000
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def install_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        if latency:
+            connection_created.connect(install_delay)
+        try:
+            for view in options["view"] or list(ROUTES):
+                elapsed, failed = asyncio.run(self.measure(
+                    user, reverse(ROUTES[view]), options["requests"],
+                    options["concurrency"]))
+                self.stdout.write(
+                    f"{view}: {options['requests']} requests in "
+                    f"{elapsed:.3f}s, {options['requests'] / elapsed:.1f} req/s, "  # noqa
+                    f"{failed} failed")
+        finally:
+            connection_created.disconnect(install_delay)
+
+    @staticmethod
+    async def measure(user, url: str, total: int, concurrency: int) -> tuple:
+        """
+        Выполнить запросы и вернуть время и число неуспешных ответов.
+
+        args:
+            user: пользователь, от имени которого выполняются запросы.
+            url: адрес представления.
+            total: общее число запросов.
+            concurrency: число одновременных запросов.
+        """
+        client = AsyncClient()
+        await client.aforce_login(user)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with semaphore:
+                response = await client.get(url)
+                return response.status_code
+
+        started = time.perf_counter()
+        statuses = await asyncio.gather(*(fetch() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        return elapsed, sum(status != 200 for status in statuses)
@@ -0,0 +1,34 @@
+"""
+Команда проверки и пересчёта статистики оборудования.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.stats import rebuild_stats, verify_stats
+
+
+class Command(BaseCommand):
+    """Сравнение таблиц статистики с данными и их пересчёт."""
+    help = ("Verify the equipment statistics tables against the equipment "
+            "table, or rebuild them.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild", action="store_true",
+            help="Recount the statistics tables in one transaction.")
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            groups = rebuild_stats()
+            self.stdout.write(f"Rebuilt statistics for {groups} "
+                              "(type, notation) pairs.")
+
+        mismatches = verify_stats()
+        for type_id, notation, expected, actual in mismatches:
+            scope = ("type total" if notation is None
+                     else f"notation {notation!r}")
+            self.stdout.write(f"Type {type_id}, {scope}: expected "
+                              f"{expected}, stored {actual}.")
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} statistics mismatches. "
+                               "Run with --rebuild to fix them.")
+        self.stdout.write(self.style.SUCCESS("Statistics match the data."))
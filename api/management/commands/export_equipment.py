@@ -0,0 +1,42 @@
+"""
+Команда потоковой выгрузки оборудования в NDJSON или CSV.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.exporter import EXPORT_FORMATS, export_lines
+from api.models import Equipment
+from api.search import EquipmentSearchIndex
+
+
+class Command(BaseCommand):
+    """Выгрузка оборудования с тем же поиском, что и у EquipmentList."""
+    help = "Stream the equipment inventory as NDJSON or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=EXPORT_FORMATS,
+                            default="ndjson", help="Output format.")
+        parser.add_argument("--search", default="",
+                            help="Same terms as ?search= on the list API.")
+        parser.add_argument("--output",
+                            help="Output file. Standard output by default.")
+        parser.add_argument(
+            "--chunk-size", type=int,
+            default=settings.EQUIPMENT_EXPORT_CHUNK_SIZE,
+            help="Number of rows fetched per query.")
+
+    def handle(self, *args, **options):
+        queryset = Equipment.objects.all()
+        terms = options["search"].replace(",", " ").split()
+        if terms:
+            queryset = EquipmentSearchIndex().search(queryset, terms)
+
+        lines = export_lines(queryset, options["format"],
+                             options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", newline="",
+                      encoding="utf-8") as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
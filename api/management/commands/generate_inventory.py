@@ -0,0 +1,39 @@
+"""
+Команда генерации синтетического набора оборудования для замеров.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmark import generate_inventory
+
+
+class Command(BaseCommand):
+    """Создание типов оборудования и подходящего под их маски оборудования."""
+    help = ("Generate equipment types with random masks and "
+            "mask-conforming equipment for benchmarks.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--types", type=int, default=1000,
+                            help="Number of equipment types.")
+        parser.add_argument("--equipment", type=int, default=100000,
+                            help="Number of equipment rows.")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed; equal seeds give equal data.")
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.EQUIPMENT_BULK_BATCH_SIZE,
+            help="Number of rows inserted per transaction.")
+
+    def handle(self, *args, **options):
+        if options["types"] < 1 or options["equipment"] < 0:
+            raise CommandError(
+                "--types must be positive and --equipment non-negative.")
+
+        def on_batch(created):
+            self.stdout.write(f"Inserted {created} equipment rows.")
+
+        types, equipment = generate_inventory(
+            options["types"], options["equipment"], seed=options["seed"],
+            batch_size=options["batch_size"], on_batch=on_batch)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {types} types and {equipment} equipment rows."))
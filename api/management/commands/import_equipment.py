@@ -0,0 +1,80 @@
+"""
+Команда потокового импорта оборудования из файла CSV или NDJSON.
+"""
+import csv
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.importer import IMPORT_FORMATS, EquipmentImporter, read_rows
+
+
+class Command(BaseCommand):
+    """Импорт оборудования частями с отчётом об ошибках и возобновлением."""
+    help = ("Stream equipment rows (type, serial_number, notation) from a "
+            "CSV or NDJSON file into the database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file to import.")
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS,
+            help="File format. Detected from the extension by default.")
+        parser.add_argument(
+            "--chunk-size", type=int,
+            default=settings.EQUIPMENT_BULK_BATCH_SIZE,
+            help="Number of rows validated and inserted per transaction.")
+        parser.add_argument(
+            "--errors", help="Write the per-row error report to this CSV.")
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Continue from the last committed chunk of this file.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or self._detect_format(path)
+        error_file = None
+        error_writer = None
+        if options["errors"]:
+            error_file = open(options["errors"],
+                              "a" if options["resume"] else "w", newline="")
+            error_writer = csv.writer(error_file)
+            if not options["resume"]:
+                error_writer.writerow(["row", "serial_number", "error"])
+
+        def on_chunk(report, errors):
+            if error_writer is not None:
+                error_writer.writerows(errors)
+                error_file.flush()
+            self.stdout.write(f"Processed {report.rows} rows: "
+                              f"{report.created} created, "
+                              f"{report.failed} failed.")
+
+        importer = EquipmentImporter(
+            source=os.path.abspath(path), chunk_size=options["chunk_size"],
+            resume=options["resume"], on_chunk=on_chunk, max_errors=0)
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as stream:
+                report = importer.run(read_rows(stream, file_format))
+        finally:
+            if error_file is not None:
+                error_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import finished: {report.rows} rows, {report.created} created, "
+            f"{report.failed} failed."))
+
+    @staticmethod
+    def _detect_format(path: str) -> str:
+        """
+        Определить формат файла по расширению.
+
+        args:
+            path: путь к файлу.
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".ndjson", ".jsonl"):
+            return "ndjson"
+        raise CommandError("Cannot detect the file format, use --format.")
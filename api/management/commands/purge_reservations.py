@@ -0,0 +1,19 @@
+"""
+Команда удаления истёкших резервов серийных номеров.
+"""
+from django.core.management.base import BaseCommand
+
+from api.allocator import purge_expired_reservations
+
+
+class Command(BaseCommand):
+    """
+    Удаление истёкших резервов номеров, которые уже заняты оборудованием.
+    Резервы свободных номеров остаются для повторной выдачи.
+    """
+    help = "Remove expired reservations of serial numbers already in use."
+
+    def handle(self, *args, **options):
+        purged = purge_expired_reservations()
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {purged} expired serial reservations."))
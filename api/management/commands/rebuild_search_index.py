@@ -0,0 +1,50 @@
+"""
+Команда перестроения поисковых индексов серийных номеров и примечаний.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api.models import Equipment, SerialNumberTrigram
+from api.search import index_equipment, notation_index
+
+
+class Command(BaseCommand):
+    """
+    Перестроение таблицы SerialNumberTrigram и полнотекстового индекса
+    примечаний по данным Equipment.
+    """
+    help = ("Rebuild the serial number trigram search index and the "
+            "notation full-text index.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int,
+            default=settings.EQUIPMENT_BULK_BATCH_SIZE,
+            help="Number of equipment rows indexed per transaction.")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        SerialNumberTrigram.objects.all().delete()
+
+        indexed = 0
+        last_id = 0
+        while True:
+            chunk = list(Equipment.objects.filter(id__gt=last_id)
+                         .order_by('id').only('id', 'serial_number')
+                         [:chunk_size])
+            if not chunk:
+                break
+            with transaction.atomic():
+                index_equipment(chunk)
+            indexed += len(chunk)
+            last_id = chunk[-1].id
+            self.stdout.write(f"Indexed {indexed} equipment rows.")
+
+        connection = connections[DEFAULT_DB_ALIAS]
+        index = notation_index(DEFAULT_DB_ALIAS)
+        index.install(connection)
+        index.rebuild(connection)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Search index rebuilt for {indexed} equipment rows."))
@@ -0,0 +1,51 @@
+"""
+Команда обработчика очереди задач создания оборудования.
+"""
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.jobs import run_worker
+
+
+class Command(BaseCommand):
+    """Выполнение задач EquipmentJob пулом потоков."""
+    help = ("Process queued equipment batch-create jobs "
+            "(POST /api/equipment/?job=1).")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of worker threads, each with its own connection.")
+        parser.add_argument(
+            "--once", action="store_true",
+            help="Exit when the queue is empty instead of polling.")
+        parser.add_argument(
+            "--poll-interval", type=float, default=1.0,
+            help="Seconds to wait before polling an empty queue again.")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        if workers < 1:
+            raise CommandError("--workers must be at least 1.")
+        name = f"{socket.gethostname()}:{os.getpid()}"
+
+        def work(number: int) -> int:
+            return run_worker(f"{name}:{number}", once=options["once"],
+                              poll_interval=options["poll_interval"])
+
+        def work_in_thread(number: int) -> int:
+            try:
+                return work(number)
+            finally:
+                connections.close_all()
+
+        if workers == 1:
+            done = work(0)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                done = sum(executor.map(work_in_thread, range(workers)))
+        self.stdout.write(f"Processed {done} jobs.")
@@ -0,0 +1,243 @@
+"""
+Модуль проверки серийных номеров по маске типа оборудования.
+    MASK_ALPHABETS: символы номера для каждого класса маски.
+    mask_to_regex: перевод маски в regex.
+    CompiledMask: скомпилированная маска серийного номера.
+    MaskSpace: перечисление всех номеров, подходящих под маску.
+    MaskCache: ограниченный кэш скомпилированных масок.
+    compile_type_mask: получение скомпилированной маски типа оборудования.
+    invalid_serial_numbers: пакетная проверка серийных номеров.
+
+Маска состоит из символов:
+    N - цифра,
+    A - заглавная латинская буква,
+    a - строчная латинская буква,
+    X - заглавная латинская буква или цифра,
+    Z - один из символов "-", "_", "@".
+Остальные символы маски должны совпадать с номером буквально.
+"""
+import re
+import string
+import threading
+from collections import OrderedDict
+from typing import Iterable
+
+from django.conf import settings
+
+from api.type_cache import type_cache
+
+
+MASK_CONVERSION = {
+    'N': r'\d',
+    'A': r'[A-Z]',
+    'a': r'[a-z]',
+    'X': r'[A-Z0-9]',
+    'Z': r'[-_@]',
+}
+
+# Символы каждого класса в порядке возрастания кодов: номера, перечисленные
+# по маске, идут в том же порядке, что и строки.
+MASK_ALPHABETS = {
+    'N': string.digits,
+    'A': string.ascii_uppercase,
+    'a': string.ascii_lowercase,
+    'X': string.digits + string.ascii_uppercase,
+    'Z': '-@_',
+}
+
+
+def mask_to_regex(mask: str) -> str:
+    """
+    Перевод маски в regex.
+
+    args:
+        mask: маска для перевода в regex.
+    """
+    if not mask:
+        return ''
+    regex = ''.join(MASK_CONVERSION.get(i, re.escape(i)) for i in mask)
+    return f'^{regex}$'
+
+
+class CompiledMask:
+    """
+    Скомпилированная маска серийного номера.
+
+    Каждый символ маски соответствует ровно одному символу номера,
+    поэтому номера другой длины отбрасываются без запуска regex.
+    """
+    __slots__ = ('mask', 'length', 'pattern')
+
+    def __init__(self, mask: str):
+        self.mask = mask
+        self.length = len(mask)
+        self.pattern = re.compile(mask_to_regex(mask))
+
+    def match(self, serial_number: str) -> bool:
+        """
+        Проверка одного серийного номера.
+
+        args:
+            serial_number: серийный номер для проверки.
+        """
+        return (len(serial_number) == self.length
+                and self.pattern.fullmatch(serial_number) is not None)
+
+    def invalid(self, serial_numbers: Iterable[str]) -> list:
+        """
+        Получить номера, не подходящие под маску, с сохранением порядка.
+
+        args:
+            serial_numbers: серийные номера для проверки.
+        """
+        length = self.length
+        fullmatch = self.pattern.fullmatch
+        return [serial for serial in serial_numbers
+                if len(serial) != length or fullmatch(serial) is None]
+
+
+class MaskSpace:
+    """
+    Перечисление всех серийных номеров, подходящих под маску.
+
+    Номер рассматривается как число в смешанной системе счисления:
+    каждый символ класса маски - разряд с основанием, равным размеру
+    алфавита класса, буквальные символы разрядов не занимают. Порядковые
+    номера идут в том же порядке, что и строки номеров.
+    """
+    __slots__ = ('mask', 'alphabets', 'size')
+
+    def __init__(self, mask: str):
+        self.mask = mask
+        self.alphabets = [MASK_ALPHABETS[symbol] for symbol in mask
+                          if symbol in MASK_ALPHABETS]
+        self.size = 1
+        for alphabet in self.alphabets:
+            self.size *= len(alphabet)
+
+    def serial(self, ordinal: int) -> str:
+        """
+        Серийный номер по порядковому номеру.
+
+        args:
+            ordinal: порядковый номер от 0 до size - 1.
+        """
+        if not 0 <= ordinal < self.size:
+            raise IndexError(f"Ordinal {ordinal} is outside the mask space.")
+        digits = []
+        for alphabet in reversed(self.alphabets):
+            ordinal, index = divmod(ordinal, len(alphabet))
+            digits.append(alphabet[index])
+        return ''.join(digits.pop() if symbol in MASK_ALPHABETS else symbol
+                       for symbol in self.mask)
+
+    def ordinal(self, serial_number: str) -> int:
+        """
+        Порядковый номер серийного номера.
+
+        args:
+            serial_number: серийный номер, подходящий под маску.
+        """
+        if len(serial_number) != len(self.mask):
+            raise ValueError(f"Serial number '{serial_number}' does not match the mask '{self.mask}'.")  # noqa
+        ordinal = 0
+        for symbol, char in zip(self.mask, serial_number):
+            alphabet = MASK_ALPHABETS.get(symbol)
+            if alphabet is None:
+                if char != symbol:
+                    raise ValueError(f"Serial number '{serial_number}' does not match the mask '{self.mask}'.")  # noqa
+                continue
+            index = alphabet.find(char)
+            if index < 0:
+                raise ValueError(f"Serial number '{serial_number}' does not match the mask '{self.mask}'.")  # noqa
+            ordinal = ordinal * len(alphabet) + index
+        return ordinal
+
+
+class MaskCache:
+    """
+    Ограниченный LRU-кэш скомпилированных масок.
+
+    Ключ кэша - пара (id типа, маска), поэтому изменение маски типа
+    не может вернуть устаревший результат, а invalidate удаляет
+    записи типа, чтобы они не занимали место.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, type_id, mask: str) -> CompiledMask:
+        """
+        Получить скомпилированную маску, скомпилировав её при промахе.
+
+        args:
+            type_id: id типа оборудования.
+            mask: маска серийного номера.
+        """
+        key = (type_id, mask)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                return compiled
+
+        compiled = CompiledMask(mask)
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, type_id) -> None:
+        """
+        Удалить все записи типа оборудования.
+
+        args:
+            type_id: id типа оборудования.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == type_id]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+mask_cache = MaskCache(settings.EQUIPMENT_MASK_CACHE_SIZE)
+
+
+def compile_type_mask(equipment_type) -> CompiledMask:
+    """
+    Получить скомпилированную маску типа оборудования.
+
+    args:
+        equipment_type: объект EquipmentType или его id. По id тип
+            берётся из кэша типов оборудования.
+    """
+    if not hasattr(equipment_type, 'serial_number_mask'):
+        type_id = equipment_type
+        equipment_type = type_cache.get(type_id)
+        if equipment_type is None:
+            raise LookupError(f"Equipment type '{type_id}' does not exist.")
+    return mask_cache.get(equipment_type.pk,
+                          equipment_type.serial_number_mask)
+
+
+def invalid_serial_numbers(equipment_type,
+                           serial_numbers: Iterable[str]) -> list:
+    """
+    Получить номера, не подходящие под маску типа оборудования.
+
+    args:
+        equipment_type: объект EquipmentType или его id.
+        serial_numbers: серийные номера для проверки.
+    """
+    return compile_type_mask(equipment_type).invalid(serial_numbers)
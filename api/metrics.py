@@ -0,0 +1,370 @@
+"""
+Модуль измерения производительности запросов.
+    Histogram: гистограмма значений с накопительными корзинами.
+    MetricsRegistry: гистограммы метрик по маршрутам в памяти процесса.
+    RequestMetrics: измерения одного запроса.
+    timing: учёт времени участка кода в текущем запросе.
+    install_query_metrics: учёт SQL запросов подключения в метриках
+        текущего запроса.
+    TimedSerializerMixin: учёт времени сериализации (.data).
+    TimedListSerializer: ListSerializer с учётом времени сериализации.
+    PerformanceMiddleware: сбор метрик, журнал медленных запросов и
+        заголовок Server-Timing.
+    metrics_view: метрики в текстовом формате Prometheus.
+
+Гистограммы хранятся в памяти процесса: при нескольких воркерах каждый
+отдаёт свои значения, суммирование выполняет Prometheus.
+"""
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import serializers
+
+logger = logging.getLogger("api.performance")
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# (имя метрики, описание, корзины)
+METRICS = {
+    "latency": ("equipment_http_request_duration_seconds",
+                "Total request latency.", TIME_BUCKETS),
+    "queries": ("equipment_http_request_queries",
+                "SQL queries per request.", COUNT_BUCKETS),
+    "db": ("equipment_http_request_db_seconds",
+           "Time spent in SQL per request.", TIME_BUCKETS),
+    "serialize": ("equipment_http_request_serialize_seconds",
+                  "Time spent in serializers per request.", TIME_BUCKETS),
+    "render": ("equipment_http_request_render_seconds",
+               "Time spent rendering the response body.", TIME_BUCKETS),
+    "size": ("equipment_http_response_size_bytes",
+             "Response body size.", SIZE_BUCKETS),
+}
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class Histogram:
+    """Гистограмма значений с накопительными корзинами Prometheus."""
+
+    def __init__(self, buckets: tuple):
+        """
+        args:
+            buckets: верхние границы корзин по возрастанию.
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Учесть значение.
+
+        args:
+            value: измеренное значение.
+        """
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def samples(self) -> list:
+        """Пары (граница le, накопленное число) включая +Inf."""
+        return [(str(bound), count)
+                for bound, count in zip(self.buckets, self.counts)] + [
+            ("+Inf", self.count)]
+
+
+class MetricsRegistry:
+    """Гистограммы метрик по (маршрут, метод, статус)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(dict)
+
+    def observe(self, metric: str, labels: tuple, value: float) -> None:
+        """
+        Учесть значение метрики.
+
+        args:
+            metric: ключ из METRICS.
+            labels: (маршрут, метод, статус).
+            value: измеренное значение.
+        """
+        with self.lock:
+            histogram = self.histograms[metric].get(labels)
+            if histogram is None:
+                histogram = Histogram(METRICS[metric][2])
+                self.histograms[metric][labels] = histogram
+            histogram.observe(value)
+
+    def clear(self) -> None:
+        """Удалить все значения."""
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus."""
+        lines = []
+        with self.lock:
+            for metric, (name, description, _) in METRICS.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in sorted(
+                        self.histograms.get(metric, {}).items()):
+                    label_text = ('route="{}",method="{}",status="{}"'
+                                  .format(*(_escape(str(label))
+                                            for label in labels)))
+                    for bound, count in histogram.samples():
+                        lines.append(f'{name}_bucket{{{label_text},le="{bound}"}} {count}')  # noqa
+                    lines.append(f"{name}_sum{{{label_text}}} {histogram.sum}")
+                    lines.append(f"{name}_count{{{label_text}}} {histogram.count}")  # noqa
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def _escape(value: str) -> str:
+    """
+    Экранирование значения метки Prometheus.
+
+    args:
+        value: значение метки.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")  # noqa
+
+
+class RequestMetrics:
+    """Измерения одного запроса: SQL, время участков кода."""
+
+    def __init__(self, capture_sql: bool):
+        """
+        args:
+            capture_sql: сохранять текст запросов для журнала.
+        """
+        self.capture_sql = capture_sql
+        self.queries = 0
+        self.db_time = 0.0
+        self.sql = []
+        self.timings = defaultdict(float)
+        self.depth = defaultdict(int)
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка execute_wrapper: учёт числа и времени запросов."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_time += duration
+            if self.capture_sql:
+                self.sql.append((duration, sql))
+
+
+def _execute(execute, sql, params, many, context):
+    """Обёртка execute_wrapper подключения: учёт в текущем запросе."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_metrics(sender, connection, **kwargs):
+    """
+    Подключить учёт SQL запросов к подключению БД.
+
+    Подключения Django принадлежат потоку, а запросы асинхронного
+    представления выполняются в потоке sync_to_async. Поэтому обёртка
+    ставится на каждое подключение постоянно и находит метрики запроса
+    через contextvar, который sync_to_async передаёт в поток.
+    """
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _execute)
+
+
+@contextmanager
+def timing(name: str):
+    """
+    Учесть время участка кода в метриках текущего запроса.
+
+    Вложенные участки с тем же именем учитываются один раз.
+
+    args:
+        name: имя участка (serialize, render).
+    """
+    metrics: Optional[RequestMetrics] = _current.get()
+    if metrics is None or metrics.depth[name]:
+        yield
+        return
+    metrics.depth[name] += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+        metrics.depth[name] -= 1
+
+
+class TimedSerializerMixin:
+    """Учёт времени сериализации при обращении к .data."""
+
+    @property
+    def data(self):
+        with timing("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """ListSerializer с учётом времени сериализации."""
+
+
+class PerformanceMiddleware:
+    """
+    Сбор метрик запроса: число и время SQL запросов, время сериализации
+    и отрисовки, размер ответа и общее время.
+
+    Медленные запросы пишутся в журнал api.performance вместе с SQL.
+    Заголовок Server-Timing добавляется при EQUIPMENT_SERVER_TIMING.
+
+    Работает в синхронном и асинхронном стеке: под ASGI запрос не
+    переносится в пул потоков.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install_query_metrics(None, connection)
+        started = time.perf_counter()
+        with self.measure() as metrics:
+            response = self.get_response(request)
+        self.record(request, response, metrics,
+                    time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with self.measure() as metrics:
+            response = await self.get_response(request)
+        self.record(request, response, metrics,
+                    time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    @contextmanager
+    def measure():
+        """Измерения запроса: SQL запросы и время участков кода в блоке."""
+        metrics = RequestMetrics(
+            capture_sql=settings.EQUIPMENT_SLOW_REQUEST_MS > 0)
+        token = _current.set(metrics)
+        try:
+            yield metrics
+        finally:
+            _current.reset(token)
+
+    def process_template_response(self, request, response):
+        """Учёт времени отрисовки тела ответа DRF."""
+        metrics = _current.get()
+        if metrics is not None:
+            render = response.render
+
+            def timed_render():
+                with timing("render"):
+                    return render()
+            response.render = timed_render
+        return response
+
+    @staticmethod
+    def route(request) -> str:
+        """
+        Имя маршрута запроса для меток метрик.
+
+        args:
+            request: запрос клиента.
+        """
+        match = getattr(request, "resolver_match", None)
+        if match is None:
+            return "unmatched"
+        return match.view_name or match.route
+
+    def record(self, request, response, metrics: RequestMetrics,
+               latency: float) -> None:
+        """
+        Сохранить метрики запроса, записать медленный запрос в журнал и
+        добавить заголовок Server-Timing.
+
+        args:
+            request: запрос клиента.
+            response: ответ.
+            metrics: измерения запроса.
+            latency: общее время запроса в секундах.
+        """
+        labels = (self.route(request), request.method, response.status_code)
+        registry.observe("latency", labels, latency)
+        registry.observe("queries", labels, metrics.queries)
+        registry.observe("db", labels, metrics.db_time)
+        registry.observe("serialize", labels, metrics.timings["serialize"])
+        registry.observe("render", labels, metrics.timings["render"])
+        if not response.streaming:
+            registry.observe("size", labels, len(response.content))
+
+        slow_ms = settings.EQUIPMENT_SLOW_REQUEST_MS
+        if slow_ms > 0 and latency * 1000 >= slow_ms:
+            logger.warning(
+                "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms SQL\n%s",  # noqa
+                request.method, request.get_full_path(), labels[0],
+                latency * 1000, metrics.queries, metrics.db_time * 1000,
+                "\n".join(f"{duration * 1000:.1f} ms: {sql}"
+                          for duration, sql in metrics.sql))
+
+        if settings.EQUIPMENT_SERVER_TIMING:
+            response["Server-Timing"] = ", ".join([
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',  # noqa
+                f"serialize;dur={metrics.timings['serialize'] * 1000:.1f}",
+                f"render;dur={metrics.timings['render'] * 1000:.1f}",
+                f"total;dur={latency * 1000:.1f}",
+            ])
+
+
+def metrics_view(request):
+    """
+    Метрики в текстовом формате Prometheus.
+
+    Если задан EQUIPMENT_METRICS_TOKEN, требуется заголовок
+    Authorization: Bearer <токен>.
+
+    args:
+        request: запрос клиента.
+    """
+    token = settings.EQUIPMENT_METRICS_TOKEN
+    if token and not constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(),
+                        content_type="text/plain; version=0.0.4")
@@ -2,8 +2,21 @@
 Модуль таблиц оборудования в БД.
     EquipmentType: модель данных для хранения типа оборудования.
     Equipment: Модель данныз для хранения сведений о оборудовани.
+    SerialNumberTrigram: индекс триграмм серийных номеров для поиска.
+    EquipmentImport: состояние импорта оборудования из файла.
+    EquipmentTypeStats: число оборудования каждого типа.
+    EquipmentNotationStats: число оборудования по типу и примечанию.
+    EquipmentJob: задача пакетного создания оборудования в очереди.
+    EquipmentJobCreated: id объекта, созданного задачей.
+    SerialAllocation: позиция выдачи свободных серийных номеров типа.
+    SerialReservation: выданный и удерживаемый серийный номер.
+    EquipmentChange: запись журнала изменений оборудования и типов.
+    ChangeFeedState: граница сжатия журнала изменений.
+    ArchivedEquipment: списанное оборудование, перенесённое в архив.
+    DataVersion: версия данных таблицы для условных запросов.
 """
 
+from django.conf import settings
 from django.db import models
 
 
@@ -12,6 +25,8 @@ class EquipmentType(models.Model):
     name = models.CharField("Наименование", max_length=100)
     serial_number_mask = models.CharField("Маска серийного номера",
                                           max_length=100)
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True,
+                                      db_index=True)
 
     def __str__(self) -> str:
         """Представление записи в админ-панели."""
@@ -29,6 +44,10 @@ class Equipment(models.Model):
                              verbose_name="Тип оборудования")
     serial_number = models.CharField("Серийный номер", max_length=200, unique=True) # noqa 
     notation = models.TextField("Примечание")
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True,
+                                      db_index=True)
+    decommissioned_at = models.DateTimeField("Дата списания", null=True,
+                                             blank=True, db_index=True)
 
     def __str__(self) -> str:
         """Представление записи в админ-панели."""
@@ -38,4 +57,271 @@ class Equipment(models.Model):
         """Представление таблицы в админ-панели."""
         verbose_name = 'Оборудование'
         verbose_name_plural = 'Оборудование'
-        unique_together = (('type', 'serial_number'),)
\ No newline at end of file
+        unique_together = (('type', 'serial_number'),)
+
+
+class SerialNumberTrigram(models.Model):
+    """Таблица триграмм серийных номеров для поиска по подстроке."""
+    equipment = models.ForeignKey(Equipment, on_delete=models.CASCADE,
+                                  related_name='trigrams',
+                                  verbose_name="Оборудование")
+    trigram = models.CharField("Триграмма", max_length=3)
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Триграмма серийного номера'
+        verbose_name_plural = 'Триграммы серийных номеров'
+        unique_together = (('trigram', 'equipment'),)
+
+
+class EquipmentImport(models.Model):
+    """Таблица для хранения состояния импорта оборудования из файла."""
+    source = models.CharField("Источник", max_length=255, unique=True)
+    rows_committed = models.PositiveBigIntegerField("Обработано строк",
+                                                    default=0)
+    created = models.PositiveBigIntegerField("Создано", default=0)
+    failed = models.PositiveBigIntegerField("Ошибок", default=0)
+    finished = models.BooleanField("Завершён", default=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True,
+                             blank=True, on_delete=models.SET_NULL,
+                             verbose_name="Пользователь")
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Import: {self.source}, rows {self.rows_committed}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Импорт оборудования'
+        verbose_name_plural = 'Импорт оборудования'
+
+
+class EquipmentTypeStats(models.Model):
+    """Таблица с числом оборудования каждого типа."""
+    type = models.OneToOneField(EquipmentType, on_delete=models.CASCADE,
+                                primary_key=True, related_name='stats',
+                                verbose_name="Тип оборудования")
+    count = models.PositiveBigIntegerField("Количество", default=0)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Type stats: type {self.type_id}, count {self.count}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Статистика типа оборудования'
+        verbose_name_plural = 'Статистика типов оборудования'
+
+
+class EquipmentNotationStats(models.Model):
+    """
+    Таблица с числом оборудования по паре (тип, примечание).
+
+    Примечание - TextField, поэтому уникальность пары задаётся по его
+    md5 (notation_hash).
+    """
+    type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE,
+                             related_name='notation_stats',
+                             verbose_name="Тип оборудования")
+    notation = models.TextField("Примечание")
+    notation_hash = models.CharField("md5 примечания", max_length=32)
+    count = models.PositiveBigIntegerField("Количество", default=0)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Notation stats: type {self.type_id}, count {self.count}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Статистика примечания'
+        verbose_name_plural = 'Статистика примечаний'
+        unique_together = (('type', 'notation_hash'),)
+
+
+class EquipmentJob(models.Model):
+    """Таблица задач пакетного создания оборудования."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = ((PENDING, 'В очереди'), (RUNNING, 'Выполняется'),
+                (DONE, 'Завершена'), (FAILED, 'Ошибка'))
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True,
+                             on_delete=models.SET_NULL,
+                             verbose_name="Пользователь")
+    status = models.CharField("Статус", max_length=10, choices=STATUSES,
+                              default=PENDING, db_index=True)
+    type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE,
+                             verbose_name="Тип оборудования")
+    notation = models.TextField("Примечание")
+    serial_numbers = models.JSONField("Серийные номера")
+    total = models.PositiveIntegerField("Всего номеров")
+    processed = models.PositiveIntegerField("Обработано номеров", default=0)
+    errors = models.JSONField("Ошибки по номерам", default=dict)
+    error = models.TextField("Ошибка выполнения", blank=True)
+    worker = models.CharField("Обработчик", max_length=100, blank=True)
+    created_at = models.DateTimeField("Создана", auto_now_add=True)
+    started_at = models.DateTimeField("Начата", null=True)
+    heartbeat_at = models.DateTimeField("Последняя активность", null=True)
+    finished_at = models.DateTimeField("Завершена", null=True)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Job: id {self.id}, {self.status}, {self.processed}/{self.total}."  # noqa
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        ordering = ['id']
+        verbose_name = 'Задача создания оборудования'
+        verbose_name_plural = 'Задачи создания оборудования'
+
+
+class EquipmentJobCreated(models.Model):
+    """
+    Таблица id объектов, созданных задачей.
+
+    Строки добавляются вместе с каждой частью задачи, поэтому прогресс
+    части не переписывает список уже созданных объектов.
+    """
+    job = models.ForeignKey(EquipmentJob, on_delete=models.CASCADE,
+                            related_name='created',
+                            verbose_name="Задача")
+    equipment_id = models.BigIntegerField("id созданного объекта")
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Job {self.job_id} created {self.equipment_id}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Объект, созданный задачей'
+        verbose_name_plural = 'Объекты, созданные задачами'
+
+
+class SerialAllocation(models.Model):
+    """Таблица с позицией выдачи свободных серийных номеров типа."""
+    type = models.OneToOneField(EquipmentType, on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='serial_allocation',
+                                verbose_name="Тип оборудования")
+    mask = models.CharField("Маска серийного номера", max_length=100)
+    next_ordinal = models.PositiveBigIntegerField("Следующий номер по маске",
+                                                  default=0)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Allocation: type {self.type_id}, next {self.next_ordinal}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Выдача серийных номеров'
+        verbose_name_plural = 'Выдача серийных номеров'
+
+
+class SerialReservation(models.Model):
+    """Таблица выданных и удерживаемых серийных номеров."""
+    serial_number = models.CharField("Серийный номер", max_length=200,
+                                     unique=True)
+    type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE,
+                             verbose_name="Тип оборудования")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True,
+                             on_delete=models.SET_NULL,
+                             verbose_name="Пользователь")
+    expires_at = models.DateTimeField("Действует до", db_index=True)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Reservation: {self.serial_number} until {self.expires_at}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Резерв серийного номера'
+        verbose_name_plural = 'Резерв серийных номеров'
+
+
+class EquipmentChange(models.Model):
+    """Таблица журнала изменений Equipment и EquipmentType."""
+    EQUIPMENT = 'equipment'
+    EQUIPMENT_TYPE = 'equipment_type'
+    MODELS = ((EQUIPMENT, 'Оборудование'),
+              (EQUIPMENT_TYPE, 'Тип оборудования'))
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTIONS = ((CREATE, 'Создание'), (UPDATE, 'Изменение'),
+               (DELETE, 'Удаление'))
+
+    id = models.BigAutoField(primary_key=True)
+    model = models.CharField("Таблица", max_length=20, choices=MODELS)
+    object_id = models.BigIntegerField("id объекта")
+    action = models.CharField("Действие", max_length=10, choices=ACTIONS)
+    created_at = models.DateTimeField("Время изменения", db_index=True)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Change {self.id}: {self.action} {self.model} {self.object_id}."  # noqa
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        indexes = [models.Index(fields=['model', 'object_id', 'id'])]
+        verbose_name = 'Изменение оборудования'
+        verbose_name_plural = 'Журнал изменений оборудования'
+
+
+class ChangeFeedState(models.Model):
+    """Таблица с границей сжатия журнала изменений (одна строка)."""
+    horizon = models.BigIntegerField("Последняя удалённая запись", default=0)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Change feed horizon {self.horizon}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Состояние журнала изменений'
+        verbose_name_plural = 'Состояние журнала изменений'
+
+
+class ArchivedEquipment(models.Model):
+    """
+    Таблица списанного оборудования.
+
+    Строки переносятся из Equipment с тем же id. Серийный номер уникален
+    в обеих таблицах: это проверяет api.bulk.existing_serial_numbers.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    type = models.ForeignKey(EquipmentType, on_delete=models.CASCADE,
+                             related_name='+',
+                             verbose_name="Тип оборудования")
+    serial_number = models.CharField("Серийный номер", max_length=200,
+                                     unique=True)
+    notation = models.TextField("Примечание")
+    updated_at = models.DateTimeField("Дата изменения")
+    decommissioned_at = models.DateTimeField("Дата списания")
+    archived_at = models.DateTimeField("Дата переноса в архив",
+                                       auto_now_add=True)
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"Архив: id {self.id}, type {self.type}, serial {self.serial_number}."  # noqa
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Списанное оборудование'
+        verbose_name_plural = 'Архив оборудования'
+
+
+class DataVersion(models.Model):
+    """Таблица версий данных для условных запросов (строка на таблицу)."""
+    name = models.CharField("Таблица", max_length=50, primary_key=True)
+    version = models.BigIntegerField("Версия")
+
+    def __str__(self) -> str:
+        """Представление записи в админ-панели."""
+        return f"{self.name}: {self.version}."
+
+    class Meta:
+        """Представление таблицы в админ-панели."""
+        verbose_name = 'Версия данных'
+        verbose_name_plural = 'Версии данных'
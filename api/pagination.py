@@ -0,0 +1,76 @@
+"""
+Модуль классов пагинации.
+    KeysetPagination: курсорная (keyset) пагинация по первичному ключу.
+    EquipmentPagination: постраничный вывод с переключением на keyset режим.
+"""
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Курсорная пагинация по индексу первичного ключа.
+
+    Не выполняет COUNT(*) и OFFSET: каждая страница выбирается условием
+    по id, поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+    ordering = 'id'
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self) -> int:
+        """Максимальный размер страницы, который может запросить клиент."""
+        return settings.EQUIPMENT_MAX_PAGE_SIZE
+
+
+class EquipmentPagination(PageNumberPagination):
+    """
+    Постраничный вывод для списков оборудования.
+
+    По умолчанию работает как PageNumberPagination. Параметр
+    ?pagination=cursor или наличие параметра cursor включает
+    KeysetPagination.
+    """
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+
+    def __init__(self):
+        self.keyset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Выбор режима пагинации по параметрам запроса.
+
+        args:
+            queryset: queryset для пагинации.
+            request: запрос клиента.
+            view: представление.
+        """
+        if self.is_keyset_request(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def is_keyset_request(self, request) -> bool:
+        """
+        Запрошен ли keyset режим.
+
+        args:
+            request: запрос клиента.
+        """
+        params = request.query_params
+        return (params.get(self.mode_query_param) == self.keyset_mode
+                or KeysetPagination.cursor_query_param in params)
+
+    def get_paginated_response(self, data):
+        """Ответ в формате выбранного режима пагинации."""
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_html_context(self):
+        """Контекст навигации для browsable API."""
+        if self.keyset is not None:
+            return self.keyset.get_html_context()
+        return super().get_html_context()
@@ -0,0 +1,47 @@
+"""
+Модуль рендереров ответов API.
+    FastJSONRenderer: JSONRenderer на orjson с тем же выводом.
+
+orjson - необязательная зависимость: без него FastJSONRenderer работает
+как JSONRenderer.
+"""
+from rest_framework.utils import encoders
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# Дата и dataclass передаются кодировщику DRF, чтобы формат совпадал.
+ORJSON_OPTIONS = (orjson.OPT_PASSTHROUGH_DATETIME
+                  | orjson.OPT_PASSTHROUGH_DATACLASS) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer, который кодирует ответ через orjson.
+
+    Вывод совпадает с JSONRenderer байт в байт: компактные разделители,
+    UTF-8 без экранирования, экранированные U+2028 и U+2029, типы, которых
+    нет в JSON, кодируются encoders.JSONEncoder. Отступы (?indent=),
+    нестандартные настройки DRF и значения, которые orjson не кодирует,
+    обрабатываются JSONRenderer. Экспоненциальная запись float у orjson
+    и json различается (1e16 и 1e+16), поэтому рендерер подключается к
+    представлениям, в ответах которых нет чисел с плавающей точкой.
+    """
+    encoder = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=self.encoder.default,
+                               option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
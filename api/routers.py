@@ -0,0 +1,194 @@
+"""
+Модуль маршрутизации запросов к БД между основной БД и репликами.
+    ReplicaRouter: роутер БД с чтением с реплик.
+    ReplicaPinMiddleware: выбор реплики для запроса и закрепление
+        клиента за основной БД после записи.
+    replica_reads: выполнение кода с чтением с реплики.
+    pin_cache_key: ключ закрепления пользователя в кэше.
+
+С реплики читают только GET и HEAD запросы к представлениям с
+атрибутом read_from_replica, одна реплика на весь запрос. Запись, чтение
+внутри транзакции, команды управления и запросы без атрибута работают с
+основной БД. После записи клиент получает cookie
+EQUIPMENT_REPLICA_PIN_COOKIE и EQUIPMENT_REPLICA_PIN_SECONDS секунд
+читает с основной БД, остальные клиенты продолжают читать с реплик.
+Клиенты JWT часто не хранят cookie, поэтому запись аутентифицированного
+пользователя закрепляет и его id ключом в кэше
+EQUIPMENT_REPLICA_PIN_CACHE_ALIAS на то же время. Пользователь чтения
+определяется по JWT токену из заголовка Authorization до вызова
+представления; кэш должен быть общим для всех процессов.
+Версия таблицы для ETag списка читается с той же реплики, что и
+данные, поэтому не опережает их.
+"""
+import contextvars
+import random
+from contextlib import contextmanager
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+_replica = contextvars.ContextVar("read_replica", default=None)
+
+
+def pin_cache_key(user_id) -> str:
+    """
+    Ключ закрепления пользователя за основной БД в кэше.
+
+    args:
+        user_id: значение USER_ID_FIELD пользователя.
+    """
+    return f"replica-pin:{user_id}"
+
+
+def _pin_cache():
+    """Кэш Django, в котором хранятся закрепления пользователей."""
+    return caches[settings.EQUIPMENT_REPLICA_PIN_CACHE_ALIAS]
+
+
+@contextmanager
+def replica_reads(alias: Optional[str]):
+    """
+    Читать с реплики alias внутри блока.
+
+    args:
+        alias: алиас реплики или None для основной БД.
+    """
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Роутер БД: запись в default, чтение с выбранной для запроса реплики."""
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.EQUIPMENT_READ_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """
+    Выбор реплики для запроса и закрепление клиента после записи.
+
+    Работает в синхронном и асинхронном стеке.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = _replica.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = _replica.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica.reset(token)
+        return self.pin(request, response)
+
+    @staticmethod
+    def pin(request, response):
+        """
+        Закрепить клиента за основной БД после записи.
+
+        args:
+            request: запрос клиента.
+            response: ответ.
+        """
+        if (request.method not in SAFE_METHODS
+                and response.status_code < 500
+                and settings.EQUIPMENT_REPLICA_PIN_SECONDS > 0):
+            response.set_cookie(settings.EQUIPMENT_REPLICA_PIN_COOKIE, "1",
+                                max_age=settings.EQUIPMENT_REPLICA_PIN_SECONDS,  # noqa
+                                httponly=True, samesite="Lax")
+            # DRF записывает аутентифицированного пользователя и в
+            # исходный запрос.
+            user = getattr(request, "user", None)
+            if user is not None and user.is_authenticated:
+                _pin_cache().set(
+                    pin_cache_key(getattr(user, api_settings.USER_ID_FIELD)),
+                    1, settings.EQUIPMENT_REPLICA_PIN_SECONDS)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Выбрать реплику, если представление и запрос это допускают."""
+        view_class = getattr(view_func, "view_class", None)
+        if (settings.EQUIPMENT_READ_REPLICAS
+                and request.method in SAFE_METHODS
+                and getattr(view_class, "read_from_replica", False)
+                and not self.is_pinned(request)):
+            _replica.set(random.choice(settings.EQUIPMENT_READ_REPLICAS))
+        return None
+
+    @staticmethod
+    def is_pinned(request) -> bool:
+        """
+        Клиент недавно писал и должен читать свои записи с основной БД.
+
+        args:
+            request: запрос клиента.
+        """
+        if settings.EQUIPMENT_REPLICA_PIN_COOKIE in request.COOKIES:
+            return True
+        user_id = ReplicaPinMiddleware.token_user_id(request)
+        return (user_id is not None
+                and _pin_cache().get(pin_cache_key(user_id)) is not None)
+
+    @staticmethod
+    def token_user_id(request):
+        """
+        Id пользователя из JWT токена заголовка Authorization или None.
+
+        Токен проверяется без обращения к БД: аутентификация выполняется
+        позже, в представлении.
+
+        args:
+            request: запрос клиента.
+        """
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = (authentication.get_raw_token(header)
+                     if header is not None else None)
+        if raw_token is None:
+            return None
+        try:
+            token = authentication.get_validated_token(raw_token)
+        except InvalidToken:
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
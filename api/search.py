@@ -0,0 +1,488 @@
+"""
+Модуль индексированного поиска оборудования.
+    serial_trigrams: разбиение серийного номера на триграммы.
+    index_equipment: запись триграмм для объектов Equipment.
+    reindex_equipment: перестроение триграмм для объектов Equipment.
+    NotationIndex: полнотекстовый поиск по примечанию без индекса СУБД.
+    SQLiteNotationIndex: поиск по примечанию через FTS5.
+    MySQLNotationIndex: поиск по примечанию через FULLTEXT индекс.
+    notation_index: индекс примечаний для backend-а БД.
+    EquipmentSearchIndex: поиск Equipment по серийному номеру, типу и
+        примечанию.
+    case_variants: варианты регистра короткого слова запроса.
+    EquipmentTypeSearchIndex: поиск EquipmentType по имени и маске.
+    IndexedSearchFilter: filter backend для представлений.
+
+Каждое слово запроса ищется отдельными запросами id по индексам, и
+таблица Equipment фильтруется по id из их UNION, поэтому поиск не
+читает всю таблицу, а ранжируются только найденные строки:
+    - короткие слова (меньше трёх символов) - диапазоном уникального
+      индекса серийного номера для каждого варианта регистра;
+    - слова от трёх символов - через таблицу SerialNumberTrigram по
+      MAX_TRIGRAMS самым редким триграммам слова с проверкой подстроки
+      у кандидатов;
+    - имя типа - по индексу type_id для подходящих типов;
+    - примечание - запросом к полнотекстовому индексу.
+
+Поиск по словам примечания использует полнотекстовый индекс СУБД:
+FULLTEXT индекс InnoDB на MySQL и внешнюю таблицу FTS5 с триггерами на
+SQLite. Индексы создаются после migrate (install) и обновляются самой
+СУБД при любой записи в таблицу Equipment, в том числе пакетной.
+Слово запроса ищется по префиксу, релевантность примечания берётся из
+индекса (MATCH ... AGAINST на MySQL, bm25 на SQLite). На остальных
+СУБД примечание ищется через icontains без ранжирования.
+"""
+import re
+from functools import reduce
+from itertools import product
+from operator import and_, or_
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import (BooleanField, Case, Count, FloatField,
+                              IntegerField, Q, Value, When)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce
+from rest_framework import filters
+
+from api.models import Equipment, EquipmentType, SerialNumberTrigram
+
+TRIGRAM_SIZE = 3
+# Сколько самых редких триграмм слова отбирают кандидатов.
+MAX_TRIGRAMS = 2
+# Символ больше любого другого: верхняя граница диапазона префикса.
+MAX_CHAR = chr(0x10FFFF)
+WORD_RE = re.compile(r'\w+')
+
+
+def serial_trigrams(serial_number: str) -> set:
+    """
+    Разбить серийный номер на триграммы без учёта регистра.
+
+    args:
+        serial_number: серийный номер.
+    """
+    value = serial_number.lower()
+    return {value[i:i + TRIGRAM_SIZE]
+            for i in range(len(value) - TRIGRAM_SIZE + 1)}
+
+
+def index_equipment(equipment: Iterable[Equipment]) -> None:
+    """
+    Записать триграммы новых объектов Equipment.
+
+    args:
+        equipment: сохранённые объекты Equipment.
+    """
+    SerialNumberTrigram.objects.bulk_create(
+        (SerialNumberTrigram(equipment_id=item.pk, trigram=trigram)
+         for item in equipment
+         for trigram in serial_trigrams(item.serial_number)),
+        batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE,
+    )
+
+
+def reindex_equipment(equipment: Iterable[Equipment]) -> None:
+    """
+    Перестроить триграммы объектов Equipment после изменения номера.
+
+    args:
+        equipment: сохранённые объекты Equipment.
+    """
+    equipment = list(equipment)
+    SerialNumberTrigram.objects.filter(
+        equipment_id__in=[item.pk for item in equipment]).delete()
+    index_equipment(equipment)
+
+
+def _rank(field: str, term: str):
+    """
+    Ранг совпадения поля с поисковым запросом.
+
+    3 - точное совпадение, 2 - совпадение префикса, 1 - подстрока.
+
+    args:
+        field: имя поля модели.
+        term: поисковый запрос.
+    """
+    return Case(
+        When(**{f'{field}__iexact': term}, then=Value(3)),
+        When(**{f'{field}__istartswith': term}, then=Value(2)),
+        When(**{f'{field}__icontains': term}, then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+class NotationIndex:
+    """
+    Поиск Equipment по словам примечания.
+
+    Базовый класс для СУБД без полнотекстового индекса: слово ищется
+    подстрокой, релевантность не считается.
+    """
+
+    @property
+    def table(self) -> str:
+        """Таблица Equipment."""
+        return Equipment._meta.db_table
+
+    def install(self, connection) -> None:
+        """
+        Создать индекс, если его нет.
+
+        args:
+            connection: соединение с БД.
+        """
+
+    def rebuild(self, connection) -> None:
+        """
+        Перестроить индекс по данным таблицы.
+
+        args:
+            connection: соединение с БД.
+        """
+
+    def candidates(self, term: str, using: str):
+        """
+        Запрос id объектов, в примечании которых есть слово запроса.
+
+        args:
+            term: слово поискового запроса.
+            using: алиас БД.
+        """
+        return Equipment.objects.using(using).filter(
+            notation__icontains=term).values('id')
+
+    def rank(self, terms: list):
+        """
+        Релевантность примечания для слов запроса.
+
+        args:
+            terms: слова поискового запроса.
+        """
+        return Value(0.0, output_field=FloatField())
+
+
+class SQLiteNotationIndex(NotationIndex):
+    """
+    Поиск по примечанию через внешнюю таблицу FTS5.
+
+    Таблица хранит только индекс, текст читается из Equipment. Триггеры
+    на вставку, изменение примечания и удаление обновляют индекс в той
+    же транзакции.
+    """
+
+    @property
+    def fts_table(self) -> str:
+        """Таблица FTS5."""
+        return f"{self.table}_notation_fts"
+
+    def install(self, connection) -> None:
+        table, fts = self.table, self.fts_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' "
+                "AND name = %s", [fts])
+            exists = cursor.fetchone() is not None
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+                f"notation, content='{table}', content_rowid='id', "
+                f"tokenize='unicode61 remove_diacritics 2')")
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT "
+                f"ON {table} BEGIN INSERT INTO {fts}(rowid, notation) "
+                f"VALUES (new.id, new.notation); END")
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE "
+                f"ON {table} BEGIN INSERT INTO {fts}({fts}, rowid, notation) "
+                f"VALUES ('delete', old.id, old.notation); END")
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF "
+                f"notation ON {table} BEGIN "
+                f"INSERT INTO {fts}({fts}, rowid, notation) "
+                f"VALUES ('delete', old.id, old.notation); "
+                f"INSERT INTO {fts}(rowid, notation) "
+                f"VALUES (new.id, new.notation); END")
+        if not exists:
+            self.rebuild(connection)
+
+    def rebuild(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.fts_table}({self.fts_table}) "
+                           "VALUES ('rebuild')")
+
+    @staticmethod
+    def match_query(terms: list, operator: str = 'AND') -> str:
+        """
+        Запрос MATCH: каждое слово как фраза с поиском по префиксу.
+
+        args:
+            terms: слова поискового запроса.
+            operator: оператор между словами.
+        """
+        return f' {operator} '.join(
+            '"' + ' '.join(WORD_RE.findall(term)) + '"*'
+            for term in terms if WORD_RE.search(term))
+
+    def candidates(self, term: str, using: str):
+        query = self.match_query([term])
+        if not query:
+            return None
+        return Equipment.objects.using(using).filter(id__in=RawSQL(
+            f"SELECT rowid FROM {self.fts_table} "
+            f"WHERE {self.fts_table} MATCH %s", [query])).values('id')
+
+    def rank(self, terms: list):
+        query = self.match_query(terms, 'OR')
+        if not query:
+            return super().rank(terms)
+        # bm25 тем меньше, чем релевантнее строка.
+        return Coalesce(RawSQL(
+            f"SELECT -bm25({self.fts_table}) FROM {self.fts_table} "
+            f"WHERE {self.fts_table} MATCH %s "
+            f"AND rowid = {self.table}.id", [query],
+            output_field=FloatField()), 0.0, output_field=FloatField())
+
+
+class MySQLNotationIndex(NotationIndex):
+    """
+    Поиск по примечанию через FULLTEXT индекс InnoDB.
+
+    Слова короче innodb_ft_min_token_size и стоп-слова InnoDB в индекс не
+    попадают и не находятся.
+    """
+    index_name = "equipment_notation_fulltext"
+
+    def install(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM information_schema.statistics "
+                "WHERE table_schema = DATABASE() AND table_name = %s "
+                "AND index_name = %s", [self.table, self.index_name])
+            if cursor.fetchone() is None:
+                cursor.execute(
+                    f"CREATE FULLTEXT INDEX {self.index_name} "
+                    f"ON {self.table} (notation)")
+
+    def rebuild(self, connection) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"OPTIMIZE TABLE {self.table}")
+
+    @staticmethod
+    def boolean_query(terms: list) -> str:
+        """
+        Запрос BOOLEAN MODE: все слова обязательны, поиск по префиксу.
+
+        args:
+            terms: слова поискового запроса.
+        """
+        return ' '.join(f'+{word}*' for term in terms
+                        for word in WORD_RE.findall(term))
+
+    def candidates(self, term: str, using: str):
+        query = self.boolean_query([term])
+        if not query:
+            return None
+        return Equipment.objects.using(using).filter(RawSQL(
+            "MATCH(notation) AGAINST (%s IN BOOLEAN MODE)", [query],
+            output_field=BooleanField())).values('id')
+
+    def rank(self, terms: list):
+        query = ' '.join(word for term in terms
+                         for word in WORD_RE.findall(term))
+        if not query:
+            return super().rank(terms)
+        return RawSQL(f"MATCH({self.table}.notation) AGAINST (%s)", [query],
+                      output_field=FloatField())
+
+
+NOTATION_INDEXES = {
+    'sqlite': SQLiteNotationIndex(),
+    'mysql': MySQLNotationIndex(),
+}
+
+
+def notation_index(using: str) -> NotationIndex:
+    """
+    Индекс примечаний для backend-а БД.
+
+    args:
+        using: алиас БД.
+    """
+    return NOTATION_INDEXES.get(connections[using].vendor, NotationIndex())
+
+
+class EquipmentSearchIndex:
+    """Поиск Equipment по серийному номеру, имени типа и примечанию."""
+
+    @staticmethod
+    def trigram_counts(terms: list, using: str) -> dict:
+        """
+        Число строк SerialNumberTrigram для триграмм слов запроса.
+
+        Считается одним запросом по индексу (trigram, equipment) без
+        группировки по объектам.
+
+        args:
+            terms: слова поискового запроса.
+            using: алиас БД.
+        """
+        trigrams = set().union(*(serial_trigrams(term) for term in terms))
+        if not trigrams:
+            return {}
+        return dict(SerialNumberTrigram.objects.using(using).filter(
+            trigram__in=trigrams).values('trigram').annotate(
+            count=Count('id')).values_list('trigram', 'count'))
+
+    def candidates(self, term: str, notation: NotationIndex, using: str,
+                   counts: dict):
+        """
+        Запрос id кандидатов для одного слова: UNION запросов по индексам
+        серийного номера, типа и примечания.
+
+        args:
+            term: слово поискового запроса.
+            notation: индекс примечаний БД запроса.
+            using: алиас БД.
+            counts: число строк триграмм из trigram_counts.
+        """
+        equipment = Equipment.objects.using(using).order_by()
+        trigrams = serial_trigrams(term)
+        if trigrams:
+            branches = [self.trigram_candidates(term, trigrams, using,
+                                                counts)]
+        else:
+            branches = [equipment.filter(reduce(or_, (
+                Q(serial_number__gte=prefix,
+                  serial_number__lt=prefix + MAX_CHAR)
+                for prefix in case_variants(term)))).values('id')]
+        branches.append(equipment.filter(
+            type_id__in=EquipmentType.objects.using(using).filter(
+                name__icontains=term).values('id')).values('id'))
+        branches.append(notation.candidates(term, using))
+        branches = [branch for branch in branches if branch is not None]
+        return branches[0].union(*branches[1:])
+
+    @staticmethod
+    def trigram_candidates(term: str, trigrams: set, using: str,
+                           counts: dict):
+        """
+        Запрос id объектов, серийный номер которых содержит слово.
+
+        Кандидаты отбираются по MAX_TRIGRAMS самым редким триграммам
+        слова, подстрока проверяется у кандидатов. None, если какой-то
+        триграммы нет в индексе.
+
+        args:
+            term: слово поискового запроса.
+            trigrams: триграммы слова.
+            using: алиас БД.
+            counts: число строк триграмм из trigram_counts.
+        """
+        if not all(counts.get(trigram) for trigram in trigrams):
+            return None
+        rarest = sorted(trigrams, key=lambda trigram: (counts[trigram],
+                                                       trigram))
+        rarest = rarest[:MAX_TRIGRAMS]
+        postings = SerialNumberTrigram.objects.using(using).filter(
+            trigram__in=rarest).values('equipment_id')
+        if len(rarest) > 1:
+            postings = postings.annotate(matched=Count('id')).filter(
+                matched=len(rarest)).values('equipment_id')
+        return Equipment.objects.using(using).order_by().filter(
+            id__in=postings, serial_number__icontains=term).values('id')
+
+    def search(self, queryset, terms: list):
+        """
+        Отфильтровать и отсортировать queryset по релевантности.
+
+        queryset фильтруется по id кандидатов каждого слова, ранг
+        считается только для найденных строк. Совпадения серийного
+        номера важнее совпадений примечания, при равном ранге номера
+        строки упорядочены по релевантности примечания.
+
+        args:
+            queryset: queryset объектов Equipment.
+            terms: слова поискового запроса.
+        """
+        notation = notation_index(queryset.db)
+        counts = self.trigram_counts(terms, queryset.db)
+        queryset = queryset.filter(reduce(and_, (
+            Q(id__in=self.candidates(term, notation, queryset.db, counts))
+            for term in terms)))
+        rank = reduce(lambda left, right: left + right,
+                      (_rank('serial_number', term) for term in terms))
+        return queryset.annotate(
+            search_rank=rank, notation_rank=notation.rank(terms),
+        ).order_by('-search_rank', '-notation_rank', 'id')
+
+
+def case_variants(term: str) -> set:
+    """
+    Варианты регистра короткого слова для поиска префикса по индексу.
+
+    args:
+        term: слово поискового запроса.
+    """
+    return {''.join(chars) for chars in product(
+        *({char.lower(), char.upper()} for char in term))}
+
+
+class EquipmentTypeSearchIndex:
+    """
+    Поиск EquipmentType по имени и маске.
+
+    Таблица типов мала, поэтому отдельный индекс для неё не ведётся.
+    """
+    fields = ('name', 'serial_number_mask')
+
+    def search(self, queryset, terms: list):
+        """
+        Отфильтровать и отсортировать queryset по релевантности.
+
+        args:
+            queryset: queryset объектов EquipmentType.
+            terms: слова поискового запроса.
+        """
+        queryset = queryset.filter(reduce(and_, (
+            reduce(or_, (Q(**{f'{field}__icontains': term})
+                         for field in self.fields))
+            for term in terms)))
+        rank = reduce(lambda left, right: left + right,
+                      (_rank('name', term) for term in terms))
+        return queryset.annotate(search_rank=rank).order_by(
+            '-search_rank', 'id')
+
+
+SEARCH_INDEXES = {
+    Equipment: EquipmentSearchIndex(),
+    EquipmentType: EquipmentTypeSearchIndex(),
+}
+
+
+class IndexedSearchFilter(filters.SearchFilter):
+    """
+    Filter backend поиска по индексам оборудования.
+
+    Использует тот же параметр ?search=, что и SearchFilter. Результаты
+    сортируются по релевантности, в keyset режиме пагинации порядок
+    задаётся первичным ключом. Для моделей без индекса работает как
+    обычный SearchFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Применение поиска к queryset.
+
+        args:
+            request: запрос клиента.
+            queryset: queryset для фильтрации.
+            view: представление.
+        """
+        terms = self.get_search_terms(request)
+        index = SEARCH_INDEXES.get(queryset.model)
+        if not terms or index is None:
+            return super().filter_queryset(request, queryset, view)
+        return index.search(queryset, terms)
@@ -3,43 +3,183 @@
 Модуль для хранения классов сериалайзеров.
 
     EquipmentSerializser: сериалайзер для работы с объектами Equipment.
+    EquipmentCreatedSerializer: сериалайзер созданных объектов Equipment.
+    EquipmentJobCreateSerializer: данные задачи создания Equipment.
+    EquipmentJobSerializer: состояние задачи создания Equipment.
+    SerialAllocationSerializer: запрос свободных серийных номеров типа.
+    EquipmentBulkDeleteSerializer: выбор объектов для пакетного удаления.
+    EquipmentBulkUpdateSerializer: данные пакетного изменения Equipment.
     EquipmentGetSerializer: сериалайзер для работы с объектами Equipment(чтение). # noqa
+    EquipmentGetListSerializer: пакетное чтение списка Equipment.
     EquipmentTypeSerializser: сериалайзер для работы с объектами EquipmentTypeSerializser. # noqa
+    CachedEquipmentTypeSerializer: вывод типа оборудования из кэша типов.
+    CachedEquipmentTypeField: поле типа оборудования с чтением из кэша типов.
 """
-import re
+from collections import defaultdict
 
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
-from api.models import Equipment, EquipmentType
+from api.bulk import (create_equipment, existing_serial_numbers,
+                      serial_number_errors)
+from api.fieldsets import (EQUIPMENT_FIELDSET, EQUIPMENT_TYPE_FIELDSET,
+                           SparseFieldsSerializerMixin)
+from api.metrics import TimedListSerializer, TimedSerializerMixin
+from api.models import Equipment, EquipmentJob, EquipmentType
+from api.type_cache import type_cache
 
 
-class EquipmentTypeSerializer(serializers.ModelSerializer):
+class EquipmentTypeSerializer(SparseFieldsSerializerMixin,
+                              TimedSerializerMixin,
+                              serializers.ModelSerializer):
     """Сериалайзер для вывода списка EquipmentType."""
+    fieldset_spec = EQUIPMENT_TYPE_FIELDSET
+
     class Meta:
         model = EquipmentType
         fields = "__all__"
+        list_serializer_class = TimedListSerializer
    
 
-class EquipmentGetSerializer(serializers.ModelSerializer):
-    """Сериалайзер для получения списка Equipment с нужными полями."""
-    type = EquipmentTypeSerializer(read_only=True)
+class CachedEquipmentTypeSerializer(EquipmentTypeSerializer):
+    """Вложенный вывод типа оборудования без обращения к БД."""
+
+    def get_attribute(self, instance):
+        """
+        Тип оборудования берётся из кэша по type_id.
+
+        args:
+            instance: объект Equipment.
+        """
+        return type_cache.get(instance.type_id)
+
+
+class CachedEquipmentTypeField(serializers.PrimaryKeyRelatedField):
+    """Поле типа оборудования, которое ищет тип в кэше, а не в БД."""
+
+    def to_internal_value(self, data):
+        """
+        Получение типа оборудования по id.
+
+        args:
+            data: id типа оборудования от клиента.
+        """
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        equipment_type = type_cache.get(data)
+        if equipment_type is None:
+            self.fail('does_not_exist', pk_value=data)
+        return equipment_type
+
+
+class EquipmentGetListSerializer(TimedListSerializer):
+    """
+    Сериалайзер списка Equipment.
+
+    Загружает серийные номера всех строк страницы одним запросом,
+    вместо отдельного запроса на каждую строку.
+    """
+
+    def to_representation(self, data):
+        """
+        Преобразование списка объектов Equipment.
+
+        args:
+            data: queryset или список объектов Equipment.
+        """
+        iterable = data.all() if hasattr(data, 'all') else data
+        items = list(iterable)
+        if 'serial_numbers' not in self.child.fields:
+            return [self.child.to_representation(item) for item in items]
+        self.child.sibling_serial_numbers = self._load_serial_numbers(items)
+        try:
+            return [self.child.to_representation(item) for item in items]
+        finally:
+            self.child.sibling_serial_numbers = None
+
+    @classmethod
+    def _load_serial_numbers(cls, items: list) -> dict:
+        """
+        Получить серийные номера для всех пар (тип, примечание) страницы.
+
+        args:
+            items: объекты Equipment текущей страницы.
+        """
+        if not items:
+            return {}
+        keys = {(item.type_id, item.notation) for item in items}
+        return cls.group_serial_numbers(keys, cls.serial_numbers_query(keys))
+
+    @staticmethod
+    def serial_numbers_query(keys: set, model=Equipment):
+        """
+        Запрос серийных номеров для набора пар (тип, примечание).
+
+        args:
+            keys: пары (id типа, примечание).
+            model: Equipment или ArchivedEquipment.
+        """
+        return model.objects.filter(
+            type_id__in={type_id for type_id, _ in keys},
+            notation__in={notation for _, notation in keys},
+        ).order_by('id').values_list('type_id', 'notation', 'serial_number')
+
+    @staticmethod
+    def group_serial_numbers(keys: set, rows) -> dict:
+        """
+        Сгруппировать серийные номера по парам (тип, примечание).
+
+        args:
+            keys: пары (id типа, примечание).
+            rows: строки (id типа, примечание, серийный номер).
+        """
+        serial_numbers = defaultdict(list)
+        for type_id, notation, serial in rows:
+            if (type_id, notation) in keys:
+                serial_numbers[(type_id, notation)].append(serial)
+        return serial_numbers
+
+
+class EquipmentGetSerializer(SparseFieldsSerializerMixin,
+                             TimedSerializerMixin,
+                             serializers.ModelSerializer):
+    """
+    Сериалайзер для получения списка Equipment с нужными полями.
+
+    Поля ответа выбираются по context['fieldset'] (EQUIPMENT_FIELDSET).
+    """
+    type = CachedEquipmentTypeSerializer(read_only=True)
     serial_numbers = serializers.SerializerMethodField()
+    sibling_serial_numbers = None
+    fieldset_spec = EQUIPMENT_FIELDSET
+    collapsed_fields = {
+        'type': lambda: serializers.IntegerField(source='type_id',
+                                                 read_only=True),
+    }
 
     class Meta:
         model = Equipment
-        fields = ['id', 'serial_numbers', 'type', 'notation']
+        fields = ['id', 'serial_number', 'serial_numbers', 'type',
+                  'notation']
+        list_serializer_class = EquipmentGetListSerializer
 
     def get_serial_numbers(self, obj):
         """Получить все серийные номера для данного типа и примечания."""
-        related_serial_numbers = Equipment.objects.filter(type=obj.type,
-                                                          notation=obj.notation).values_list('serial_number', flat=True) #
+        if self.sibling_serial_numbers is not None:
+            return self.sibling_serial_numbers.get((obj.type_id, obj.notation), []) # noqa
+        related_serial_numbers = Equipment.objects.filter(type_id=obj.type_id,
+                                                          notation=obj.notation).order_by('id').values_list('serial_number', flat=True) # noqa
         return list(related_serial_numbers)
 
 
-class EquipmentSerializer(serializers.ModelSerializer):
+class EquipmentSerializer(TimedSerializerMixin,
+                          serializers.ModelSerializer):
     """Сериалайзер для таблицы Equipment."""
     serial_number = serializers.ListField(child=serializers.CharField(),
                                           write_only=True)
+    type = CachedEquipmentTypeField(queryset=EquipmentType.objects.all())
 
     class Meta:
         model = Equipment
@@ -52,17 +192,21 @@ class EquipmentSerializer(serializers.ModelSerializer):
         args:
             data: данные от клиента.
         """
-        serial_numbers = data.get("serial_number")
-        equipment_type = data.get("type")
+        serial_numbers = data.get("serial_number") or []
+        equipment_type = data.get("type") or getattr(self.instance, "type",
+                                                     None)
         errors = {}
 
+        if self.instance is not None and len(serial_numbers) > 1:
+            raise serializers.ValidationError(
+                {"serial_number": "Only one serial number can be set on update."})  # noqa
+
         if equipment_type:
-            mask = equipment_type.serial_number_mask
-            for serial in serial_numbers:
-                if not self._validate_serial_number(serial, mask):
-                    errors[serial] = f"Serial number '{serial}' does not match the mask '{mask}'."  # noqa 
-                elif Equipment.objects.filter(serial_number=serial).exists():
-                    errors[serial] = f"Serial number '{serial}' already exists."  # noqa  
+            request = self.context.get("request")
+            errors = serial_number_errors(
+                equipment_type, serial_numbers,
+                exclude=[getattr(self.instance, "serial_number", None)],
+                user=getattr(request, "user", None))
 
         if errors:
             raise serializers.ValidationError(errors)
@@ -72,47 +216,129 @@ class EquipmentSerializer(serializers.ModelSerializer):
     def create(self, validated_data: dict):
         """
         Переопределение метода create для работы с массивом серийных номеров.
+
+        Все объекты создаются пакетно в одной транзакции.
         
         args:
             validated_data: данные от клиента.
         """  # noqa  
         serial_numbers = validated_data.pop("serial_number")
-        equipment_list = []
-        for serial in serial_numbers:
-            equipment = Equipment.objects.create(serial_number=serial, **validated_data) # noqa 
-            equipment_list.append(equipment)
-        return equipment_list
+        try:
+            return create_equipment(serial_numbers, **validated_data)
+        except IntegrityError:
+            errors = {serial: f"Serial number '{serial}' already exists."
+                      for serial in existing_serial_numbers(serial_numbers)}
+            raise serializers.ValidationError(
+                errors or "Equipment could not be created.")
 
-    def _validate_serial_number(self, serial_number: str, mask: str) -> bool:
+    def update(self, instance, validated_data: dict):
         """
-        Сравнение серийного номера и маски.
+        Переопределение метода update: список из одного номера
+        сохраняется как серийный номер объекта. Объект, индекс и
+        статистика сохраняются в одной транзакции.
 
         args:
-            serial_number: Серийный номер для сравнения.
-            mask: Маска в regex формате для сравнения.
+            instance: изменяемый объект Equipment.
+            validated_data: данные от клиента.
         """
-        regex = self._numbers_to_mask(mask)
-        return re.fullmatch(regex, serial_number) is not None
+        serial_numbers = validated_data.pop("serial_number", None)
+        if serial_numbers:
+            validated_data["serial_number"] = serial_numbers[0]
+        with transaction.atomic():
+            return super().update(instance, validated_data)
+
+
+class EquipmentCreatedSerializer(TimedSerializerMixin,
+                                 serializers.ModelSerializer):
+    """Сериалайзер для вывода созданных объектов Equipment."""
+
+    class Meta:
+        model = Equipment
+        fields = ["id", "serial_number", "type", "notation"]
+        list_serializer_class = TimedListSerializer
+
+
+class EquipmentJobCreateSerializer(serializers.Serializer):
+    """
+    Сериалайзер данных задачи создания Equipment.
+
+    Проверяется только формат данных: номера по маске и по БД проверяет
+    обработчик очереди.
+    """
+    serial_number = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False,
+        max_length=settings.EQUIPMENT_JOB_MAX_SERIALS)
+    type = CachedEquipmentTypeField(queryset=EquipmentType.objects.all())
+    notation = serializers.CharField()
+
+
+class EquipmentValidateSerializer(serializers.Serializer):
+    """Сериалайзер списка серийных номеров для проверки без записи."""
+    serial_number = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False,
+        max_length=settings.EQUIPMENT_VALIDATE_MAX_SERIALS)
+    type = CachedEquipmentTypeField(queryset=EquipmentType.objects.all())
+
 
-    def _numbers_to_mask(self, mask: str) -> str:
+class EquipmentLookupSerializer(serializers.Serializer):
+    """Сериалайзер списка серийных номеров для поиска оборудования."""
+    serial_numbers = serializers.ListField(
+        child=serializers.CharField(), allow_empty=False,
+        max_length=settings.EQUIPMENT_LOOKUP_MAX_SERIALS)
+
+
+class EquipmentJobSerializer(serializers.ModelSerializer):
+    """Сериалайзер состояния задачи создания Equipment."""
+    created_ids = serializers.SerializerMethodField()
+
+    class Meta:
+        model = EquipmentJob
+        fields = ["id", "status", "type", "notation", "total", "processed",
+                  "created_ids", "errors", "error", "created_at",
+                  "started_at", "finished_at"]
+
+    def get_created_ids(self, job: EquipmentJob) -> list:
         """
-        Перевод маски в regex.
-        
+        id объектов, созданных задачей, в порядке создания.
+
         args:
-            mask: маска для перевода в regex.
+            job: задача.
         """
-        if not mask:
-            return ''
-        conversion = { 
-            'N': r'\d',
-            'A': r'[A-Z]',
-            'a': r'[a-z]',
-            'X': r'[A-Z0-9]',
-            'Z': r'[-_@]',
-        }
-        regex = ''.join(conversion.get(i, re.escape(i)) for i in mask)
-        return f'^{regex}$'
+        return list(job.created.order_by('id').values_list('equipment_id',
+                                                           flat=True))
+
+
+class SerialAllocationSerializer(serializers.Serializer):
+    """Сериалайзер запроса свободных серийных номеров типа."""
+    count = serializers.IntegerField(
+        min_value=1, max_value=settings.EQUIPMENT_SERIAL_ALLOCATE_MAX)
 
 
+class EquipmentBulkDeleteSerializer(serializers.Serializer):
+    """Сериалайзер выбора объектов Equipment для пакетных операций."""
+    ids = serializers.ListField(child=serializers.IntegerField(),
+                                required=False, allow_empty=False)
 
-    
\ No newline at end of file
+
+class EquipmentBulkUpdateSerializer(EquipmentBulkDeleteSerializer):
+    """Сериалайзер данных пакетного изменения объектов Equipment."""
+    type = CachedEquipmentTypeField(queryset=EquipmentType.objects.all(),
+                                    required=False)
+    notation = serializers.CharField(required=False)
+    decommissioned = serializers.BooleanField(required=False)
+
+    def validate(self, data: dict) -> dict:
+        """
+        Должно быть задано хотя бы одно изменяемое поле. decommissioned
+        заменяется датой списания: текущим временем или None.
+
+        args:
+            data: данные от клиента.
+        """
+        if not {"type", "notation", "decommissioned"} & set(data):
+            raise serializers.ValidationError(
+                "Provide 'type', 'notation' or 'decommissioned' to update.")
+        if "decommissioned" in data:
+            data["decommissioned_at"] = (
+                timezone.now() if data.pop("decommissioned") else None)
+        return data
@@ -0,0 +1,142 @@
+"""
+Обработчики сигналов моделей оборудования.
+    equipment_type_changed: сброс кэшей при изменении EquipmentType.
+    archived_equipment_changed: смена версии архива при изменении
+        ArchivedEquipment.
+    equipment_saving: чтение прежних типа и примечания Equipment.
+    equipment_saved: обновление поискового индекса, статистики и журнала
+        изменений при сохранении Equipment.
+    equipment_type_saved: запись сохранения EquipmentType в журнал.
+    equipment_type_deleting: запись удаления EquipmentType и его
+        оборудования в журнал.
+    user_changed: сброс пользователя в кэше JWT аутентификации.
+    install_search_indexes: создание полнотекстового индекса примечаний
+        после migrate.
+
+Удаление Equipment выполняется через api.bulk.delete_equipment, а
+пакетные операции из api.bulk не вызывают сигналы и обновляют индексы
+сами. Обработчик post_delete для Equipment намеренно не подключён: он
+запретил бы Django удалять строки одним запросом.
+"""
+from django.contrib.auth import get_user_model
+from collections import Counter
+
+from django.db import connection, connections, router, transaction
+from django.db.models.signals import (post_delete, post_migrate, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from api.authentication import invalidate_user
+from api.changes import record_changes
+from api.conditional import archive_version, equipment_version
+from api.masks import mask_cache
+from api.models import (ArchivedEquipment, Equipment, EquipmentChange,
+                        EquipmentType)
+from api.search import index_equipment, notation_index, reindex_equipment
+from api.stats import apply_stats_deltas
+from api.type_cache import type_cache
+
+
+@receiver(post_save, sender=EquipmentType)
+@receiver(post_delete, sender=EquipmentType)
+def equipment_type_changed(sender, instance, **kwargs):
+    """
+    Сброс кэшей при сохранении или удалении типа оборудования.
+
+    Кэш типов сбрасывается сразу и ещё раз после фиксации транзакции,
+    чтобы не закэшировать данные, прочитанные до фиксации.
+    """
+    mask_cache.invalidate(instance.pk)
+    type_cache.invalidate()
+    transaction.on_commit(type_cache.invalidate)
+
+
+@receiver(post_save, sender=ArchivedEquipment)
+@receiver(post_delete, sender=ArchivedEquipment)
+def archived_equipment_changed(sender, instance, **kwargs):
+    """Смена версии архива при сохранении или удалении его строки."""
+    archive_version.bump()
+
+
+@receiver(post_save, sender=EquipmentType)
+def equipment_type_saved(sender, instance, created, **kwargs):
+    """Запись создания или изменения типа оборудования в журнал."""
+    record_changes(EquipmentChange.EQUIPMENT_TYPE, [instance.pk],
+                   EquipmentChange.CREATE if created
+                   else EquipmentChange.UPDATE)
+
+
+@receiver(pre_delete, sender=EquipmentType)
+def equipment_type_deleting(sender, instance, **kwargs):
+    """
+    Запись удаления типа и его оборудования в журнал.
+
+    Оборудование типа удаляется каскадом без сигналов, поэтому его
+    строки журнала пишутся до удаления, в той же транзакции.
+    """
+    record_changes(EquipmentChange.EQUIPMENT,
+                   Equipment.objects.filter(type_id=instance.pk).values_list(
+                       'id', flat=True).iterator(),
+                   EquipmentChange.DELETE)
+    record_changes(EquipmentChange.EQUIPMENT_TYPE, [instance.pk],
+                   EquipmentChange.DELETE)
+
+
+@receiver(pre_save, sender=Equipment)
+def equipment_saving(sender, instance, **kwargs):
+    """
+    Запомнить тип и примечание сохранённого объекта до изменения.
+
+    Внутри транзакции строка блокируется до конца транзакции.
+    """
+    instance._stats_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    queryset = Equipment.objects.filter(pk=instance.pk)
+    if connection.in_atomic_block:
+        queryset = queryset.select_for_update()
+    instance._stats_previous = queryset.values_list(
+        'type_id', 'notation').first()
+
+
+@receiver(post_save, sender=Equipment)
+def equipment_saved(sender, instance, created, **kwargs):
+    """
+    Обновление триграмм, статистики, журнала изменений и версии таблицы
+    после сохранения.
+    """
+    current = (instance.type_id, instance.notation)
+    if created:
+        index_equipment([instance])
+        apply_stats_deltas(Counter([current]))
+    else:
+        reindex_equipment([instance])
+        previous = getattr(instance, "_stats_previous", None)
+        if previous is not None and previous != current:
+            apply_stats_deltas(Counter({previous: -1, current: 1}))
+    record_changes(EquipmentChange.EQUIPMENT, [instance.pk],
+                   EquipmentChange.CREATE if created
+                   else EquipmentChange.UPDATE)
+    equipment_version.bump()
+
+
+@receiver(post_migrate)
+def install_search_indexes(sender, using, **kwargs):
+    """Создание полнотекстового индекса примечаний, если его нет."""
+    if (sender.name == Equipment._meta.app_label
+            and router.allow_migrate_model(using, Equipment)):
+        notation_index(using).install(connections[using])
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def user_changed(sender, instance, **kwargs):
+    """
+    Сброс пользователя в кэше аутентификации при деактивации, смене
+    пароля или удалении. Запись удаляется сразу и после фиксации
+    транзакции, как и кэш типов.
+    """
+    user_id = getattr(instance, jwt_settings.USER_ID_FIELD)
+    invalidate_user(user_id)
+    transaction.on_commit(lambda: invalidate_user(user_id))
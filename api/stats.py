@@ -0,0 +1,181 @@
+"""
+Модуль статистики оборудования по типам и примечаниям.
+    notation_hash: md5 примечания для ключа таблицы статистики.
+    apply_stats_deltas: изменение счётчиков статистики.
+    type_stats: число оборудования каждого типа.
+    notation_stats: число оборудования типа по примечаниям.
+    live_counts: счётчики, посчитанные по таблице Equipment.
+    verify_stats: расхождения таблиц статистики с данными.
+    rebuild_stats: пересчёт таблиц статистики по данным.
+
+Счётчики меняются в той же транзакции, что и оборудование: пакетные
+функции api.bulk передают изменения явно, сохранение отдельного объекта
+обрабатывают сигналы. Чтение статистики не зависит от числа строк
+Equipment.
+"""
+import hashlib
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from api.models import (Equipment, EquipmentNotationStats,
+                        EquipmentTypeStats)
+from api.type_cache import type_cache
+
+
+def notation_hash(notation: str) -> str:
+    """
+    md5 примечания для ключа таблицы статистики.
+
+    args:
+        notation: примечание.
+    """
+    return hashlib.md5(notation.encode()).hexdigest()
+
+
+def apply_stats_deltas(deltas: Counter) -> None:
+    """
+    Изменить счётчики статистики.
+
+    Каждая пара обновляется запросом UPDATE count = count + delta, строка
+    создаётся, если её ещё нет. Пары с нулевым счётчиком удаляются.
+
+    args:
+        deltas: изменения {(id типа, примечание): delta}.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    type_deltas = Counter()
+    for (type_id, _), delta in deltas.items():
+        type_deltas[type_id] += delta
+
+    with transaction.atomic():
+        for (type_id, notation), delta in deltas.items():
+            _apply(EquipmentNotationStats,
+                   {"type_id": type_id, "notation_hash": notation_hash(notation)},  # noqa
+                   {"notation": notation}, delta)
+        for type_id, delta in type_deltas.items():
+            if delta:
+                _apply(EquipmentTypeStats, {"type_id": type_id}, {}, delta)
+        EquipmentNotationStats.objects.filter(
+            type_id__in=type_deltas, count=0).delete()
+
+
+def _apply(model, lookup: dict, defaults: dict, delta: int) -> None:
+    """
+    Прибавить delta к счётчику строки, создав её при необходимости.
+
+    args:
+        model: модель статистики.
+        lookup: ключ строки.
+        defaults: остальные поля новой строки.
+        delta: изменение счётчика.
+    """
+    if model.objects.filter(**lookup).update(count=F('count') + delta):
+        return
+    if delta < 0:
+        # Строки нет, а объекты удаляются: таблица расходится с данными,
+        # это покажет verify_stats.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(count=delta, **lookup, **defaults)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def type_stats() -> list:
+    """Число оборудования каждого типа, включая типы без оборудования."""
+    counts = dict(EquipmentTypeStats.objects.values_list('type_id', 'count'))
+    return [
+        {"type": equipment_type.id, "name": equipment_type.name,
+         "count": counts.get(equipment_type.id, 0)}
+        for equipment_type in type_cache.list()
+    ]
+
+
+def notation_stats(type_id: int) -> list:
+    """
+    Число оборудования типа по примечаниям.
+
+    args:
+        type_id: id типа оборудования.
+    """
+    return [
+        {"notation": notation, "count": count}
+        for notation, count in EquipmentNotationStats.objects.filter(
+            type_id=type_id).order_by('notation').values_list(
+                'notation', 'count')
+    ]
+
+
+def live_counts() -> Counter:
+    """Счётчики {(id типа, примечание): число} по таблице Equipment."""
+    return Counter({
+        (type_id, notation): count
+        for type_id, notation, count in Equipment.objects.order_by().values(
+            'type_id', 'notation').annotate(count=Count('id')).values_list(
+                'type_id', 'notation', 'count')
+    })
+
+
+def verify_stats() -> list:
+    """
+    Расхождения таблиц статистики с данными.
+
+    Возвращает строки (id типа, примечание или None для счётчика типа,
+    ожидаемое число, число в таблице).
+    """
+    expected = live_counts()
+    expected_types = Counter()
+    for (type_id, _), count in expected.items():
+        expected_types[type_id] += count
+
+    actual = Counter({
+        (type_id, notation): count
+        for type_id, notation, count in EquipmentNotationStats.objects
+        .values_list('type_id', 'notation', 'count')
+    })
+    actual_types = Counter(dict(EquipmentTypeStats.objects.values_list(
+        'type_id', 'count')))
+
+    mismatches = [
+        (*key, expected[key], actual[key])
+        for key in sorted(set(expected) | set(actual))
+        if expected[key] != actual[key]
+    ]
+    mismatches += [
+        (type_id, None, expected_types[type_id], actual_types[type_id])
+        for type_id in sorted(set(expected_types) | set(actual_types))
+        if expected_types[type_id] != actual_types[type_id]
+    ]
+    return mismatches
+
+
+def rebuild_stats() -> int:
+    """
+    Пересчитать таблицы статистики по данным в одной транзакции.
+
+    Возвращает число пар (тип, примечание).
+    """
+    with transaction.atomic():
+        counts = live_counts()
+        type_counts = Counter()
+        for (type_id, _), count in counts.items():
+            type_counts[type_id] += count
+        EquipmentNotationStats.objects.all().delete()
+        EquipmentTypeStats.objects.all().delete()
+        EquipmentNotationStats.objects.bulk_create([
+            EquipmentNotationStats(type_id=type_id, notation=notation,
+                                   notation_hash=notation_hash(notation),
+                                   count=count)
+            for (type_id, notation), count in counts.items()
+        ], batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+        EquipmentTypeStats.objects.bulk_create([
+            EquipmentTypeStats(type_id=type_id, count=count)
+            for type_id, count in type_counts.items()
+        ], batch_size=settings.EQUIPMENT_BULK_BATCH_SIZE)
+    return len(counts)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.allocator import (SerialSpaceExhausted, allocate_serial_numbers,
+                           purge_expired_reservations)
+from api.bulk import create_equipment
+from api.models import Equipment, EquipmentType, SerialReservation
+
+
+@pytest.fixture
+def equipment_type():
+    """Тип оборудования с короткой маской: 260 номеров."""
+    return EquipmentType.objects.create(name="Short",
+                                        serial_number_mask="AN")
+
+
+@pytest.mark.django_db
+def test_allocate_skips_used_serials(logged_client, equipment_type):
+    """Выдаются свободные номера маски, занятые пропускаются."""
+    Equipment.objects.bulk_create([
+        Equipment(type=equipment_type, serial_number=serial, notation="x")
+        for serial in ["A0", "A2", "A3"]])
+
+    response = logged_client.post(
+        reverse('equipment-type-allocate', args=[equipment_type.id]),
+        {"count": 4}, content_type="application/json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.json()["serial_numbers"] == ["A1", "A4", "A5", "A6"]
+    assert SerialReservation.objects.count() == 4
+
+
+@pytest.mark.django_db
+def test_allocations_do_not_overlap(equipment_type):
+    """Повторная выдача не возвращает зарезервированные номера."""
+    first, _ = allocate_serial_numbers(equipment_type, 30)
+    second, _ = allocate_serial_numbers(equipment_type, 30)
+
+    assert not set(first) & set(second)
+    assert len(set(first + second)) == 60
+
+
+@pytest.mark.django_db
+def test_allocate_reuses_expired_reservations(equipment_type):
+    """Номера с истёкшим резервом, которые не заняты, выдаются снова."""
+    serials, _ = allocate_serial_numbers(equipment_type, 3)
+    Equipment.objects.create(type=equipment_type, serial_number=serials[0],
+                             notation="x")
+    SerialReservation.objects.update(
+        expires_at=timezone.now() - timedelta(seconds=1))
+
+    again, _ = allocate_serial_numbers(equipment_type, 3)
+
+    assert again == [serials[1], serials[2], "A3"]
+
+
+@pytest.mark.django_db
+def test_allocate_exhausted_space(logged_client, equipment_type):
+    """Если свободных номеров не хватает, ничего не выдаётся."""
+    allocate_serial_numbers(equipment_type, 250)
+    with pytest.raises(SerialSpaceExhausted):
+        allocate_serial_numbers(equipment_type, 20)
+
+    response = logged_client.post(
+        reverse('equipment-type-allocate', args=[equipment_type.id]),
+        {"count": 20}, content_type="application/json")
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert SerialReservation.objects.count() == 250
+
+
+@pytest.mark.django_db
+def test_allocate_validates_request(logged_client, equipment_type):
+    url = reverse('equipment-type-allocate', args=[equipment_type.id])
+    assert logged_client.post(url, {"count": 0},
+                              content_type="application/json"
+                              ).status_code == status.HTTP_400_BAD_REQUEST
+    assert logged_client.post(
+        reverse('equipment-type-allocate', args=[999]), {"count": 1},
+        content_type="application/json",
+    ).status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_reservation_blocks_other_users(logged_client, equipment_type):
+    """Выданный номер может занять только получивший его пользователь."""
+    owner = User.objects.create_user(username="owner", password="12345678")
+    (reserved,), _ = allocate_serial_numbers(equipment_type, 1, owner)
+    payload = {"type": equipment_type.id, "notation": "x",
+               "serial_number": [reserved]}
+
+    response = logged_client.post(reverse('equipment-list'), payload,
+                                  content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {
+        reserved: [f"Serial number '{reserved}' is reserved."]}
+    response = logged_client.post(reverse('equipment-validate'), payload,
+                                  content_type="application/json")
+    assert response.json()["valid"] is False
+
+    logged_client.force_login(owner)
+    response = logged_client.post(reverse('equipment-list'), payload,
+                                  content_type="application/json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_expired_reservation_is_free(logged_client, equipment_type):
+    """Истёкший резерв не мешает занять номер."""
+    (reserved,), _ = allocate_serial_numbers(equipment_type, 1)
+    SerialReservation.objects.update(
+        expires_at=timezone.now() - timedelta(seconds=1))
+    response = logged_client.post(
+        reverse('equipment-list'),
+        {"type": equipment_type.id, "notation": "x",
+         "serial_number": [reserved]},
+        content_type="application/json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_purge_expired_reservations(equipment_type):
+    """Удаляются только истёкшие резервы занятых номеров."""
+    used, free, active = allocate_serial_numbers(equipment_type, 3)[0]
+    Equipment.objects.create(type=equipment_type, serial_number=used,
+                             notation="x")
+    SerialReservation.objects.exclude(serial_number=active).update(
+        expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert purge_expired_reservations() == 1
+    assert set(SerialReservation.objects.values_list(
+        'serial_number', flat=True)) == {free, active}
+
+
+@pytest.mark.django_db
+def test_purge_reservations_command(equipment_type):
+    """Команда purge_reservations удаляет истёкшие резервы занятых номеров."""
+    (used,), _ = allocate_serial_numbers(equipment_type, 1)
+    Equipment.objects.create(type=equipment_type, serial_number=used,
+                             notation="x")
+    SerialReservation.objects.update(
+        expires_at=timezone.now() - timedelta(seconds=1))
+
+    call_command("purge_reservations")
+
+    assert not SerialReservation.objects.exists()
+
+
+@pytest.mark.django_db
+def test_create_equipment_releases_reservation(equipment_type):
+    """Создание оборудования удаляет резерв занятого номера."""
+    (used, free), _ = allocate_serial_numbers(equipment_type, 2)
+
+    create_equipment([used], type=equipment_type, notation="x")
+
+    assert list(SerialReservation.objects.values_list(
+        'serial_number', flat=True)) == [free]
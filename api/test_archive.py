@@ -0,0 +1,122 @@
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import ArchivedEquipment, Equipment
+from api.stats import verify_stats
+
+
+@pytest.fixture
+def equipment(logged_client, equipment_type):
+    """Три объекта оборудования, первые два списаны."""
+    objects = [Equipment.objects.create(type=equipment_type,
+                                        serial_number=serial,
+                                        notation="rack")
+               for serial in ("0001", "0002", "0003")]
+    response = logged_client.patch(
+        reverse('equipment-bulk'),
+        {"ids": [objects[0].id, objects[1].id], "decommissioned": True},
+        content_type="application/json")
+    assert response.json()["updated"] == 2
+    return objects
+
+
+def list_serials(client, **params):
+    response = client.get(reverse('equipment-list'),
+                          {"fields": "serial_number", **params})
+    assert response.status_code == status.HTTP_200_OK
+    return [item["serial_number"] for item in response.json()["results"]]
+
+
+@pytest.mark.django_db
+def test_archive_moves_decommissioned(logged_client, equipment):
+    """Списанное оборудование уходит из списков, но доступно с архивом."""
+    call_command("archive_equipment", older_than_days=0, batch_size=1)
+
+    assert list(Equipment.objects.values_list('serial_number', flat=True)) \
+        == ["0003"]
+    assert set(ArchivedEquipment.objects.values_list(
+        'serial_number', flat=True)) == {"0001", "0002"}
+    assert verify_stats() == []
+
+    assert list_serials(logged_client) == ["0003"]
+    assert list_serials(logged_client, include_archive=1) == [
+        "0001", "0002", "0003"]
+    assert list_serials(logged_client, include_archive=1,
+                        search="0002") == ["0002"]
+    assert list_serials(logged_client, include_archive=1,
+                        search="rack") == ["0001", "0002", "0003"]
+
+    url = reverse('equipment-detail', args=[equipment[0].id])
+    assert logged_client.get(url).status_code == status.HTTP_404_NOT_FOUND
+    response = logged_client.get(url, {"include_archive": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["serial_numbers"] == ["0003", "0001", "0002"]
+
+
+@pytest.mark.django_db
+def test_archived_serial_stays_unique(logged_client, equipment):
+    """Номер из архива нельзя занять снова."""
+    call_command("archive_equipment", older_than_days=0)
+    response = logged_client.post(
+        reverse('equipment-list'),
+        {"type": equipment[0].type_id, "notation": "new",
+         "serial_number": ["0001", "0004"]},
+        content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json() == {
+        "0001": ["Serial number '0001' already exists."]}
+
+
+@pytest.mark.django_db
+def test_archive_respects_age(logged_client, equipment):
+    """Недавно списанное оборудование остаётся в основной таблице."""
+    call_command("archive_equipment", older_than_days=30)
+    assert Equipment.objects.count() == 3
+    assert not ArchivedEquipment.objects.exists()
+
+
+@pytest.mark.django_db
+def test_archive_rejects_cursor_pagination(logged_client, equipment):
+    response = logged_client.get(reverse('equipment-list'),
+                                 {"include_archive": 1,
+                                  "pagination": "cursor"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_lookup_includes_archive(logged_client, equipment):
+    """Поиск по номерам находит архив только с ?include_archive=1."""
+    call_command("archive_equipment", older_than_days=0)
+    url = reverse('equipment-lookup')
+    body = {"serial_numbers": ["0001", "0003"]}
+
+    data = logged_client.post(url, body,
+                              content_type="application/json").json()
+    assert list(data["found"]) == ["0003"]
+    assert data["missing"] == ["0001"]
+
+    data = logged_client.post(url + "?include_archive=1", body,
+                              content_type="application/json").json()
+    assert list(data["found"]) == ["0001", "0003"]
+    assert data["missing"] == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_archive_list_etag_follows_archive(logged_client, equipment):
+    """Изменение архива меняет ETag только списка с архивом."""
+    call_command("archive_equipment", older_than_days=0)
+    url = reverse('equipment-list')
+    plain = logged_client.get(url)["ETag"]
+    archive = logged_client.get(url, {"include_archive": 1})["ETag"]
+
+    archived = ArchivedEquipment.objects.get(serial_number="0001")
+    archived.notation = "moved"
+    archived.save()
+
+    assert logged_client.get(url, HTTP_IF_NONE_MATCH=plain).status_code \
+        == status.HTTP_304_NOT_MODIFIED
+    assert logged_client.get(url, {"include_archive": 1},
+                             HTTP_IF_NONE_MATCH=archive).status_code \
+        == status.HTTP_200_OK
@@ -0,0 +1,69 @@
+import json
+import random
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.benchmark import (compare_results, generate_inventory,
+                           generate_mask, generate_serial)
+from api.masks import CompiledMask
+from api.models import Equipment, EquipmentType, SerialNumberTrigram
+
+
+def test_generate_serial_matches_mask():
+    """Сгенерированные номера подходят под сгенерированные маски."""
+    rng = random.Random(1)
+    for _ in range(100):
+        mask = generate_mask(rng)
+        assert CompiledMask(mask).match(generate_serial(mask, rng))
+
+
+@pytest.mark.django_db
+def test_generate_inventory():
+    """Генератор создаёт типы, оборудование и поисковый индекс."""
+    assert generate_inventory(3, 25, seed=7, batch_size=10) == (3, 25)
+
+    assert EquipmentType.objects.count() == 3
+    assert Equipment.objects.count() == 25
+    assert SerialNumberTrigram.objects.exists()
+    for equipment in Equipment.objects.select_related('type'):
+        assert CompiledMask(equipment.type.serial_number_mask).match(
+            equipment.serial_number)
+
+
+def test_compare_results():
+    """Регрессия - рост медианы выше порога или рост числа запросов."""
+    baseline = {"list": {"median_ms": 10, "queries": 5},
+                "detail": {"median_ms": 10, "queries": 5},
+                "search": {"median_ms": 10, "queries": 5}}
+    current = {"list": {"median_ms": 11, "queries": 5},
+               "detail": {"median_ms": 13, "queries": 5},
+               "search": {"median_ms": 9, "queries": 6}}
+
+    assert [row[-1] for row in compare_results(baseline, current, 0.2)] == [
+        False, True, True]
+
+
+@pytest.mark.django_db
+def test_benchmark_command(tmp_path):
+    """Замер пишет JSON отчёт и сравнивается с базовым."""
+    User.objects.create_user(username="bench", password="12345678")
+    call_command('generate_inventory', types=2, equipment=20)
+    output = tmp_path / "baseline.json"
+
+    call_command('benchmark', username="bench", iterations=2, warmup=0,
+                 output=str(output))
+    report = json.loads(output.read_text())
+    assert set(report["results"]) == {"list", "detail", "search",
+                                      "create_single", "create_batch",
+                                      "mask_validation"}
+    assert report["dataset"] == {"types": 2, "equipment": 20}
+
+    for result in report["results"].values():
+        result["median_ms"] /= 100
+    output.write_text(json.dumps(report))
+    with pytest.raises(CommandError, match="Regressions"):
+        call_command('benchmark', username="bench", iterations=2, warmup=0,
+                     scenario=["detail"], compare=str(output))
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.models import Equipment, EquipmentChange
+
+
+@pytest.fixture(autouse=True)
+def settled(settings):
+    """Строки журнала видны сразу после записи."""
+    settings.EQUIPMENT_CHANGES_SETTLE_SECONDS = 0
+
+
+def changes(client, since, **params):
+    response = client.get(reverse('equipment-changes'),
+                          {"since": since, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+def sync(client, since):
+    """Все изменения после курсора по страницам."""
+    result, page = [], {"has_more": True, "next": since}
+    while page["has_more"]:
+        page = changes(client, page["next"], limit=2)
+        result += page["changes"]
+    return result, page["next"]
+
+
+@pytest.mark.django_db
+def test_change_feed_reports_writes(logged_client, equipment_type):
+    """Создание, изменение и удаление через все пути записи попадают в журнал."""  # noqa
+    cursor = logged_client.get(reverse('equipment-changes')).json()["next"]
+
+    logged_client.post(reverse('equipment-list'),
+                       {"type": equipment_type.id, "notation": "new",
+                        "serial_number": ["0001", "0002", "0003"]},
+                       content_type="application/json")
+    first, second, third = Equipment.objects.order_by('id')
+    logged_client.put(reverse('equipment-detail', args=[first.id]),
+                      {"type": equipment_type.id, "notation": "moved",
+                       "serial_number": ["0001"]},
+                      content_type="application/json")
+    logged_client.patch(reverse('equipment-bulk'),
+                        {"ids": [second.id], "notation": "bulk"},
+                        content_type="application/json")
+    logged_client.delete(reverse('equipment-bulk'), {"ids": [third.id]},
+                         content_type="application/json")
+
+    result, cursor = sync(logged_client, cursor)
+    latest = {(item["model"], item["id"]): item for item in result}
+    assert latest[("equipment", first.id)]["data"]["notation"] == "moved"
+    assert latest[("equipment", second.id)]["data"]["notation"] == "bulk"
+    assert latest[("equipment", third.id)]["action"] == EquipmentChange.DELETE
+    assert latest[("equipment", third.id)]["data"] is None
+    assert changes(logged_client, cursor)["changes"] == []
+
+
+@pytest.mark.django_db
+def test_change_feed_type_delete(logged_client, equipment_type):
+    """Удаление типа даёт строки удаления для его оборудования."""
+    equipment = Equipment.objects.create(type=equipment_type,
+                                         serial_number="0001", notation="a")
+    cursor = logged_client.get(reverse('equipment-changes')).json()["next"]
+    type_id = equipment_type.id
+    equipment_type.delete()
+
+    result = changes(logged_client, cursor)["changes"]
+    assert {(item["model"], item["id"], item["action"]) for item in result} \
+        == {("equipment", equipment.id, EquipmentChange.DELETE),
+            ("equipment_type", type_id, EquipmentChange.DELETE)}
+
+
+@pytest.mark.django_db
+def test_change_feed_settle_window(logged_client, equipment_type, settings):
+    """Свежие строки не отдаются до окончания окна фиксации."""
+    settings.EQUIPMENT_CHANGES_SETTLE_SECONDS = 60
+    Equipment.objects.create(type=equipment_type, serial_number="0001",
+                             notation="a")
+    assert changes(logged_client, 0)["changes"] == []
+    assert logged_client.get(
+        reverse('equipment-changes')).json()["next"] == 0
+
+
+@pytest.mark.django_db
+def test_change_feed_compaction(logged_client, equipment_type):
+    """Сжатие сохраняет последнюю строку объекта, старый курсор получает 410."""  # noqa
+    equipment = Equipment.objects.create(type=equipment_type,
+                                         serial_number="0001", notation="a")
+    for notation in ("b", "c"):
+        equipment.notation = notation
+        equipment.save()
+    before = changes(logged_client, 0)["changes"]
+
+    call_command("compact_changes")
+    assert EquipmentChange.objects.filter(object_id=equipment.id,
+                                          model="equipment").count() == 1
+    assert changes(logged_client, 0)["changes"] == before
+
+    cursor = changes(logged_client, 0)["next"]
+    EquipmentChange.objects.update(
+        created_at=timezone.now() - timedelta(days=60))
+    call_command("compact_changes", retention_days=30)
+    assert not EquipmentChange.objects.exists()
+
+    response = logged_client.get(reverse('equipment-changes'), {"since": 0})
+    assert response.status_code == status.HTTP_410_GONE
+    assert changes(logged_client, cursor)["changes"] == []
+
+
+@pytest.mark.django_db
+def test_change_feed_invalid_cursor(logged_client):
+    response = logged_client.get(reverse('equipment-changes'),
+                                 {"since": "abc"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_change_rows_written_with_data(equipment_type):
+    """Строка журнала пишется и откатывается в транзакции изменения."""
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            Equipment.objects.create(type=equipment_type,
+                                     serial_number="0001", notation="a")
+            assert EquipmentChange.objects.filter(
+                model=EquipmentChange.EQUIPMENT).count() == 1
+            raise RuntimeError
+    assert not EquipmentChange.objects.filter(
+        model=EquipmentChange.EQUIPMENT).exists()
@@ -0,0 +1,204 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.allocator import allocate_serial_numbers
+from api.importer import EquipmentImporter, read_rows
+from api.models import Equipment, EquipmentImport, EquipmentType
+from api.stats import verify_stats
+
+
+def test_read_rows_ndjson():
+    """Разбор NDJSON с ошибками по строкам."""
+    stream = io.StringIO('{"serial_number": "0001"}\n\nnot json\n[1]\n')
+
+    assert list(read_rows(stream, 'ndjson')) == [
+        (1, {"serial_number": "0001"}, None),
+        (2, None, "Invalid JSON."),
+        (3, None, "Row must be a JSON object."),
+    ]
+
+
+@pytest.mark.django_db
+def test_import_chunks_and_errors(equipment_type):
+    """Импорт частями: ошибки по строкам, вставка валидных строк."""
+    Equipment.objects.create(type=equipment_type, serial_number='0001',
+                             notation='old')
+    stream = io.StringIO(
+        "type,serial_number,notation\n"
+        f"{equipment_type.id},0001,n\n"
+        f"{equipment_type.id},0002,n\n"
+        f"{equipment_type.id},00AA,n\n"
+        f"{equipment_type.id},0002,n\n"
+        "999,0003,n\n"
+        f"{equipment_type.id},0004,\n"
+        f"{equipment_type.id},0005,n\n")
+    chunks = []
+    importer = EquipmentImporter('test.csv', chunk_size=4,
+                                 on_chunk=lambda report, errors:
+                                 chunks.append(report.rows))
+
+    report = importer.run(read_rows(stream, 'csv'))
+
+    assert chunks == [4, 7]
+    assert (report.rows, report.created, report.failed) == (7, 2, 5)
+    assert [row for row, _, _ in report.errors] == [1, 3, 4, 5, 6]
+    assert set(Equipment.objects.values_list('serial_number', flat=True)) \
+        == {'0001', '0002', '0005'}
+    assert EquipmentImport.objects.get(source='test.csv').finished
+    assert verify_stats() == []
+
+
+@pytest.mark.django_db
+def test_import_mask_errors_by_type(equipment_type):
+    """Номер, не подходящий под маску одного типа, подходит другому."""
+    letters = EquipmentType.objects.create(name='Letters',
+                                           serial_number_mask='AAAA')
+    stream = io.StringIO("type,serial_number,notation\n"
+                         f"{equipment_type.id},ABCD,n\n"
+                         f"{letters.id},ABCD,n\n")
+
+    report = EquipmentImporter('types.csv', chunk_size=10).run(
+        read_rows(stream, 'csv'))
+
+    assert [row for row, _, _ in report.errors] == [1]
+    assert Equipment.objects.get().type_id == letters.id
+
+
+@pytest.mark.django_db
+def test_import_serial_taken_after_validation(equipment_type, monkeypatch):
+    """Номер, занятый после проверки части, не прерывает импорт."""
+    validate_chunk = EquipmentImporter._validate_chunk
+
+    def validate_then_take(self, chunk):
+        result = validate_chunk(self, chunk)
+        Equipment.objects.create(type=equipment_type, serial_number='0002',
+                                 notation='other')
+        return result
+
+    monkeypatch.setattr(EquipmentImporter, '_validate_chunk',
+                        validate_then_take)
+    stream = io.StringIO("type,serial_number,notation\n"
+                         f"{equipment_type.id},0001,n\n"
+                         f"{equipment_type.id},0002,n\n"
+                         f"{equipment_type.id},0003,n\n")
+
+    report = EquipmentImporter('race.csv', chunk_size=10).run(
+        read_rows(stream, 'csv'))
+
+    assert (report.rows, report.created, report.failed) == (3, 2, 1)
+    assert report.errors == [
+        (2, '0002', "Serial number '0002' already exists.")]
+    assert Equipment.objects.filter(notation='n').count() == 2
+    assert verify_stats() == []
+
+
+@pytest.mark.django_db
+def test_import_resume(equipment_type):
+    """Возобновление импорта пропускает зафиксированные строки."""
+    rows = [json.dumps({"type": equipment_type.id,
+                        "serial_number": f"{i:04}", "notation": "n"})
+            for i in range(6)]
+    EquipmentImport.objects.create(source='data.ndjson', rows_committed=4,
+                                   created=4)
+    importer = EquipmentImporter('data.ndjson', chunk_size=10, resume=True)
+
+    report = importer.run(read_rows(io.StringIO("\n".join(rows)), 'ndjson'))
+
+    assert (report.rows, report.created) == (6, 6)
+    assert list(Equipment.objects.values_list('serial_number', flat=True)) \
+        == ['0004', '0005']
+
+
+@pytest.mark.django_db
+def test_import_own_reserved_serials(equipment_type, create_user,
+                                     django_user_model):
+    """Свои зарезервированные номера импортируются, чужие - нет."""
+    serials, _ = allocate_serial_numbers(equipment_type, 2, create_user)
+    stream = "type,serial_number,notation\n" + "".join(
+        f"{equipment_type.id},{serial},n\n" for serial in serials)
+    other = django_user_model.objects.create_user(username='other',
+                                                  password='12345678')
+
+    denied = EquipmentImporter('other.csv', chunk_size=10, user=other).run(
+        read_rows(io.StringIO(stream), 'csv'))
+    report = EquipmentImporter('own.csv', chunk_size=10,
+                               user=create_user).run(
+        read_rows(io.StringIO(stream), 'csv'))
+
+    assert (denied.created, denied.failed) == (0, 2)
+    assert (report.created, report.failed) == (2, 0)
+    assert sorted(Equipment.objects.values_list('serial_number', flat=True)) \
+        == sorted(serials)
+    assert EquipmentImport.objects.get(source='own.csv').user == create_user
+
+
+@pytest.mark.django_db
+def test_import_resume_keeps_user(equipment_type, create_user):
+    """Возобновлённый импорт берёт пользователя из EquipmentImport."""
+    serials, _ = allocate_serial_numbers(equipment_type, 1, create_user)
+    EquipmentImport.objects.create(source='resume.csv', user=create_user)
+    stream = io.StringIO("type,serial_number,notation\n"
+                         f"{equipment_type.id},{serials[0]},n\n")
+
+    report = EquipmentImporter('resume.csv', chunk_size=10,
+                               resume=True).run(read_rows(stream, 'csv'))
+
+    assert (report.created, report.failed) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_import_command(tmp_path, equipment_type):
+    """Команда import_equipment пишет отчёт об ошибках."""
+    source = tmp_path / "equipment.csv"
+    source.write_text("type,serial_number,notation\n"
+                      f"{equipment_type.id},0001,n\n"
+                      f"{equipment_type.id},bad,n\n")
+    errors = tmp_path / "errors.csv"
+    out = io.StringIO()
+
+    call_command('import_equipment', str(source), errors=str(errors),
+                 stdout=out)
+
+    assert Equipment.objects.count() == 1
+    assert errors.read_text().splitlines()[1].startswith("2,bad,")
+    assert "1 created, 1 failed" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_export_command(tmp_path, equipment_type):
+    """Команда export_equipment выгружает строки в файл."""
+    for i in range(3):
+        Equipment.objects.create(type=equipment_type,
+                                 serial_number=f"{i:04}", notation="n")
+    output = tmp_path / "equipment.ndjson"
+
+    call_command('export_equipment', output=str(output), chunk_size=2)
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["serial_number"] for row in rows] == ["0000", "0001", "0002"]
+
+
+@pytest.mark.django_db
+def test_export_search_runs_once(tmp_path, equipment_type):
+    """Поиск выполняется один раз, строки читаются частями по id."""
+    for i in range(5):
+        Equipment.objects.create(type=equipment_type,
+                                 serial_number=f"{i:04}", notation="rack")
+    Equipment.objects.create(type=equipment_type, serial_number="0100",
+                             notation="desk")
+    output = tmp_path / "equipment.ndjson"
+
+    with CaptureQueriesContext(connection) as queries:
+        call_command('export_equipment', output=str(output), chunk_size=2,
+                     search="rack")
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row["serial_number"] for row in rows] == [
+        "0000", "0001", "0002", "0003", "0004"]
+    assert len([query for query in queries.captured_queries
+                if "UNION" in query["sql"]]) == 1
@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from api.models import Equipment, EquipmentJob, EquipmentJobCreated
+from api.stats import verify_stats
+
+
+def enqueue(client, equipment_type, serial_numbers):
+    """Постановка задачи через API."""
+    return client.post(reverse('equipment-list') + "?job=1",
+                       {"type": equipment_type.id, "notation": "batch",
+                        "serial_number": serial_numbers},
+                       content_type="application/json")
+
+
+def job_state(client, pk):
+    response = client.get(reverse('equipment-job', args=[pk]))
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_job_creates_equipment_in_chunks(logged_client, equipment_type,
+                                         settings):
+    """Задача принимается с 202 и создаёт оборудование в обработчике."""
+    settings.EQUIPMENT_BULK_BATCH_SIZE = 2
+    serials = ["0001", "0002", "0003", "0004", "0005"]
+    response = enqueue(logged_client, equipment_type, serials)
+
+    assert response.status_code == status.HTTP_202_ACCEPTED
+    job = response.json()
+    assert job["status"] == EquipmentJob.PENDING
+    assert response["Location"] == job["url"]
+    assert not Equipment.objects.exists()
+
+    call_command("run_equipment_worker", once=True)
+
+    state = job_state(logged_client, job["id"])
+    assert state["status"] == EquipmentJob.DONE
+    assert state["total"] == state["processed"] == 5
+    assert state["errors"] == {}
+    assert state["created_ids"] == list(
+        Equipment.objects.order_by('id').values_list('id', flat=True))
+    assert EquipmentJobCreated.objects.filter(job_id=job["id"]).count() == 5
+    assert set(Equipment.objects.values_list('serial_number', flat=True)) \
+        == set(serials)
+    assert verify_stats() == []
+
+
+@pytest.mark.django_db
+def test_job_reports_validation_errors(logged_client, equipment_type):
+    """Ошибки проверки совпадают с синхронным endpoint-ом, ничего не создаётся."""  # noqa
+    Equipment.objects.create(type=equipment_type, serial_number="0001",
+                             notation="old")
+    serials = ["0001", "ABCD", "0002", "0002", "0003"]
+    sync = logged_client.post(reverse('equipment-list'),
+                              {"type": equipment_type.id, "notation": "batch",
+                               "serial_number": serials},
+                              content_type="application/json")
+    job = enqueue(logged_client, equipment_type, serials).json()
+
+    call_command("run_equipment_worker", once=True)
+
+    state = job_state(logged_client, job["id"])
+    assert state["status"] == EquipmentJob.FAILED
+    assert state["created_ids"] == []
+    assert state["errors"] == {serial: errors[0] for serial, errors
+                               in sync.json().items()}
+    assert Equipment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_job_checks_only_shape(logged_client, equipment_type):
+    """При постановке проверяется только формат данных."""
+    assert enqueue(logged_client, equipment_type, []).status_code \
+        == status.HTTP_400_BAD_REQUEST
+    response = logged_client.post(reverse('equipment-list') + "?job=1",
+                                  {"type": 999, "notation": "batch",
+                                   "serial_number": ["0001"]},
+                                  content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert not EquipmentJob.objects.exists()
+
+
+@pytest.mark.django_db
+def test_job_visible_to_owner_only(client, logged_client, equipment_type):
+    job = enqueue(logged_client, equipment_type, ["0001"]).json()
+    client.force_login(User.objects.create_user(username="other",
+                                                password="12345678"))
+    response = client.get(reverse('equipment-job', args=[job["id"]]))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_job_skips_serials_taken_after_validation(logged_client,
+                                                  equipment_type,
+                                                  monkeypatch):
+    """Номер, занятый после проверки, попадает в ошибки, остальные создаются."""  # noqa
+    job = enqueue(logged_client, equipment_type,
+                  ["0001", "0002", "0003"]).json()
+    Equipment.objects.create(type=equipment_type, serial_number="0002",
+                             notation="other")
+    monkeypatch.setattr("api.jobs.serial_number_errors",
+                        lambda *args, **kwargs: {})
+
+    call_command("run_equipment_worker", once=True)
+
+    state = job_state(logged_client, job["id"])
+    assert state["status"] == EquipmentJob.DONE
+    assert state["errors"] == {"0002": "Serial number '0002' already exists."}
+    assert len(state["created_ids"]) == 2
+    assert verify_stats() == []
+
+
+@pytest.mark.django_db
+def test_stale_job_is_resumed(logged_client, equipment_type):
+    """Задача упавшего обработчика продолжается с незафиксированной части."""
+    job = enqueue(logged_client, equipment_type,
+                  ["0001", "0002", "0003"]).json()
+    first = Equipment.objects.create(type=equipment_type,
+                                     serial_number="0001", notation="batch")
+    EquipmentJob.objects.filter(pk=job["id"]).update(
+        status=EquipmentJob.RUNNING, worker="gone", processed=1,
+        heartbeat_at=timezone.now() - timedelta(hours=1))
+    EquipmentJobCreated.objects.create(job_id=job["id"],
+                                       equipment_id=first.pk)
+
+    call_command("run_equipment_worker", once=True)
+
+    state = job_state(logged_client, job["id"])
+    assert state["status"] == EquipmentJob.DONE
+    assert state["processed"] == 3
+    assert state["errors"] == {}
+    assert len(state["created_ids"]) == 3
+    assert Equipment.objects.count() == 3
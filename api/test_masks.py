@@ -0,0 +1,70 @@
+import pytest
+
+from api.masks import (CompiledMask, MaskCache, MaskSpace, compile_type_mask,
+                       invalid_serial_numbers, mask_cache, mask_to_regex)
+from api.models import EquipmentType
+
+
+def test_mask_to_regex():
+    """Перевод маски в regex с экранированием прочих символов."""
+    assert mask_to_regex('NAaXZ.') == r'^\d[A-Z][a-z][A-Z0-9][-_@]\.$'
+    assert mask_to_regex('') == ''
+
+
+def test_compiled_mask_match():
+    """Проверка номеров по скомпилированной маске."""
+    mask = CompiledMask('XXAAAAAXAA')
+
+    assert mask.match('A2BCDEF2GF')
+    assert not mask.match('A2BCDEF2G')
+    assert not mask.match('a2BCDEF2GF')
+    assert mask.invalid(['A2BCDEF2GF', 'bad', 'A2BCDEF2Gf']) == [
+        'bad', 'A2BCDEF2Gf']
+
+
+def test_mask_space_enumeration():
+    """Номера маски перечисляются в порядке строк и подходят под маску."""
+    space = MaskSpace('XZ-N')
+    serials = [space.serial(ordinal) for ordinal in range(space.size)]
+
+    assert space.size == 36 * 3 * 10
+    assert serials == sorted(serials)
+    assert len(set(serials)) == space.size
+    assert CompiledMask('XZ-N').invalid(serials) == []
+    assert [space.ordinal(serial) for serial in serials] == list(
+        range(space.size))
+    with pytest.raises(ValueError):
+        space.ordinal('0-+1')
+    with pytest.raises(IndexError):
+        space.serial(space.size)
+
+
+def test_mask_cache_bounded():
+    """Кэш вытесняет самые старые записи и сбрасывается по типу."""
+    cache = MaskCache(maxsize=2)
+    first = cache.get(1, 'NN')
+
+    assert cache.get(1, 'NN') is first
+    cache.get(2, 'AA')
+    cache.get(3, 'aa')
+    assert len(cache) == 2
+    assert cache.get(1, 'NN') is not first
+
+    cache.invalidate(1)
+    assert len(cache) == 1
+
+
+@pytest.mark.django_db
+def test_mask_cache_invalidated_on_save():
+    """Сохранение типа оборудования сбрасывает его маску в кэше."""
+    equipment_type = EquipmentType.objects.create(name='Type',
+                                                  serial_number_mask='NN')
+    compiled = compile_type_mask(equipment_type)
+    assert (equipment_type.pk, 'NN') in mask_cache._entries
+
+    equipment_type.serial_number_mask = 'AA'
+    equipment_type.save()
+
+    assert (equipment_type.pk, 'NN') not in mask_cache._entries
+    assert compile_type_mask(equipment_type) is not compiled
+    assert invalid_serial_numbers(equipment_type, ['12', 'AB']) == ['12']
@@ -0,0 +1,115 @@
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.conditional import equipment_version
+from api.models import Equipment
+from api.routers import ReplicaPinMiddleware, replica_reads
+from api.views import EquipmentList, EquipmentUpload
+
+
+@pytest.fixture
+def replicas(settings):
+    """Одна реплика."""
+    settings.EQUIPMENT_READ_REPLICAS = ['replica1']
+    settings.EQUIPMENT_REPLICA_PIN_SECONDS = 5
+
+
+def route(request, view):
+    """Алиас БД для чтения Equipment внутри обработки запроса."""
+    aliases = []
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        aliases.append(router.db_for_read(Equipment))
+        return HttpResponse()
+
+    middleware = ReplicaPinMiddleware(get_response)
+    response = middleware(request)
+    return aliases[0], response
+
+
+@pytest.mark.django_db(transaction=True)
+def test_router_reads(replicas):
+    """Чтение с реплики только в блоке replica_reads и вне транзакции."""
+    assert router.db_for_read(Equipment) == 'default'
+    with replica_reads('replica1'):
+        assert router.db_for_read(Equipment) == 'replica1'
+        assert router.db_for_write(Equipment) == 'default'
+        with transaction.atomic():
+            assert router.db_for_read(Equipment) == 'default'
+    assert router.db_for_read(Equipment) == 'default'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pin_middleware(replicas, settings):
+    """GET к представлению с read_from_replica читает с реплики до записи."""
+    factory = RequestFactory()
+    list_view = EquipmentList.as_view()
+
+    assert route(factory.get('/'), list_view)[0] == 'replica1'
+    assert route(factory.get('/'), EquipmentUpload.as_view())[0] == 'default'
+
+    alias, response = route(factory.post('/'), list_view)
+    assert alias == 'default'
+    cookie = response.cookies[settings.EQUIPMENT_REPLICA_PIN_COOKIE]
+    assert cookie["max-age"] == settings.EQUIPMENT_REPLICA_PIN_SECONDS
+
+    request = factory.get('/')
+    request.COOKIES[settings.EQUIPMENT_REPLICA_PIN_COOKIE] = cookie.value
+    assert route(request, list_view)[0] == 'default'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pin_jwt_user_without_cookie(replicas, create_user,
+                                     django_user_model):
+    """Пользователь JWT без cookie после записи читает с основной БД."""
+    factory = RequestFactory()
+    list_view = EquipmentList.as_view()
+    other = django_user_model.objects.create_user(username='other',
+                                                  password='12345678')
+
+    def jwt_get(user):
+        return factory.get(
+            '/', HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+    assert route(jwt_get(create_user), list_view)[0] == 'replica1'
+    write = factory.post('/')
+    write.user = create_user
+    route(write, list_view)
+
+    assert route(jwt_get(create_user), list_view)[0] == 'default'
+    assert route(jwt_get(other), list_view)[0] == 'replica1'
+    invalid = factory.get('/', HTTP_AUTHORIZATION="Bearer invalid")
+    assert route(invalid, list_view)[0] == 'replica1'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_other_client_write_keeps_replica(replicas):
+    """Запись другого клиента не переводит чтение на основную БД."""
+    equipment_version.bump()
+    assert route(RequestFactory().get('/'),
+                 EquipmentList.as_view())[0] == 'replica1'
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pin_middleware_async(replicas, settings):
+    """В асинхронном стеке middleware не переносит запрос в поток."""
+    aliases = []
+    list_view = EquipmentList.as_view()
+
+    async def get_response(request):
+        middleware.process_view(request, list_view, (), {})
+        aliases.append(router.db_for_read(Equipment))
+        return HttpResponse()
+
+    middleware = ReplicaPinMiddleware(get_response)
+    assert iscoroutinefunction(middleware)
+
+    async_to_sync(middleware)(RequestFactory().get('/'))
+    response = async_to_sync(middleware)(RequestFactory().post('/'))
+    assert aliases == ['replica1', 'default']
+    assert settings.EQUIPMENT_REPLICA_PIN_COOKIE in response.cookies
@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework import status
+
+from api.models import Equipment, EquipmentType, EquipmentTypeStats
+from api.stats import verify_stats
+
+
+@pytest.fixture
+def types():
+    """Два типа оборудования с масками из цифр."""
+    return (EquipmentType.objects.create(name="Digits",
+                                         serial_number_mask="NNNN"),
+            EquipmentType.objects.create(name="Other",
+                                         serial_number_mask="NNNN"))
+
+
+def stats(client, **params):
+    """Ответ endpoint-а статистики."""
+    response = client.get(reverse('equipment-stats'), params)
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_stats_follow_api_writes(logged_client, types):
+    """Создание, изменение и удаление через API меняют статистику."""
+    digits, other = types
+    logged_client.post(reverse('equipment-list'),
+                       {"type": digits.id, "notation": "a",
+                        "serial_number": ["0001", "0002", "0003"]},
+                       content_type="application/json")
+    logged_client.post(reverse('equipment-list'),
+                       {"type": digits.id, "notation": "b",
+                        "serial_number": ["0004"]},
+                       content_type="application/json")
+    ids = list(Equipment.objects.order_by('id').values_list('id', flat=True))
+    assert stats(logged_client)["results"] == [
+        {"type": digits.id, "name": "Digits", "count": 4},
+        {"type": other.id, "name": "Other", "count": 0},
+    ]
+
+    logged_client.patch(reverse('equipment-detail', args=[ids[0]]),
+                        {"type": other.id}, content_type="application/json")
+    logged_client.patch(reverse('equipment-bulk'),
+                        {"ids": ids[1:3], "notation": "b"},
+                        content_type="application/json")
+    assert stats(logged_client, type=digits.id) == {
+        "type": digits.id, "count": 3,
+        "results": [{"notation": "b", "count": 3}]}
+    assert stats(logged_client, type=other.id)["results"] == [
+        {"notation": "a", "count": 1}]
+
+    logged_client.delete(reverse('equipment-detail', args=[ids[0]]))
+    logged_client.delete(reverse('equipment-bulk'), {"ids": ids[1:3]},
+                         content_type="application/json")
+    assert stats(logged_client)["count"] == 1
+    assert verify_stats() == []
+
+    response = logged_client.get(reverse('equipment-stats'), {"type": 999})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_stats_command(types):
+    """Команда находит расхождения и пересчитывает таблицы."""
+    digits, _ = types
+    Equipment.objects.create(type=digits, serial_number="0001", notation="a")
+    call_command('equipment_stats')
+
+    EquipmentTypeStats.objects.filter(type=digits).update(count=5)
+    with pytest.raises(CommandError, match="1 statistics mismatches"):
+        call_command('equipment_stats')
+
+    call_command('equipment_stats', rebuild=True)
+    assert verify_stats() == []
+    assert EquipmentTypeStats.objects.get(type=digits).count == 1
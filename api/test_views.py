@@ -1,26 +1,40 @@
+import gzip
+import json
+import threading
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import brotli
+import orjson
 import pytest
 
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.files.uploadedfile import SimpleUploadedFile
 from rest_framework import status
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, connections, transaction
+from django.http import HttpResponse
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from api.models import Equipment, EquipmentType
-
-
-@pytest.fixture
-def create_user():
-    """Фикстура для создания пользователя."""
-    username = "test_user"
-    password = "12345678"
-
-    return User.objects.create_user(username=username, password=password)
-
-
-@pytest.fixture
-def create_equipment_type():
-    """Создание типа оборудования."""
-    return EquipmentType.objects.create(name='Type1', 
-                                        serial_number_mask='XXAAAAAXAA')
+from api import bulk, renderers
+from api.authentication import CachedJWTAuthentication, user_cache_key
+from api.conditional import equipment_version
+from api.metrics import PerformanceMiddleware, registry
+from api.models import Equipment, EquipmentType, SerialNumberTrigram
+from api.renderers import FastJSONRenderer
+from api.search import (EquipmentSearchIndex, index_equipment,
+                        serial_trigrams)
+from api.testing import QUERY_BUDGETS, query_budget
+from api.type_cache import type_cache
+from api.views import EquipmentDetail, EquipmentList, EquipmentTypeList
 
 
 @pytest.fixture
@@ -59,6 +73,393 @@ def test_get_equipment_list_positive(client, create_user, create_equipment_list)
     assert response.data.get("count") == 2
 
 
+@pytest.mark.django_db
+def test_get_equipment_list_serial_numbers(client, create_user,
+                                           create_equipment_type):
+    """Серийные номера группируются по типу и примечанию."""
+    client.force_login(create_user)
+    for serial, notation in (("A2BCDEF2GF", "batch"), ("A3BCDEF2GF", "batch"),
+                             ("A4BCDEF2GF", "other")):
+        Equipment.objects.create(type=create_equipment_type,
+                                 serial_number=serial, notation=notation)
+
+    response = client.get(reverse('equipment-list'))
+
+    results = response.data["results"]
+    assert results[0]["serial_numbers"] == ["A2BCDEF2GF", "A3BCDEF2GF"]
+    assert results[1]["serial_numbers"] == ["A2BCDEF2GF", "A3BCDEF2GF"]
+    assert results[2]["serial_numbers"] == ["A4BCDEF2GF"]
+    assert results[0]["type"]["name"] == "Type1"
+
+
+@pytest.mark.django_db
+def test_get_equipment_list_query_count(client, create_user,
+                                        create_equipment_type):
+    """Число запросов на страницу списка не зависит от числа строк."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    second_type = EquipmentType.objects.create(name='Type2',
+                                               serial_number_mask='NNNN')
+    type_cache.all()
+    equipment_version.current()
+    Equipment.objects.create(type=create_equipment_type,
+                             serial_number="A2BCDEF2GF", notation="n0")
+
+    with CaptureQueriesContext(connection) as single_row:
+        client.get(url)
+
+    for i in range(1, 5):
+        Equipment.objects.create(type=second_type, serial_number=f"000{i}",
+                                 notation=f"n{i}")
+    type_cache.all()
+
+    with CaptureQueriesContext(connection) as full_page:
+        response = client.get(url)
+
+    assert len(response.data["results"]) == 5
+    assert len(full_page) == len(single_row)
+
+
+@pytest.mark.django_db
+def test_get_equipment_detail_query_count(client, create_user,
+                                          create_equipment,
+                                          django_assert_num_queries):
+    """
+    Детальный просмотр: сессия, пользователь, валидаторы, объект и номера.
+    """
+    client.force_login(create_user)
+    url = reverse('equipment-detail', args=[create_equipment.id])
+    type_cache.all()
+
+    with django_assert_num_queries(5):
+        response = client.get(url)
+
+    assert response.data["serial_numbers"] == ["D3BCDEF2GF"]
+
+
+@pytest.mark.django_db
+def test_get_equipment_list_keyset(client, create_user, create_equipment_type):
+    """Keyset пагинация: без count, размер страницы задаёт клиент."""
+    client.force_login(create_user)
+    for i in range(7):
+        Equipment.objects.create(type=create_equipment_type,
+                                 serial_number=f"A{i}BCDEF2GF", notation="k")
+    url = reverse('equipment-list')
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, {'pagination': 'cursor', 'page_size': 3})
+
+    assert "count" not in response.data
+    assert [item["serial_numbers"][0] for item in response.data["results"]]
+    assert len(response.data["results"]) == 3
+    sql = " ".join(query["sql"].upper() for query in queries)
+    assert "COUNT(" not in sql and "OFFSET" not in sql
+
+    seen = [item["id"] for item in response.data["results"]]
+    next_url = response.data["next"]
+    while next_url:
+        response = client.get(next_url)
+        seen.extend(item["id"] for item in response.data["results"])
+        next_url = response.data["next"]
+    assert seen == sorted(Equipment.objects.values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_get_equipment_list_keyset_search(client, create_user,
+                                          create_equipment_list, settings):
+    """Keyset пагинация учитывает поиск и ограничение размера страницы."""
+    settings.EQUIPMENT_MAX_PAGE_SIZE = 1
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+
+    response = client.get(url, {'pagination': 'cursor', 'page_size': 50,
+                                'search': 'A'})
+    assert len(response.data["results"]) == 1
+    assert "search=A" in response.data["next"]
+
+    response = client.get(url, {'pagination': 'cursor',
+                                'search': 'A3BCDEF2GF'})
+    assert len(response.data["results"]) == 1
+    assert response.data["next"] is None
+
+
+@pytest.mark.django_db
+def test_search_equipment_ranked(client, create_user, create_equipment_type):
+    """Поиск по подстроке и префиксу серийного номера с ранжированием."""
+    client.force_login(create_user)
+    for serial in ("ZZCDEF2GAB", "CDEF2GABZZ", "CDBBBBBBBB"):
+        Equipment.objects.create(type=create_equipment_type,
+                                 serial_number=serial, notation=serial)
+    url = reverse('equipment-list')
+
+    response = client.get(url, {'search': 'cdef'})
+    assert [item["notation"] for item in response.data["results"]] == [
+        "CDEF2GABZZ", "ZZCDEF2GAB"]
+
+    response = client.get(url, {'search': 'CD'})
+    assert {item["notation"] for item in response.data["results"]} == {
+        "CDEF2GABZZ", "CDBBBBBBBB"}
+
+    response = client.get(url, {'search': 'type1'})
+    assert response.data["count"] == 3
+
+
+def table_scans(queryset) -> list:
+    """Строки EXPLAIN QUERY PLAN SQLite, которые читают всю api_equipment."""
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+        details = [row[-1] for row in cursor.fetchall()]
+    return [detail for detail in details
+            if detail.split()[:2] == ["SCAN", Equipment._meta.db_table]]
+
+
+@pytest.mark.django_db
+def test_search_uses_indexes(create_equipment_type):
+    """Поиск выбирает строки по индексам, а не сканированием таблицы."""
+    if connection.vendor != 'sqlite':
+        pytest.skip("План запроса проверяется на SQLite.")
+    Equipment.objects.bulk_create([
+        Equipment(type=create_equipment_type, serial_number=f"S{i:09}",
+                  notation=f"rack {i}") for i in range(200)])
+    SerialNumberTrigram.objects.bulk_create([
+        SerialNumberTrigram(equipment=item, trigram=trigram)
+        for item in Equipment.objects.all()
+        for trigram in serial_trigrams(item.serial_number)])
+    index = EquipmentSearchIndex()
+
+    for terms in (['00012'], ['S0'], ['rack'], ['type1'], ['S0', 'rack']):
+        queryset = index.search(Equipment.objects.all(), terms)
+        assert table_scans(queryset) == [], terms
+    assert index.search(Equipment.objects.all(), ['00012']).count() == 11
+    assert index.search(Equipment.objects.all(), ['s0']).count() == 200
+
+
+@pytest.mark.django_db
+def test_search_uses_rarest_trigrams(create_equipment_type):
+    """Кандидаты отбираются по самым редким триграммам слова."""
+    serials = [f"ABCD{i:04}" for i in range(1, 51)]
+    created = Equipment.objects.bulk_create([
+        Equipment(type=create_equipment_type, serial_number=serial,
+                  notation="x") for serial in serials])
+    if created[0].pk is None:
+        created = list(Equipment.objects.all())
+    index_equipment(created)
+    index = EquipmentSearchIndex()
+    counts = index.trigram_counts(['abcd0007'], 'default')
+
+    candidates = index.trigram_candidates(
+        'abcd0007', serial_trigrams('abcd0007'), 'default', counts)
+    params = set(candidates.query.sql_with_params()[1])
+    assert params & serial_trigrams('abcd0007') == {'000', '007'}
+    assert [item.serial_number for item in index.search(
+        Equipment.objects.all(), ['abcd0007'])] == ["ABCD0007"]
+    assert index.search(Equipment.objects.all(), ['qqq']).count() == 0
+
+
+@pytest.mark.django_db
+def test_search_index_maintained(client, create_user, create_equipment_type):
+    """Триграммы пишутся при пакетном создании и изменении номера."""
+    client.force_login(create_user)
+    client.post(reverse('equipment-list'), {
+        'serial_number': ['A2BCDEF2GF'],
+        'type': create_equipment_type.id,
+        'notation': 'test'
+    }, content_type='application/json')
+    equipment = Equipment.objects.get()
+    trigrams = set(SerialNumberTrigram.objects.values_list('trigram',
+                                                           flat=True))
+    assert trigrams == {'a2b', '2bc', 'bcd', 'cde', 'def', 'ef2', 'f2g',
+                        '2gf'}
+
+    equipment.serial_number = 'QQQ'
+    equipment.save()
+    assert set(SerialNumberTrigram.objects.values_list(
+        'trigram', flat=True)) == {'qqq'}
+
+
+@pytest.mark.django_db
+def test_search_equipment_notation(client, create_user,
+                                   create_equipment_type):
+    """Поиск по словам примечания с ранжированием и обновлением индекса."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    for serial, notation in (("AABBBBBBBB", "Стойка 12, коммутатор ядра"),
+                             ("ABBBBBBBBB", "коммутатор коммутатор доступа"),
+                             ("ACBBBBBBBB", "маршрутизатор")):
+        client.post(url, {'serial_number': [serial],
+                          'type': create_equipment_type.id,
+                          'notation': notation},
+                    content_type='application/json')
+
+    response = client.get(url, {'search': 'КОММУТ'})
+    assert [item["notation"] for item in response.data["results"]] == [
+        "коммутатор коммутатор доступа", "Стойка 12, коммутатор ядра"]
+
+    response = client.get(url, {'search': 'коммутатор ядра'})
+    assert [item["notation"] for item in response.data["results"]] == [
+        "Стойка 12, коммутатор ядра"]
+
+    response = client.get(url, {'search': 'ACB маршрут'})
+    assert response.data["count"] == 1
+
+    client.patch(reverse('equipment-bulk'),
+                 {'ids': list(Equipment.objects.filter(
+                     serial_number="ACBBBBBBBB").values_list('id', flat=True)),
+                  'notation': 'коммутатор'},
+                 content_type='application/json')
+    client.delete(reverse('equipment-bulk') + '?search=ядра')
+    response = client.get(url, {'search': 'коммутатор'})
+    assert {item["notation"] for item in response.data["results"]} == {
+        "коммутатор коммутатор доступа", "коммутатор"}
+    assert client.get(url, {'search': 'маршрут'}).data["count"] == 0
+
+    call_command('rebuild_search_index')
+    assert client.get(url, {'search': 'доступ'}).data["count"] == 1
+
+
+@pytest.mark.django_db
+def test_get_equipment_detail_conditional(client, create_user,
+                                          create_equipment,
+                                          django_assert_num_queries):
+    """Неизменённый объект получает 304, изменение меняет ETag."""
+    client.force_login(create_user)
+    url = reverse('equipment-detail', args=[create_equipment.id])
+    response = client.get(url)
+    etag = response["ETag"]
+    assert response.has_header("Last-Modified")
+
+    type_cache.all()
+    with django_assert_num_queries(3):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+
+    Equipment.objects.create(type=create_equipment.type,
+                             serial_number="D4BCDEF2GF",
+                             notation=create_equipment.notation)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_update_equipment_if_match(client, create_user, create_equipment):
+    """Запись с устаревшим If-Match отклоняется с 412."""
+    client.force_login(create_user)
+    url = reverse('equipment-detail', args=[create_equipment.id])
+    etag = client.get(url)["ETag"]
+    data = {
+        'serial_number': [create_equipment.serial_number],
+        'type': create_equipment.type.id,
+        'notation': 'changed'
+    }
+
+    response = client.put(url, data, content_type='application/json',
+                          HTTP_IF_MATCH='"stale"')
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+    response = client.put(url, data, content_type='application/json',
+                          HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+
+    response = client.delete(url, HTTP_IF_MATCH=etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+
+
+@pytest.mark.django_db(transaction=True)
+def test_table_version_in_database(create_equipment_type):
+    """Версия таблицы не зависит от кэша процесса и меняется при записи."""
+    version = equipment_version.current()
+    caches[settings.EQUIPMENT_TYPE_CACHE_ALIAS].clear()
+    assert equipment_version.current() == version
+
+    Equipment.objects.create(type=create_equipment_type,
+                             serial_number="A2BCDEF2GF", notation="n")
+    assert equipment_version.current() > version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_table_version_bumped_after_commit(create_equipment_type):
+    """Версия таблицы меняется после фиксации, а не в транзакции записи."""
+    version = equipment_version.current()
+    with CaptureQueriesContext(connection) as queries:
+        with transaction.atomic():
+            bulk.create_equipment(["A2BCDEF2GF"],
+                                  type=create_equipment_type, notation="n")
+            in_transaction = len(queries)
+
+    assert not [query for query in queries.captured_queries[:in_transaction]
+                if "api_dataversion" in query["sql"]]
+    assert equipment_version.current() > version
+
+
+@pytest.mark.skipif(connection.vendor == "sqlite",
+                    reason="SQLite допускает только одну пишущую транзакцию")
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_writers_do_not_block(create_equipment_type):
+    """Открытая транзакция записи не задерживает запись другого клиента."""
+    written = threading.Event()
+    release = threading.Event()
+
+    def long_writer():
+        try:
+            with transaction.atomic():
+                bulk.create_equipment(["A2BCDEF2GF"],
+                                      type=create_equipment_type,
+                                      notation="first")
+                written.set()
+                release.wait(10)
+        finally:
+            connections.close_all()
+
+    def short_writer():
+        try:
+            bulk.create_equipment(["A3BCDEF2GF"],
+                                  type=create_equipment_type,
+                                  notation="second")
+        finally:
+            connections.close_all()
+
+    first = threading.Thread(target=long_writer)
+    second = threading.Thread(target=short_writer)
+    first.start()
+    assert written.wait(10)
+    second.start()
+    second.join(5)
+    blocked = second.is_alive()
+    release.set()
+    first.join()
+    second.join()
+
+    assert not blocked
+    assert Equipment.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_equipment_list_conditional(client, create_user,
+                                        create_equipment_list):
+    """Список: 304 без изменений, новая версия после записи."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    etag = client.get(url, {'search': 'A2'})["ETag"]
+
+    response = client.get(url, {'search': 'A2'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert client.get(url)["ETag"] != etag
+
+    deleted = Equipment.objects.get(serial_number="A3BCDEF2GF")
+    client.delete(reverse('equipment-detail', args=[deleted.id]))
+    response = client.get(url, {'search': 'A2'}, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+
+    etag = client.get(reverse('equipment-type-list'))["ETag"]
+    response = client.get(reverse('equipment-type-list'),
+                          HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
 @pytest.mark.django_db
 def test_get_equipment_detail_positive(client, create_user, create_equipment):
     """Получение одного объекта Equipment. Положительный исход."""
@@ -84,6 +485,104 @@ def test_create_equipment_positive(client, create_user, create_equipment_type):
     assert response.status_code == status.HTTP_201_CREATED
 
 
+@pytest.mark.django_db
+def test_create_equipment_bulk(client, create_user, create_equipment_type):
+    """Пакетное создание: ответ строится из вставленных строк."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    serials = [f"A{i}BCDEF2GF" for i in range(10)]
+    data = {
+        'serial_number': serials,
+        'type': create_equipment_type.id,
+        'notation': 'batch'
+    }
+    response = client.post(url, data, content_type='application/json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [item['serial_number'] for item in response.data] == serials
+    assert all(item['id'] for item in response.data)
+    assert Equipment.objects.filter(notation='batch').count() == 10
+
+
+@pytest.mark.django_db
+def test_create_equipment_bulk_errors(client, create_user, create_equipment):
+    """Пакетное создание: ошибки по каждому номеру, ничего не записано."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    data = {
+        'serial_number': ['D3BCDEF2GF', 'A1BCDEF2GF', 'A1BCDEF2GF',
+                          'bad', 'A5BCDEF2GF'],
+        'type': create_equipment.type.id,
+        'notation': 'batch'
+    }
+    response = client.post(url, data, content_type='application/json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert set(response.data) == {'D3BCDEF2GF', 'A1BCDEF2GF', 'bad'}
+    assert "already exists" in response.data['D3BCDEF2GF'][0]
+    assert "duplicated" in response.data['A1BCDEF2GF'][0]
+    assert "does not match" in response.data['bad'][0]
+    assert not Equipment.objects.filter(notation='batch').exists()
+
+
+@pytest.mark.django_db
+def test_validate_equipment_dry_run(client, create_user, create_equipment):
+    """Проверка без записи отдаёт те же ошибки, что и создание."""
+    client.force_login(create_user)
+    data = {
+        'serial_number': ['D3BCDEF2GF', 'A1BCDEF2GF', 'A1BCDEF2GF',
+                          'bad', 'A5BCDEF2GF'],
+        'type': create_equipment.type.id,
+    }
+    type_cache.all()
+    # Сессия, пользователь, занятые номера и резервы номеров.
+    with query_budget(4):
+        response = client.post(reverse('equipment-validate'), data,
+                               content_type='application/json')
+    created = client.post(reverse('equipment-list'),
+                          {**data, 'notation': 'batch'},
+                          content_type='application/json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['valid'] is False
+    assert response.data['errors'] == created.data
+    assert Equipment.objects.count() == 1
+
+    data['serial_number'] = [f'A{i}BCDEF2GF' for i in range(5, 10)]
+    response = client.post(reverse('equipment-validate'), data,
+                           content_type='application/json')
+    assert response.data == {'valid': True, 'errors': {}}
+    assert Equipment.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_lookup_equipment_by_serial_numbers(client, create_user,
+                                            create_equipment_list):
+    """Поиск по списку номеров: число запросов зависит от числа частей."""
+    client.force_login(create_user)
+    url = reverse('equipment-lookup')
+    serials = ['A3BCDEF2GF', 'missing', 'A2BCDEF2GF', 'A3BCDEF2GF']
+    type_cache.all()
+    with query_budget(3):
+        response = client.post(url, {'serial_numbers': serials},
+                               content_type='application/json')
+
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert list(data['found']) == ['A3BCDEF2GF', 'A2BCDEF2GF']
+    equipment = Equipment.objects.get(serial_number='A2BCDEF2GF')
+    assert data['found']['A2BCDEF2GF'] == {
+        'id': equipment.id, 'serial_number': 'A2BCDEF2GF',
+        'type': client.get(reverse('equipment-type-list')).json()[
+            'results'][0],
+        'notation': equipment.notation}
+    assert data['missing'] == ['missing']
+
+    assert client.post(url, {'serial_numbers': []},
+                       content_type='application/json').status_code \
+        == status.HTTP_400_BAD_REQUEST
+
+
 @pytest.mark.django_db
 def test_create_equipment_negative(client, create_user, create_equipment_type):
     """Тестирование создания записи equipment. Негативный исход."""
@@ -98,6 +597,48 @@ def test_create_equipment_negative(client, create_user, create_equipment_type):
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
+@pytest.mark.django_db
+def test_import_equipment_upload(client, create_user, create_equipment_type):
+    """Импорт оборудования из загруженного NDJSON файла."""
+    client.force_login(create_user)
+    type_id = create_equipment_type.id
+    content = (
+        f'{{"type": {type_id}, "serial_number": "A2BCDEF2GF", "notation": "n"}}\n'  # noqa
+        f'{{"type": {type_id}, "serial_number": "bad", "notation": "n"}}\n'
+    ).encode()
+    upload = SimpleUploadedFile("equipment.ndjson", content)
+
+    response = client.post(reverse('equipment-import'), {'file': upload})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["created"] == 1
+    assert response.data["errors"][0]["row"] == 2
+    assert Equipment.objects.filter(serial_number="A2BCDEF2GF").exists()
+
+
+@pytest.mark.django_db
+def test_export_equipment(client, create_user, create_equipment_list,
+                          settings):
+    """Потоковая выгрузка NDJSON и CSV с поиском."""
+    settings.EQUIPMENT_EXPORT_CHUNK_SIZE = 1
+    client.force_login(create_user)
+    url = reverse('equipment-export')
+
+    response = client.get(url)
+    rows = [json.loads(line) for line in
+            b"".join(response.streaming_content).decode().splitlines()]
+    assert [row["serial_number"] for row in rows] == ["A2BCDEF2GF",
+                                                      "A3BCDEF2GF"]
+    assert rows[0]["type_name"] == "Type1"
+
+    response = client.get(url, {'export_format': 'csv',
+                                'search': 'A3BCDEF2GF'})
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    assert response["Content-Type"] == "text/csv"
+    assert lines[0].startswith("id,serial_number,notation,type")
+    assert len(lines) == 2 and "A3BCDEF2GF" in lines[1]
+
+
 @pytest.mark.django_db
 def test_update_equipment_positive(client, create_user, create_equipment):
     """Тестирование изменения записи equipment. Положительный исход."""
@@ -113,6 +654,23 @@ def test_update_equipment_positive(client, create_user, create_equipment):
     assert response.data['notation'] == 'updated notation'
 
 
+@pytest.mark.django_db
+def test_update_equipment_keeps_serial(client, create_user, create_equipment):
+    """Изменение записи с тем же серийным номером сохраняет его строкой."""
+    client.force_login(create_user)
+    url = reverse('equipment-detail', args=[create_equipment.id])
+    data = {
+        'serial_number': [create_equipment.serial_number],
+        'type': create_equipment.type.id,
+        'notation': 'same serial'
+    }
+    response = client.put(url, data, content_type='application/json')
+
+    assert response.status_code == status.HTTP_200_OK
+    create_equipment.refresh_from_db()
+    assert create_equipment.serial_number == 'D3BCDEF2GF'
+
+
 @pytest.mark.django_db
 def test_delete_equipment_positive(client, create_user, create_equipment):
     """Тестирование удаления записи equipment. Положительный исход."""
@@ -123,6 +681,62 @@ def test_delete_equipment_positive(client, create_user, create_equipment):
     assert not Equipment.objects.filter(id=create_equipment.id).exists()
 
 
+@pytest.mark.django_db
+def test_bulk_update_equipment(client, create_user, create_equipment_list):
+    """Пакетное изменение: смена типа с проверкой маски по всем номерам."""
+    client.force_login(create_user)
+    digits = EquipmentType.objects.create(name='Digits',
+                                          serial_number_mask='NNNN')
+    numeric = Equipment.objects.create(type=digits, serial_number='1234',
+                                       notation='n')
+    ids = list(Equipment.objects.order_by('id').values_list('id', flat=True))
+    url = reverse('equipment-bulk')
+
+    response = client.patch(url, {'ids': ids + [999999], 'type': digits.id,
+                                  'notation': 'moved'},
+                            content_type='application/json')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["updated"] == 1
+    assert set(response.data["errors"]) == {ids[0], ids[1], 999999}
+    assert "does not match" in response.data["errors"][ids[0]]
+    numeric.refresh_from_db()
+    assert numeric.notation == 'moved'
+    assert Equipment.objects.filter(notation='moved').count() == 1
+
+
+@pytest.mark.django_db
+def test_bulk_update_equipment_by_search(client, create_user,
+                                         create_equipment_list):
+    """Пакетное изменение по параметрам поиска."""
+    client.force_login(create_user)
+    url = reverse('equipment-bulk') + '?search=A3BCDEF2GF'
+
+    response = client.patch(url, {'notation': 'found'},
+                            content_type='application/json')
+
+    assert response.data["updated"] == 1
+    assert Equipment.objects.get(serial_number='A3BCDEF2GF').notation \
+        == 'found'
+
+
+@pytest.mark.django_db
+def test_bulk_delete_equipment(client, create_user, create_equipment_list):
+    """Пакетное удаление по id и отказ без условий выбора."""
+    client.force_login(create_user)
+    url = reverse('equipment-bulk')
+    ids = list(Equipment.objects.values_list('id', flat=True))
+
+    response = client.delete(url, {}, content_type='application/json')
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.delete(url, {'ids': ids + [999999]},
+                             content_type='application/json')
+    assert response.data == {"deleted": 2, "errors": {999999: "Not found."}}
+    assert not Equipment.objects.exists()
+    assert not SerialNumberTrigram.objects.exists()
+
+
 @pytest.mark.django_db
 def test_get_equipment_type_list(client, create_user):
     """Тестирование получения списка EquipmentType. Положительный исход."""
@@ -134,3 +748,559 @@ def test_get_equipment_type_list(client, create_user):
 
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 2
+
+
+@pytest.mark.django_db
+def test_get_equipment_type_list_cached(client, create_user,
+                                        create_equipment_type):
+    """Список типов читается из кэша, сохранение типа сбрасывает кэш."""
+    client.force_login(create_user)
+    url = reverse('equipment-type-list')
+    client.get(url)
+    hits = type_cache.hits
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert not any("api_equipmenttype" in query["sql"] for query in queries)
+    assert response.data["results"][0]["name"] == "Type1"
+    assert type_cache.hits > hits
+
+    create_equipment_type.name = "Renamed"
+    create_equipment_type.save()
+    response = client.get(url)
+    assert response.data["results"][0]["name"] == "Renamed"
+
+
+@pytest.mark.django_db
+def test_type_cache_miss_reads_database(client, create_user,
+                                        create_equipment_type):
+    """Тип, созданный в обход сигналов, находится через БД."""
+    client.force_login(create_user)
+    type_cache.all()
+    new_type, = EquipmentType.objects.bulk_create(
+        [EquipmentType(name="Other process", serial_number_mask="NNNN")])
+    if new_type.pk is None:
+        new_type = EquipmentType.objects.get(name="Other process")
+
+    assert type_cache.get(new_type.pk).name == "Other process"
+    assert type_cache.get(new_type.pk + 1000) is None
+    response = client.post(reverse('equipment-list'),
+                           {"type": new_type.pk, "notation": "new",
+                            "serial_number": ["1234"]},
+                           content_type="application/json")
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_type_cache_counters_threads(create_equipment_type):
+    """Счётчики кэша типов не теряют обращения из разных потоков."""
+    type_cache.all()
+    before = type_cache.stats()
+
+    def read():
+        for _ in range(1000):
+            type_cache.all()
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    after = type_cache.stats()
+    assert (after["hits"] + after["misses"]) \
+        - (before["hits"] + before["misses"]) == 8000
+
+
+
+@pytest.mark.django_db
+def test_type_cache_version_expires(settings):
+    """Версия кэша типов хранится не дольше EQUIPMENT_TYPE_VERSION_TTL."""
+    type_cache.cache.delete(type_cache.version_key)
+    settings.EQUIPMENT_TYPE_VERSION_TTL = 0
+    type_cache.version()
+    assert type_cache.cache.get(type_cache.version_key) is None
+
+
+@pytest.mark.django_db
+def test_search_equipment_type(client, create_user):
+    """Поиск EquipmentType: точное совпадение имени выше подстроки."""
+    client.force_login(create_user)
+    EquipmentType.objects.create(name="Router Big", serial_number_mask="N")
+    EquipmentType.objects.create(name="Router", serial_number_mask="N")
+    EquipmentType.objects.create(name="Switch", serial_number_mask="NNA")
+
+    response = client.get(reverse('equipment-type-list'), {'search': 'router'})
+    assert [item["name"] for item in response.data["results"]] == [
+        "Router", "Router Big"]
+
+    response = client.get(reverse('equipment-type-list'), {'search': 'nna'})
+    assert [item["name"] for item in response.data["results"]] == ["Switch"]
+
+
+@pytest.mark.django_db
+def test_get_equipment_type_list_keyset(client, create_user):
+    """Keyset пагинация списка EquipmentType."""
+    client.force_login(create_user)
+    url = reverse('equipment-type-list')
+    for i in range(3):
+        EquipmentType.objects.create(name=f"Type {i}", serial_number_mask="N")
+
+    response = client.get(url, {'pagination': 'cursor', 'page_size': 2})
+    assert [item["name"] for item in response.data["results"]] == [
+        "Type 0", "Type 1"]
+
+    response = client.get(response.data["next"])
+    assert [item["name"] for item in response.data["results"]] == ["Type 2"]
+
+
+@pytest.fixture
+def async_client(create_user):
+    """Асинхронный клиент с авторизованным пользователем."""
+    client = AsyncClient()
+    async_to_sync(client.aforce_login)(create_user)
+    return client
+
+
+@pytest.mark.django_db
+def test_async_equipment_list_matches_sync(client, async_client, create_user,
+                                           create_equipment_list):
+    """Асинхронный список совпадает с синхронным, включая поиск."""
+    client.force_login(create_user)
+    for params in ({}, {'search': 'A2BC'}):
+        expected = client.get(reverse('equipment-list'), params).json()
+        response = async_to_sync(async_client.get)(
+            reverse('async-equipment-list'), params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == expected
+
+
+@pytest.mark.django_db
+def test_async_equipment_crud(async_client, create_equipment_type):
+    """Создание, изменение и удаление через асинхронные представления."""
+    response = async_to_sync(async_client.post)(
+        reverse('async-equipment-list'),
+        {"type": create_equipment_type.id, "notation": "test",
+         "serial_number": ["A2BCDEF2GF", "A3BCDEF2GF"]},
+        content_type="application/json")
+    assert response.status_code == status.HTTP_201_CREATED
+    pk = response.json()[0]["id"]
+    assert SerialNumberTrigram.objects.filter(equipment_id=pk).exists()
+
+    url = reverse('async-equipment-detail', args=[pk])
+    response = async_to_sync(async_client.patch)(
+        url, {"serial_number": ["A4BCDEF2GF"]},
+        content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+    assert Equipment.objects.get(pk=pk).serial_number == "A4BCDEF2GF"
+
+    response = async_to_sync(async_client.get)(url)
+    assert response.json()["serial_numbers"] == ["A4BCDEF2GF", "A3BCDEF2GF"]
+
+    response = async_to_sync(async_client.delete)(url)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not Equipment.objects.filter(pk=pk).exists()
+    response = async_to_sync(async_client.get)(url)
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_async_equipment_validation_matches_sync(client, async_client,
+                                                 create_user,
+                                                 create_equipment):
+    """Ошибки проверки асинхронного создания совпадают с синхронными."""
+    client.force_login(create_user)
+    payload = {"type": create_equipment.type_id, "notation": "test",
+               "serial_number": ["D3BCDEF2GF", "bad", "A2BCDEF2GF",
+                                 "A2BCDEF2GF"]}
+    expected = client.post(reverse('equipment-list'), payload,
+                           content_type="application/json")
+    response = async_to_sync(async_client.post)(
+        reverse('async-equipment-list'), payload,
+        content_type="application/json")
+    assert response.status_code == expected.status_code == 400
+    assert response.json() == expected.json()
+
+    response = async_to_sync(async_client.post)(
+        reverse('async-equipment-list'), {"type": 999},
+        content_type="application/json")
+    assert set(response.json()) == {"type", "notation", "serial_number"}
+
+
+@pytest.mark.django_db
+def test_async_update_errors_match_sync(client, async_client, create_user,
+                                        create_equipment_list):
+    """Ошибки асинхронного изменения совпадают с синхронными."""
+    client.force_login(create_user)
+    first, second = Equipment.objects.order_by('id')
+    payload = {"serial_number": [second.serial_number]}
+    expected = client.patch(reverse('equipment-detail', args=[first.pk]),
+                            payload, content_type="application/json")
+    response = async_to_sync(async_client.patch)(
+        reverse('async-equipment-detail', args=[first.pk]), payload,
+        content_type="application/json")
+    assert response.status_code == expected.status_code == 400
+    assert response.json() == expected.json()
+
+    response = async_to_sync(async_client.patch)(
+        reverse('async-equipment-detail', args=[first.pk]), "{",
+        content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_async_views_reject_unsupported(async_client, create_equipment_list):
+    """Параметры только синхронных представлений дают 400."""
+    url = reverse('async-equipment-list')
+    for params in ({"fields": "id"}, {"page_size": 1},
+                   {"pagination": "cursor"}, {"include_archive": 1}):
+        response = async_to_sync(async_client.get)(url, params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert list(params)[0] in response.json()["detail"]
+
+    response = async_to_sync(async_client.get)(
+        url, headers={"If-None-Match": '"etag"'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_async_views_require_authentication(create_equipment_list):
+    """Без аутентификации асинхронные представления отвечают 401."""
+    response = async_to_sync(AsyncClient().get)(
+        reverse('async-equipment-list'))
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_async_equipment_list_jwt(create_user, create_equipment_list):
+    """Асинхронный список доступен по JWT токену."""
+    response = async_to_sync(AsyncClient().get)(
+        reverse('async-equipment-list'), headers=jwt_headers(create_user))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["count"] == 2
+
+
+@pytest.mark.django_db
+def test_async_equipment_type_list(client, async_client, create_user,
+                                   create_equipment_type):
+    """Асинхронный список типов совпадает с синхронным."""
+    client.force_login(create_user)
+    for params in ({}, {'search': 'type'}):
+        expected = client.get(reverse('equipment-type-list'), params).json()
+        response = async_to_sync(async_client.get)(
+            reverse('async-equipment-type-list'), params)
+        assert response.json() == expected
+
+
+@pytest.mark.django_db(transaction=True, databases="__all__")
+def test_compare_view_concurrency(create_user, create_equipment_list,
+                                  capsys):
+    """Команда сравнения выполняет запросы к обоим представлениям."""
+    call_command('compare_view_concurrency', username=create_user.username,
+                 requests=4, concurrency=2)
+    output = capsys.readouterr().out
+    assert "sync: 4 requests" in output
+    assert "async: 4 requests" in output
+    assert "0 failed" in output
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("route, method", sorted(QUERY_BUDGETS))
+def test_query_budget(client, create_user, create_equipment, route, method):
+    """Число SQL запросов endpoint-ов не превышает бюджет."""
+    client.force_login(create_user)
+    args = [create_equipment.id] if route == "equipment-detail" else []
+    type_cache.all()
+    equipment_version.current()
+
+    with query_budget(QUERY_BUDGETS[(route, method)]):
+        response = client.generic(method, reverse(route, args=args))
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint(client, create_user, create_equipment_list,
+                          settings):
+    """Метрики запросов выводятся в формате Prometheus."""
+    settings.EQUIPMENT_SERVER_TIMING = True
+    registry.clear()
+    client.force_login(create_user)
+    response = client.get(reverse('equipment-list'))
+    assert response["Server-Timing"].startswith("db;dur=")
+
+    response = client.get(reverse('metrics'))
+    assert response.status_code == status.HTTP_200_OK
+    body = response.content.decode()
+    labels = 'route="equipment-list",method="GET",status="200"'
+    assert f'equipment_http_request_duration_seconds_count{{{labels}}} 1' in body  # noqa
+    assert f'equipment_http_request_queries_bucket{{{labels},le="+Inf"}} 1' in body  # noqa
+    assert f'equipment_http_request_serialize_seconds_count{{{labels}}} 1' in body  # noqa
+
+    settings.EQUIPMENT_METRICS_TOKEN = "secret"
+    assert client.get(reverse('metrics')).status_code == 401
+    response = client.get(reverse('metrics'),
+                          headers={"Authorization": "Bearer secret"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_metrics_async_stack(async_client, create_equipment_list):
+    """Под ASGI метрики собираются без переноса запроса в пул потоков."""
+    async def get_response(request):
+        return HttpResponse()
+    assert iscoroutinefunction(PerformanceMiddleware(get_response))
+
+    registry.clear()
+    response = async_to_sync(async_client.get)(
+        reverse('async-equipment-list'))
+    assert response.status_code == status.HTTP_200_OK
+    histogram = registry.histograms["queries"][
+        ("async-equipment-list", "GET", 200)]
+    assert histogram.count == 1 and histogram.sum > 0
+
+
+@pytest.mark.django_db
+def test_slow_request_log(client, create_user, create_equipment, settings,
+                          caplog):
+    """Медленный запрос пишется в журнал вместе с SQL."""
+    settings.EQUIPMENT_SLOW_REQUEST_MS = 0.001
+    client.force_login(create_user)
+    with caplog.at_level("WARNING", logger="api.performance"):
+        client.get(reverse('equipment-detail', args=[create_equipment.id]))
+    assert "Slow request GET" in caplog.text
+    assert "api_equipment" in caplog.text
+
+
+def jwt_headers(user) -> dict:
+    """Заголовок Authorization с access токеном пользователя."""
+    return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+
+@pytest.mark.django_db
+def test_jwt_user_cached(client, create_user, create_equipment_list):
+    """Пользователь JWT загружается из БД один раз, затем из кэша."""
+    url = reverse('equipment-list')
+    headers = jwt_headers(create_user)
+    client.get(url, headers=headers)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert not any("auth_user" in query["sql"] for query in queries)
+
+    cached = caches[settings.EQUIPMENT_AUTH_CACHE_ALIAS].get(
+        user_cache_key(create_user.pk))
+    assert cached == {"id": create_user.pk, "username": create_user.username,
+                      "is_active": True, "is_staff": False}
+    user = CachedJWTAuthentication().cached_user(cached)
+    user.save()
+    assert User.objects.get(pk=create_user.pk).check_password("12345678")
+
+    create_user.is_active = False
+    create_user.save()
+    response = client.get(url, headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_jwt_stateless_user(client, create_user, create_equipment_list,
+                            settings):
+    """Пользователь из полей токена не требует запросов к auth_user."""
+    settings.EQUIPMENT_JWT_STATELESS_USER = True
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('equipment-list'),
+                              headers=jwt_headers(create_user))
+    assert response.status_code == status.HTTP_200_OK
+    assert not any("auth_user" in query["sql"] for query in queries)
+
+
+@pytest.fixture
+def serializer_read(monkeypatch):
+    """Выключить быстрый путь чтения и FastJSONRenderer в представлениях."""
+    def disable():
+        for view in (EquipmentList, EquipmentDetail, EquipmentTypeList):
+            monkeypatch.setattr(view, "fast_read", False)
+            monkeypatch.setattr(view, "renderer_classes",
+                                [JSONRenderer, BrowsableAPIRenderer])
+    return disable
+
+
+@pytest.mark.django_db
+def test_fast_read_matches_serializers(client, create_user,
+                                       create_equipment_type,
+                                       serializer_read):
+    """Быстрый путь чтения отдаёт те же байты, что и сериалайзеры."""
+    client.force_login(create_user)
+    EquipmentType.objects.create(name="Тип \u2028 №2", serial_number_mask="N")
+    for index, notation in enumerate(["test", "примечание \u2029", "test"]):
+        Equipment.objects.create(type=create_equipment_type,
+                                 serial_number=f"A{index}BCDEF2GF",
+                                 notation=notation)
+    pk = Equipment.objects.order_by('id').first().pk
+    requests = [
+        (reverse('equipment-list'), {}),
+        (reverse('equipment-list'), {'page': 2}),
+        (reverse('equipment-list'), {'search': 'A1BC'}),
+        (reverse('equipment-list'), {'pagination': 'cursor', 'page_size': 2}),
+        (reverse('equipment-detail', args=[pk]), {}),
+        (reverse('equipment-detail', args=[pk + 100]), {}),
+        (reverse('equipment-type-list'), {}),
+        (reverse('equipment-type-list'), {'search': 'тип'}),
+        (reverse('equipment-type-list'), {'pagination': 'cursor'}),
+        (reverse('equipment-list'), {'fields': 'serial_number,id'}),
+        (reverse('equipment-list'), {'fields': 'id,type,serial_numbers'}),
+        (reverse('equipment-list'), {'expand': 'type', 'search': 'A1BC'}),
+        (reverse('equipment-list'), {'fields': 'id', 'expand': 'type'}),
+        (reverse('equipment-list'), {'fields': 'bogus'}),
+        (reverse('equipment-detail', args=[pk]), {'expand': ''}),
+        (reverse('equipment-type-list'), {'fields': 'name,id'}),
+        (reverse('equipment-type-list'), {'fields': 'id', 'search': 'тип'}),
+    ]
+    fast = [client.get(url, params) for url, params in requests]
+    serializer_read()
+    slow = [client.get(url, params) for url, params in requests]
+
+    for fast_response, slow_response in zip(fast, slow):
+        assert fast_response.status_code == slow_response.status_code
+        assert fast_response.content == slow_response.content
+        assert fast_response.get("ETag") == slow_response.get("ETag")
+
+
+@pytest.mark.django_db
+def test_sparse_fieldsets(client, create_user, create_equipment_type):
+    """?fields= и ?expand= выбирают поля, невыбранные не вычисляются."""
+    client.force_login(create_user)
+    for index in range(3):
+        Equipment.objects.create(type=create_equipment_type,
+                                 serial_number=f"A{index}BCDEF2GF",
+                                 notation="test")
+    url = reverse('equipment-list')
+
+    with CaptureQueriesContext(connection) as full:
+        item = client.get(url).data["results"][0]
+    assert list(item) == ["id", "serial_numbers", "type", "notation"]
+
+    with CaptureQueriesContext(connection) as sparse:
+        response = client.get(url, {'fields': 'id,serial_number'})
+    assert response.data["results"][0] == {
+        "id": item["id"], "serial_number": "A0BCDEF2GF"}
+    assert len(sparse.captured_queries) < len(full.captured_queries)
+    assert not any('"notation" IN' in query["sql"]
+                   for query in sparse.captured_queries)
+
+    item = client.get(url, {'expand': 'type'}).data["results"][0]
+    assert list(item) == ["id", "type", "notation"]
+    assert item["type"]["name"] == "Type1"
+    item = client.get(url, {'fields': 'type,serial_numbers'}).data[
+        "results"][0]
+    assert item == {"type": create_equipment_type.id,
+                    "serial_numbers": ["A0BCDEF2GF", "A1BCDEF2GF",
+                                       "A2BCDEF2GF"]}
+
+    response = client.get(url, {'fields': 'id,secret'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "secret" in response.data["fields"][0]
+    response = client.get(url, {'expand': 'notation'})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    detail = reverse('equipment-detail',
+                     args=[Equipment.objects.order_by('id')[0].id])
+    full_etag = client.get(detail)["ETag"]
+    response = client.get(detail, {'fields': 'serial_number'})
+    assert response.data == {"serial_number": "A0BCDEF2GF"}
+    assert response["ETag"] != full_etag
+    assert client.get(detail, {'fields': 'serial_number'},
+                      HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+
+    types = client.get(reverse('equipment-type-list'),
+                       {'fields': 'name'}).data["results"]
+    assert types == [{"name": "Type1"}]
+    assert client.get(reverse('equipment-type-list')).data["results"][0][
+        "serial_number_mask"] == "XXAAAAAXAA"
+
+
+@pytest.mark.django_db
+def test_compressed_responses(client, create_user, create_equipment_list,
+                              settings):
+    """Большие ответы сжимаются gzip, маленькие отдаются как есть."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    plain = client.get(url)
+
+    settings.EQUIPMENT_COMPRESS_MIN_BYTES = 10
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=1, br;q=0')
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain.content
+    assert response["ETag"] == "W/" + plain["ETag"]
+
+    equipment = Equipment.objects.order_by('id')[0]
+    Equipment.objects.filter(pk=equipment.pk).update(notation="x" * 300)
+    detail = reverse('equipment-detail', args=[equipment.pk])
+    weak_etag = client.get(detail, HTTP_ACCEPT_ENCODING='gzip')["ETag"]
+    assert weak_etag.startswith("W/")
+    response = client.patch(detail, {'notation': 'changed'},
+                            content_type='application/json',
+                            HTTP_IF_MATCH=weak_etag)
+    assert response.status_code == status.HTTP_412_PRECONDITION_FAILED
+    response = client.patch(detail, {'notation': 'changed'},
+                            content_type='application/json',
+                            HTTP_IF_MATCH=weak_etag[2:])
+    assert response.status_code == status.HTTP_200_OK
+
+    settings.EQUIPMENT_COMPRESS_MIN_BYTES = len(client.get(url).content) + 1
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+    assert not response.has_header("Content-Encoding")
+
+
+@pytest.mark.django_db
+def test_brotli_responses(client, create_user, create_equipment_list,
+                          settings):
+    """Brotli выбирается по Accept-Encoding."""
+    client.force_login(create_user)
+    url = reverse('equipment-list')
+    plain = client.get(url)
+
+    settings.EQUIPMENT_COMPRESS_MIN_BYTES = 10
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, br')
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == plain.content
+
+
+def test_fast_json_renderer_matches_json_renderer():
+    """FastJSONRenderer кодирует значения так же, как JSONRenderer."""
+    data = {
+        "text": "a\x00\x1f\x7f é \u2028 \u2029 \"/\\",
+        "numbers": [0, -1, 2 ** 63 - 1],
+        "date": datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+        "day": date(2024, 1, 2),
+        "decimal": Decimal("1.50"),
+        "uuid": uuid.UUID(int=1),
+        "nested": [{"a": None, "b": True}],
+    }
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    big = {"number": 2 ** 70}
+    assert FastJSONRenderer().render(big) == JSONRenderer().render(big)
+    assert FastJSONRenderer().render(
+        data, "application/json; indent=4") == JSONRenderer().render(
+        data, "application/json; indent=4")
+
+
+def test_fast_json_renderer_uses_orjson(monkeypatch):
+    """Ответ кодирует orjson, без него - JSONRenderer."""
+    calls = []
+    orjson_dumps = orjson.dumps
+
+    def dumps(*args, **kwargs):
+        calls.append(args)
+        return orjson_dumps(*args, **kwargs)
+
+    data = {"serial_numbers": ["0001", "0002"], "count": 2}
+    monkeypatch.setattr(renderers.orjson, "dumps", dumps)
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert len(calls) == 1
+
+    monkeypatch.setattr(renderers, "orjson", None)
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    assert len(calls) == 1
@@ -0,0 +1,38 @@
+"""
+Помощники для тестов.
+    QUERY_BUDGETS: допустимое число SQL запросов по маршрутам API.
+    query_budget: проверка числа SQL запросов участка кода.
+"""
+from contextlib import contextmanager
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+# Бюджеты рассчитаны на запрос аутентифицированного по сессии
+# пользователя с прогретым кэшем типов: 2 запроса занимают сессия и
+# пользователь, список оборудования читает версию таблицы.
+QUERY_BUDGETS = {
+    ("equipment-list", "GET"): 6,
+    ("equipment-detail", "GET"): 5,
+    ("equipment-type-list", "GET"): 2,
+}
+
+
+@contextmanager
+def query_budget(budget: int, using: str = "default"):
+    """
+    Проверить, что участок кода выполнил не больше budget SQL запросов.
+
+    В сообщении об ошибке перечисляются все выполненные запросы.
+
+    args:
+        budget: допустимое число запросов.
+        using: алиас базы данных.
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    assert executed <= budget, (
+        f"{executed} queries executed, budget is {budget}:\n" + "\n".join(
+            f"{index}. {query['sql']}" for index, query
+            in enumerate(context.captured_queries, start=1)))
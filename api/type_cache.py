@@ -0,0 +1,135 @@
+"""
+Модуль кэша типов оборудования.
+    EquipmentTypeCache: кэш таблицы EquipmentType с версионным сбросом.
+    type_cache: общий экземпляр кэша.
+
+Таблица EquipmentType мала и почти не меняется, поэтому она целиком
+хранится в памяти процесса. Актуальность проверяется по номеру версии
+в кэше Django (CACHES[EQUIPMENT_TYPE_CACHE_ALIAS]): сигналы post_save и
+post_delete увеличивают версию, и все процессы, использующие общий
+кэш, перечитывают таблицу при следующем обращении. Начальная версия
+берётся из текущего времени, чтобы после очистки кэша Django номер
+версии не повторял уже выданный.
+
+Версия живёт EQUIPMENT_TYPE_VERSION_TTL секунд: с кэшем в памяти
+процесса (LocMemCache) сброс в одном процессе не виден другим, и срок
+жизни версии ограничивает время, в течение которого они работают со
+старыми типами. Тип, которого нет в кэше, ищется в БД.
+"""
+import threading
+import time
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+
+from api.models import EquipmentType
+
+
+class EquipmentTypeCache:
+    """Кэш объектов EquipmentType в памяти процесса."""
+    version_key = 'equipment-type:version'
+    data_key = 'equipment-type:data:{version}'
+
+    def __init__(self):
+        self._version = None
+        self._types = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        """Кэш Django, в котором хранится версия и данные таблицы."""
+        return caches[settings.EQUIPMENT_TYPE_CACHE_ALIAS]
+
+    def version(self) -> int:
+        """Текущая версия таблицы типов."""
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, time.time_ns(),
+                           timeout=settings.EQUIPMENT_TYPE_VERSION_TTL)
+            version = self.cache.get(self.version_key)
+        return version
+
+    def all(self) -> dict:
+        """Все типы оборудования в виде {id: EquipmentType}."""
+        version = self.version()
+        with self._lock:
+            if version == self._version:
+                self.hits += 1
+                return self._types
+            self.misses += 1
+
+        data_key = self.data_key.format(version=version)
+        types = self.cache.get(data_key)
+        if types is None:
+            # Таблица читается с основной БД: данные реплики могли
+            # отстать от новой версии.
+            types = list(EquipmentType.objects.using(
+                router.db_for_write(EquipmentType)).order_by('id'))
+            self.cache.set(data_key, types,
+                           timeout=settings.EQUIPMENT_TYPE_CACHE_TTL)
+        with self._lock:
+            self._types = {item.pk: item for item in types}
+            self._version = version
+        return self._types
+
+    async def aall(self) -> dict:
+        """Асинхронная версия all: БД читается только при смене версии."""
+        version = await self.cache.aget(self.version_key)
+        if version is not None:
+            with self._lock:
+                if version == self._version:
+                    self.hits += 1
+                    return self._types
+        return await sync_to_async(self.all)()
+
+    def get(self, pk) -> Optional[EquipmentType]:
+        """
+        Получить тип оборудования по первичному ключу.
+
+        Если типа нет в кэше, он ищется в основной БД: его мог создать
+        другой процесс. Найденный тип сбрасывает кэш.
+
+        args:
+            pk: id типа оборудования.
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        equipment_type = self.all().get(pk)
+        if equipment_type is not None:
+            return equipment_type
+        equipment_type = EquipmentType.objects.using(
+            router.db_for_write(EquipmentType)).filter(pk=pk).first()
+        if equipment_type is not None:
+            self.invalidate()
+        return equipment_type
+
+    def list(self) -> list:
+        """Все типы оборудования, упорядоченные по id."""
+        return list(self.all().values())
+
+    def invalidate(self) -> None:
+        """Увеличить версию таблицы типов."""
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.add(self.version_key, time.time_ns(),
+                           timeout=settings.EQUIPMENT_TYPE_VERSION_TTL)
+        with self._lock:
+            self._version = None
+            self._types = {}
+
+    def stats(self) -> dict:
+        """Счётчики попаданий и промахов кэша."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "version": self._version}
+
+
+type_cache = EquipmentTypeCache()
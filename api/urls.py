@@ -3,12 +3,42 @@
 """
 from django.urls import path
 
-from api.views import EquipmentList, EquipmentDetail, EquipmentTypeList
+from api.async_views import (AsyncEquipmentList, AsyncEquipmentDetail,
+                             AsyncEquipmentTypeList)
+from api.views import (EquipmentList, EquipmentDetail, EquipmentTypeList,
+                       EquipmentUpload, EquipmentExport, EquipmentBulk,
+                       EquipmentStats, EquipmentJobDetail,
+                       EquipmentTypeAllocate, EquipmentChanges,
+                       EquipmentValidate, EquipmentLookup)
 
 urlpatterns = [
     path("equipment/", EquipmentList.as_view(), name='equipment-list'),
+    path("equipment/import/", EquipmentUpload.as_view(),
+         name='equipment-import'),
+    path("equipment/export/", EquipmentExport.as_view(),
+         name='equipment-export'),
+    path("equipment/bulk/", EquipmentBulk.as_view(),
+         name='equipment-bulk'),
+    path("equipment/stats/", EquipmentStats.as_view(),
+         name='equipment-stats'),
+    path("equipment/jobs/<int:pk>/", EquipmentJobDetail.as_view(),
+         name='equipment-job'),
+    path("equipment/changes/", EquipmentChanges.as_view(),
+         name='equipment-changes'),
+    path("equipment/validate/", EquipmentValidate.as_view(),
+         name='equipment-validate'),
+    path("equipment/lookup/", EquipmentLookup.as_view(),
+         name='equipment-lookup'),
     path("equipment/<int:pk>/", EquipmentDetail.as_view(),
          name='equipment-detail'),
     path("equipment-type/", EquipmentTypeList.as_view(),
-         name='equipment-type-list')
+         name='equipment-type-list'),
+    path("equipment-type/<int:pk>/allocate/", EquipmentTypeAllocate.as_view(),
+         name='equipment-type-allocate'),
+    path("async/equipment/", AsyncEquipmentList.as_view(),
+         name='async-equipment-list'),
+    path("async/equipment/<int:pk>/", AsyncEquipmentDetail.as_view(),
+         name='async-equipment-detail'),
+    path("async/equipment-type/", AsyncEquipmentTypeList.as_view(),
+         name='async-equipment-type-list')
 ]
\ No newline at end of file
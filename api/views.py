@@ -3,20 +3,69 @@
     EquipmentList: Создание и получение объектов Equipment.
     EquipmentDetail: Детальная обработка объектов Equipment.
     EquipmentTypeList: Получения списка объектов EquipmentType.
+    EquipmentUpload: Потоковый импорт объектов Equipment из файла.
+    EquipmentExport: Потоковая выгрузка объектов Equipment.
+    EquipmentBulk: Пакетное изменение и удаление объектов Equipment.
+    EquipmentStats: Число объектов Equipment по типам и примечаниям.
+    EquipmentJobDetail: Состояние задачи создания объектов Equipment.
+    EquipmentTypeAllocate: Выдача свободных серийных номеров типа.
+    EquipmentChanges: Журнал изменений для синхронизации клиентов.
+    EquipmentValidate: Проверка серийных номеров без создания объектов.
+    EquipmentLookup: Поиск объектов Equipment по списку серийных номеров.
 """
+import io
+import os
+
+from django.conf import settings
+from django.db.models import Case, Count, Max, Subquery, When
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 
-from rest_framework import filters
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from api.models import Equipment, EquipmentType
+from api.allocator import SerialSpaceExhausted, allocate_serial_numbers
+from api.archive import ARCHIVE_PARAM, include_archive
+from api.bulk import (delete_equipment, rows_by_serial_number,
+                      serial_number_errors, serial_numbers_by_id,
+                      update_equipment)
+from api.changes import ChangesGone, changes_since, latest_cursor
+from api.conditional import (ConditionalMixin, archive_version,
+                             datetime_timestamp, equipment_version,
+                             make_etag, version_timestamp)
+from api.exporter import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, export_lines
+from api.fast_read import (FastReadMixin, equipment_representations,
+                           equipment_row_fields, select_fields,
+                           type_representation, type_representations)
+from api.fieldsets import (EQUIPMENT_FIELDSET, EQUIPMENT_LOOKUP_FIELDS,
+                           EQUIPMENT_TYPE_FIELDSET, SparseFieldsMixin)
+from api.importer import IMPORT_FORMATS, EquipmentImporter, read_rows
+from api.jobs import enqueue_job
+from api.masks import invalid_serial_numbers
+from api.models import (ArchivedEquipment, Equipment, EquipmentJob,
+                        EquipmentType)
+from api.pagination import EquipmentPagination
+from api.search import IndexedSearchFilter
+from api.stats import notation_stats, type_stats
+from api.type_cache import type_cache
 from api.serializers import (EquipmentSerializer, EquipmentTypeSerializer, 
-                             EquipmentGetSerializer)
+                             EquipmentGetSerializer,
+                             EquipmentCreatedSerializer,
+                             EquipmentJobCreateSerializer,
+                             EquipmentJobSerializer,
+                             EquipmentBulkDeleteSerializer,
+                             EquipmentBulkUpdateSerializer,
+                             EquipmentLookupSerializer,
+                             EquipmentValidateSerializer,
+                             SerialAllocationSerializer)
 
 
-class EquipmentList(generics.ListCreateAPIView):
+class EquipmentList(SparseFieldsMixin, FastReadMixin, ConditionalMixin,
+                    generics.ListCreateAPIView):
     """
     Представление для вывода и создания объектов Equipment.
     
@@ -24,39 +73,125 @@ class EquipmentList(generics.ListCreateAPIView):
         - ListCreateAPIView: Представление для перечисления набора запросов 
         или создания экземпляра модели.
     """
-    queryset = Equipment.objects.all()
+    queryset = Equipment.objects.order_by('id')
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['type__name', 'serial_number']
-    
+    read_from_replica = True
+    pagination_class = EquipmentPagination
+    filter_backends = [IndexedSearchFilter]
+    search_fields = ['type__name', 'serial_number', 'notation']
+    fieldset_spec = EQUIPMENT_FIELDSET
+
     def get_serializer_class(self):
         """Метод заменяет сериалайзер в зависимости от метода HTTP."""
         if self.request.method == 'GET':
             return EquipmentGetSerializer
         return EquipmentSerializer
 
+    def get_resource_state(self):
+        """
+        Валидаторы списка по версиям таблиц, без чтения строк. Список с
+        архивом зависит и от версии архива.
+        """
+        types = type_cache.list()
+        versions = [equipment_version.current()]
+        if include_archive(self.request):
+            versions.append(archive_version.current())
+        etag = make_etag('equipment-list', *versions, type_cache.version(),
+                         self.request.get_full_path(),
+                         self.request.accepted_renderer.format)
+        last_modified = max(
+            [version_timestamp(version) for version in versions]
+            + [datetime_timestamp(item.updated_at) for item in types])
+        return etag, last_modified
+
+    def list(self, request, *args, **kwargs):
+        """Список с поддержкой условных запросов."""
+        return self.handle_conditional(self.list_equipment, request,
+                                       *args, **kwargs)
+
+    def list_equipment(self, request, *args, **kwargs):
+        """Список оборудования, при fast_read - из строк values()."""
+        if include_archive(request):
+            return self.list_with_archive(request)
+        if not self.use_fast_read(request):
+            return super().list(request, *args, **kwargs)
+        fieldset = self.get_fieldset()
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.rows_response(
+            queryset.values(*equipment_row_fields(fieldset)),
+            lambda rows: equipment_representations(rows, fieldset))
+
+    def list_with_archive(self, request):
+        """
+        Список оборудования вместе с архивом (?include_archive=1).
+
+        Строки обеих таблиц объединяются одним запросом UNION и
+        упорядочиваются по id. Поиск в архиве выполняется без индексов,
+        keyset пагинация не поддерживается.
+
+        args:
+            request: запрос клиента.
+        """
+        if self.paginator is not None and self.paginator.is_keyset_request(
+                request):
+            raise ValidationError({ARCHIVE_PARAM: [
+                "Cursor pagination is not available with the archive."]})
+        fieldset = self.get_fieldset()
+        fields = equipment_row_fields(fieldset)
+        hot = self.filter_queryset(self.get_queryset())
+        archived = self.filter_queryset(ArchivedEquipment.objects.all())
+        rows = hot.order_by().values(*fields).union(
+            archived.order_by().values(*fields), all=True).order_by('id')
+        return self.rows_response(
+            rows, lambda page: equipment_representations(
+                page, fieldset, include_archive=True))
+
     def create(self, request, *args, **kwargs):
+        """Создание с проверкой If-Match."""
+        return self.handle_conditional(self.create_equipment, request,
+                                       *args, **kwargs)
+
+    def create_equipment(self, request, *args, **kwargs):
         """Переопределение метода create для обработки массива серийных номеров.""" # noqa
+        if request.query_params.get("job") in ("1", "true", "True"):
+            return self.create_job(request)
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
 
-        if isinstance(serializer.validated_data, list):
-            data = [self.get_serializer(instance).data for instance in
-                    serializer.validated_data]
-        else:
-            data = self.get_serializer(serializer.validated_data).data
-
+        data = EquipmentCreatedSerializer(serializer.instance, many=True).data
         headers = self.get_success_headers(data)
         return Response(data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def create_job(self, request):
+        """
+        Постановка создания в очередь (?job=1).
+
+        Проверяется только формат данных, ответ 202 содержит id задачи и
+        адрес её состояния.
+
+        args:
+            request: запрос клиента.
+        """
+        serializer = EquipmentJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        job = enqueue_job(request.user, data["type"], data["notation"],
+                          data["serial_number"])
+        url = request.build_absolute_uri(
+            reverse('equipment-job', args=[job.pk]))
+        return Response({"id": job.pk, "status": job.status, "url": url},
+                        status=status.HTTP_202_ACCEPTED,
+                        headers={"Location": url})
+
     def perform_create(self, serializer):
         """Метод для сохранения созданных объектов."""
         serializer.save()
 
 
-class EquipmentDetail(generics.RetrieveUpdateDestroyAPIView):
+class EquipmentDetail(SparseFieldsMixin, FastReadMixin, ConditionalMixin,
+                      generics.RetrieveUpdateDestroyAPIView):
     """
     Представление для работы с объектом Equipment.
 
@@ -67,6 +202,8 @@ class EquipmentDetail(generics.RetrieveUpdateDestroyAPIView):
     queryset = Equipment.objects.all()
     serializer_class = EquipmentSerializer
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
+    fieldset_spec = EQUIPMENT_FIELDSET
 
     def get_serializer_class(self):
         """Метод заменяет сериалайзер в зависимости от метода HTTP."""
@@ -74,16 +211,461 @@ class EquipmentDetail(generics.RetrieveUpdateDestroyAPIView):
             return EquipmentGetSerializer
         return EquipmentSerializer
 
+    def get_resource_state(self):
+        """
+        Валидаторы объекта: дата изменения объекта, объектов с тем же
+        типом и примечанием и самого типа. Считаются одним запросом.
+        """
+        pk = self.kwargs['pk']
+        equipment = Equipment.objects.filter(pk=pk)
+        related = Equipment.objects.filter(
+            type_id=Subquery(equipment.values('type_id')),
+            notation=Subquery(equipment.values('notation')),
+        ).aggregate(
+            count=Count('id'),
+            type_id=Max('type_id'),
+            own_updated_at=Max(Case(When(pk=pk, then='updated_at'))),
+            related_updated_at=Max('updated_at'),
+        )
+        if not related['count']:
+            return None
+        type_id, updated_at = related['type_id'], related['own_updated_at']
+        equipment_type = type_cache.get(type_id)
+        type_updated_at = getattr(equipment_type, 'updated_at', None)
+
+        params = self.request.query_params
+        etag = make_etag('equipment', pk, updated_at,
+                         related['count'], related['related_updated_at'],
+                         type_updated_at,
+                         self.request.accepted_renderer.format,
+                         params.get('fields'), params.get('expand'),
+                         params.get(ARCHIVE_PARAM))
+        last_modified = max(
+            filter(None, (datetime_timestamp(related['related_updated_at']),
+                          datetime_timestamp(type_updated_at))))
+        return etag, last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        """Получение объекта с поддержкой условных запросов."""
+        return self.handle_conditional(self.retrieve_equipment, request,
+                                       *args, **kwargs)
+
+    def retrieve_equipment(self, request, *args, **kwargs):
+        """
+        Объект оборудования, при fast_read - из строки values().
+        С ?include_archive=1 объект, которого нет в Equipment, ищется в
+        архиве.
+        """
+        archive = include_archive(request)
+        if not self.use_fast_read(request) and not archive:
+            return super().retrieve(request, *args, **kwargs)
+        fieldset = self.get_fieldset()
+        fields = equipment_row_fields(fieldset)
+        row = self.filter_queryset(self.get_queryset()).filter(
+            pk=self.kwargs['pk']).values(*fields).first()
+        if row is None and archive:
+            row = ArchivedEquipment.objects.filter(
+                pk=self.kwargs['pk']).values(*fields).first()
+        if row is None:
+            raise Http404(f"No {Equipment._meta.object_name} matches the given query.")  # noqa
+        return Response(equipment_representations(
+            [row], fieldset, include_archive=archive)[0])
+
+    def update(self, request, *args, **kwargs):
+        """Изменение объекта с проверкой If-Match."""
+        return self.handle_conditional(super().update, request,
+                                       *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        """Удаление объекта с проверкой If-Match."""
+        return self.handle_conditional(super().destroy, request,
+                                       *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        """Удаление объекта вместе с его поисковым индексом."""
+        delete_equipment([instance.pk])
+
 
-class EquipmentTypeList(generics.ListAPIView):
+class EquipmentTypeList(SparseFieldsMixin, FastReadMixin, ConditionalMixin,
+                        generics.ListAPIView):
     """
     Представление для вывода списка объектов EquipmentType.
     
     args:
         - ListAPIView: Представление для перечисления набора запросов.
     """
-    queryset = EquipmentType.objects.all()
+    queryset = EquipmentType.objects.order_by('id')
     serializer_class = EquipmentTypeSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter]
+    read_from_replica = True
+    pagination_class = EquipmentPagination
+    filter_backends = [IndexedSearchFilter]
     search_fields = ['name', 'serial_number_mask']
+    fieldset_spec = EQUIPMENT_TYPE_FIELDSET
+
+    def get_resource_state(self):
+        """Валидаторы списка по версии кэша типов, без запросов к БД."""
+        types = type_cache.list()
+        etag = make_etag('equipment-type-list', type_cache.version(),
+                         self.request.get_full_path(),
+                         self.request.accepted_renderer.format)
+        last_modified = max((datetime_timestamp(item.updated_at)
+                             for item in types), default=None)
+        return etag, last_modified
+
+    def list(self, request, *args, **kwargs):
+        """Список с поддержкой условных запросов."""
+        return self.handle_conditional(self.list_types, request,
+                                       *args, **kwargs)
+
+    def list_types(self, request, *args, **kwargs):
+        """Без поиска и keyset пагинации список берётся из кэша типов."""
+        search_param = IndexedSearchFilter.search_param
+        fieldset = self.get_fieldset()
+        if fieldset == EQUIPMENT_TYPE_FIELDSET.full:
+            select = list
+        else:
+            def select(items):
+                return select_fields(items, fieldset)
+
+        if (request.query_params.get(search_param)
+                or self.paginator.is_keyset_request(request)):
+            if not self.use_fast_read(request):
+                return super().list(request, *args, **kwargs)
+            return self.rows_response(
+                self.filter_queryset(self.get_queryset()),
+                lambda page: select(type_representation(item)
+                                    for item in page))
+
+        if self.use_fast_read(request):
+            return self.rows_response(list(type_representations().values()),
+                                      select)
+        page = self.paginate_queryset(type_cache.list())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class EquipmentUpload(generics.GenericAPIView):
+    """
+    Представление для импорта объектов Equipment из файла CSV или NDJSON.
+
+    Файл передаётся в поле file формы multipart. Формат задаётся полем
+    file_format или определяется по расширению. Поле resume=true
+    продолжает импорт того же файла с последней зафиксированной части.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        """Импорт файла и отчёт с ошибками по строкам."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": "This field is required."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get("file_format") or {
+            ".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson",
+        }.get(os.path.splitext(upload.name)[1].lower())
+        if file_format not in IMPORT_FORMATS:
+            return Response({"file_format": f"Use one of {IMPORT_FORMATS}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        importer = EquipmentImporter(
+            source=f"upload:{request.user.pk}:{upload.name}",
+            chunk_size=settings.EQUIPMENT_BULK_BATCH_SIZE,
+            resume=request.data.get("resume") in ("1", "true", "True"),
+            max_errors=settings.EQUIPMENT_IMPORT_MAX_REPORTED_ERRORS,
+            user=request.user)
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig",
+                                  newline="")
+        report = importer.run(read_rows(stream, file_format))
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+class EquipmentExport(generics.GenericAPIView):
+    """
+    Представление для потоковой выгрузки всех объектов Equipment.
+
+    Формат задаётся параметром ?export_format=ndjson|csv, поиск - тем же
+    параметром ?search=, что и у EquipmentList.
+    """
+    queryset = Equipment.objects.all()
+    permission_classes = [IsAuthenticated]
+    filter_backends = EquipmentList.filter_backends
+    search_fields = EquipmentList.search_fields
+
+    def get(self, request, *args, **kwargs):
+        """Выгрузка отфильтрованных объектов Equipment."""
+        file_format = request.query_params.get("export_format", "ndjson")
+        if file_format not in EXPORT_FORMATS:
+            return Response({"export_format": f"Use one of {EXPORT_FORMATS}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_lines(queryset, file_format,
+                         settings.EQUIPMENT_EXPORT_CHUNK_SIZE),
+            content_type=EXPORT_CONTENT_TYPES[file_format])
+        response["Content-Disposition"] = (
+            f'attachment; filename="equipment.{file_format}"')
+        return response
+
+
+class EquipmentBulk(generics.GenericAPIView):
+    """
+    Представление для пакетного изменения и удаления объектов Equipment.
+
+    Объекты выбираются списком ids в теле запроса или тем же параметром
+    ?search=, что и у EquipmentList. Изменения выполняются запросами
+    UPDATE/DELETE в одной транзакции. В ответе errors перечислены id,
+    к которым операция не применена.
+    """
+    queryset = Equipment.objects.all()
+    permission_classes = [IsAuthenticated]
+    filter_backends = EquipmentList.filter_backends
+    search_fields = EquipmentList.search_fields
+
+    def get_serializer_class(self):
+        """Метод заменяет сериалайзер в зависимости от метода HTTP."""
+        if self.request.method == 'PATCH':
+            return EquipmentBulkUpdateSerializer
+        return EquipmentBulkDeleteSerializer
+
+    def get_targets(self, ids) -> tuple:
+        """
+        Выбрать объекты операции.
+
+        Возвращает {id: серийный номер} найденных объектов и ошибки для
+        id, которых нет в выборке.
+
+        args:
+            ids: id из тела запроса или None.
+        """
+        search = self.request.query_params.get(IndexedSearchFilter.search_param)
+        if ids is None and not search:
+            raise ValidationError(
+                "Provide 'ids' or search parameters to select equipment.")
+
+        if ids is None:
+            queryset = self.filter_queryset(self.get_queryset())
+            return dict(queryset.values_list('id', 'serial_number')), {}
+
+        targets = serial_numbers_by_id(ids)
+        if search:
+            matching = set(self.filter_queryset(self.get_queryset())
+                           .values_list('id', flat=True))
+            targets = {pk: serial for pk, serial in targets.items()
+                       if pk in matching}
+        errors = {pk: "Not found." for pk in ids if pk not in targets}
+        return targets, errors
+
+    def patch(self, request, *args, **kwargs):
+        """Пакетное изменение типа и/или примечания."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        targets, errors = self.get_targets(data.pop("ids", None))
+
+        equipment_type = data.get("type")
+        if equipment_type is not None:
+            mask = equipment_type.serial_number_mask
+            pks = list(targets)
+            invalid = set(invalid_serial_numbers(
+                equipment_type, [targets[pk] for pk in pks]))
+            for pk in pks:
+                if targets[pk] in invalid:
+                    errors[pk] = f"Serial number '{targets.pop(pk)}' does not match the mask '{mask}'."  # noqa
+
+        updated = update_equipment(targets, **data)
+        return Response({"updated": updated, "errors": errors},
+                        status=status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        """Пакетное удаление."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        targets, errors = self.get_targets(
+            serializer.validated_data.get("ids"))
+
+        deleted = delete_equipment(targets)
+        return Response({"deleted": deleted, "errors": errors},
+                        status=status.HTTP_200_OK)
+
+
+class EquipmentStats(generics.GenericAPIView):
+    """
+    Представление статистики оборудования.
+
+    Без параметров отдаёт число оборудования каждого типа, с ?type=<id> -
+    число оборудования этого типа по примечаниям. Данные читаются из
+    таблиц статистики, а не из Equipment.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    def get(self, request, *args, **kwargs):
+        """Статистика по типам или по примечаниям типа."""
+        type_id = request.query_params.get('type')
+        if type_id is None:
+            results = type_stats()
+            return Response({"count": sum(item["count"] for item in results),
+                             "results": results})
+
+        equipment_type = type_cache.get(type_id)
+        if equipment_type is None:
+            raise ValidationError(
+                {"type": [f'Invalid pk "{type_id}" - object does not exist.']})  # noqa
+        results = notation_stats(equipment_type.id)
+        return Response({"type": equipment_type.id,
+                         "count": sum(item["count"] for item in results),
+                         "results": results})
+
+
+class EquipmentJobDetail(generics.RetrieveAPIView):
+    """
+    Представление состояния задачи создания объектов Equipment.
+
+    Отдаёт прогресс, ошибки по серийным номерам и id созданных объектов.
+    Пользователь видит свои задачи, персонал - все задачи.
+    """
+    serializer_class = EquipmentJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """Задачи, доступные пользователю."""
+        queryset = EquipmentJob.objects.defer('serial_numbers')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(user_id=self.request.user.pk)
+
+
+class EquipmentTypeAllocate(generics.GenericAPIView):
+    """
+    Представление выдачи свободных серийных номеров по маске типа.
+
+    Тело запроса {"count": N}. Выданные номера подходят под маску, не
+    заняты оборудованием и зарезервированы за клиентом, поэтому
+    параллельные запросы получают разные номера.
+    """
+    serializer_class = SerialAllocationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """Выдача count свободных серийных номеров."""
+        equipment_type = type_cache.get(self.kwargs['pk'])
+        if equipment_type is None:
+            raise Http404(f"No {EquipmentType._meta.object_name} matches the given query.")  # noqa
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            serials, expires_at = allocate_serial_numbers(
+                equipment_type, serializer.validated_data["count"],
+                user=request.user)
+        except SerialSpaceExhausted as exc:
+            return Response({"count": str(exc)},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({"type": equipment_type.id,
+                         "serial_numbers": serials,
+                         "expires_at": expires_at},
+                        status=status.HTTP_201_CREATED)
+
+
+class EquipmentChanges(generics.GenericAPIView):
+    """
+    Представление журнала изменений оборудования и типов.
+
+    Клиент хранит курсор next последнего ответа и запрашивает
+    ?since=<курсор>&limit=<N>, пока has_more не станет false. Запрос без
+    since отдаёт текущий курсор: клиент, загрузивший всё оборудование,
+    продолжает с него. Курсор старше сжатого журнала получает 410:
+    клиенту нужна полная синхронизация. Журнал читается с основной БД.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        """Изменения после курсора."""
+        since = self.int_param("since")
+        if since is None:
+            return Response({"changes": [], "next": latest_cursor(),
+                             "has_more": False})
+        limit = self.int_param("limit") or settings.EQUIPMENT_CHANGES_MAX_BATCH  # noqa
+        try:
+            return Response(changes_since(
+                since, min(limit, settings.EQUIPMENT_CHANGES_MAX_BATCH)))
+        except ChangesGone as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_410_GONE)
+
+    def int_param(self, name: str):
+        """
+        Неотрицательное целое из параметра запроса или None.
+
+        args:
+            name: имя параметра.
+        """
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        if not value.isdigit():
+            raise ValidationError({name: ["A non-negative integer is required."]})  # noqa
+        return int(value)
+
+
+class EquipmentValidate(generics.GenericAPIView):
+    """
+    Представление проверки серийных номеров без создания объектов.
+
+    Тело запроса как у создания: {"type": id, "serial_number": [...]}.
+    Номера проверяются по маске типа, по занятым номерам и на повторы
+    теми же правилами, что и при создании, одним набором запросов IN.
+    В ответе errors имеет формат ошибок создания {номер: [ошибка]}.
+    """
+    serializer_class = EquipmentValidateSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """Проверка списка серийных номеров."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        errors = serial_number_errors(data["type"], data["serial_number"],
+                                      user=request.user)
+        return Response({"valid": not errors,
+                         "errors": {serial: [message] for serial, message
+                                    in errors.items()}},
+                        status=status.HTTP_200_OK)
+
+
+class EquipmentLookup(generics.GenericAPIView):
+    """
+    Представление поиска оборудования по списку серийных номеров.
+
+    Тело запроса {"serial_numbers": [...]}. Номера ищутся на точное
+    совпадение запросами IN по уникальному индексу, типы берутся из кэша
+    типов. В ответе found - объекты по серийным номерам, missing -
+    ненайденные номера в порядке запроса. С ?include_archive=1 номера,
+    которых нет в Equipment, ищутся в архиве.
+    """
+    serializer_class = EquipmentLookupSerializer
+    permission_classes = [IsAuthenticated]
+    renderer_classes = FastReadMixin.renderer_classes
+
+    def post(self, request, *args, **kwargs):
+        """Поиск объектов по серийным номерам."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serial_numbers = list(dict.fromkeys(
+            serializer.validated_data["serial_numbers"]))
+        fields = equipment_row_fields(EQUIPMENT_LOOKUP_FIELDS)
+        rows = rows_by_serial_number(serial_numbers, fields)
+        if include_archive(request) and len(rows) < len(serial_numbers):
+            rows.update(rows_by_serial_number(
+                [serial for serial in serial_numbers if serial not in rows],
+                fields, ArchivedEquipment))
+
+        found = [serial for serial in serial_numbers if serial in rows]
+        items = equipment_representations([rows[serial] for serial in found],
+                                          EQUIPMENT_LOOKUP_FIELDS)
+        return Response({"found": dict(zip(found, items)),
+                         "missing": [serial for serial in serial_numbers
+                                     if serial not in rows]},
+                        status=status.HTTP_200_OK)
@@ -36,6 +36,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.PerformanceMiddleware',
+    'api.compression.CompressionMiddleware',
+    'api.routers.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,8 +80,28 @@ DATABASES = {
         'PASSWORD': os.getenv("PASSWORD"),
         'HOST': os.getenv("HOST"),
         'PORT': os.getenv("PORT"),
+        # Время жизни соединения (секунды, 0 - на запрос) и проверка
+        # соединения перед повторным использованием.
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        'CONN_HEALTH_CHECKS': os.getenv("DB_CONN_HEALTH_CHECKS", "") == "True",
     }
 }
+# Реплики для чтения: через запятую HOST[:PORT] или, для SQLite, пути
+# к файлам БД. Остальные параметры берутся из default. В тестах реплики
+# отражают тестовую БД default (TEST MIRROR).
+for index, replica in enumerate(filter(None, os.getenv("DB_REPLICAS", "")
+                                       .split(",")), start=1):
+    replica_settings = {**DATABASES['default'],
+                        'TEST': {'MIRROR': 'default'}}
+    if 'sqlite3' in (replica_settings['ENGINE'] or ''):
+        replica_settings['NAME'] = replica.strip()
+    else:
+        host, _, port = replica.strip().partition(':')
+        replica_settings.update(HOST=host, PORT=port or
+                                replica_settings['PORT'])
+    DATABASES[f'replica{index}'] = replica_settings
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -98,11 +121,18 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Способы аутентификации, которые проверяются, если в запросе нет JWT.
+# Пустое значение EQUIPMENT_AUTH_FALLBACKS оставляет только JWT.
+AUTHENTICATION_FALLBACKS = {
+    'session': 'rest_framework.authentication.SessionAuthentication',
+    'basic': 'rest_framework.authentication.BasicAuthentication',
+}
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+        *(AUTHENTICATION_FALLBACKS[name.strip()] for name in os.getenv(
+            "EQUIPMENT_AUTH_FALLBACKS", "session,basic").split(",")
+          if name.strip()),
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated'
@@ -173,3 +203,93 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer", # noqa 
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer", # noqa 
 }
+
+# Кэш. Для нескольких процессов нужен общий backend (Redis, Memcached),
+# иначе сброс кэша типов оборудования виден только в своём процессе.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+# Equipment
+# Размер пачки для bulk_create при массовом создании оборудования.
+EQUIPMENT_BULK_BATCH_SIZE = int(os.getenv("EQUIPMENT_BULK_BATCH_SIZE", 1000))
+# Максимальное число скомпилированных масок серийных номеров в кэше.
+EQUIPMENT_MASK_CACHE_SIZE = int(os.getenv("EQUIPMENT_MASK_CACHE_SIZE", 1024))
+# Максимальный размер страницы для keyset пагинации (?page_size=).
+EQUIPMENT_MAX_PAGE_SIZE = int(os.getenv("EQUIPMENT_MAX_PAGE_SIZE", 1000))
+# Сколько ошибок по строкам возвращать в ответе endpoint-а импорта.
+EQUIPMENT_IMPORT_MAX_REPORTED_ERRORS = int(
+    os.getenv("EQUIPMENT_IMPORT_MAX_REPORTED_ERRORS", 1000))
+# Число строк в одном запросе при потоковой выгрузке оборудования.
+EQUIPMENT_EXPORT_CHUNK_SIZE = int(os.getenv("EQUIPMENT_EXPORT_CHUNK_SIZE",
+                                            2000))
+# Алиас кэша и время жизни данных кэша типов оборудования (секунды).
+EQUIPMENT_TYPE_CACHE_ALIAS = "default"
+EQUIPMENT_TYPE_CACHE_TTL = int(os.getenv("EQUIPMENT_TYPE_CACHE_TTL", 3600))
+# Время жизни версии кэша типов (секунды): с кэшем в памяти процесса
+# столько другие процессы могут видеть старые типы.
+EQUIPMENT_TYPE_VERSION_TTL = int(os.getenv("EQUIPMENT_TYPE_VERSION_TTL", 30))
+# Порог медленного запроса (мс) для журнала api.performance с SQL
+# запросами. 0 отключает журнал.
+EQUIPMENT_SLOW_REQUEST_MS = int(os.getenv("EQUIPMENT_SLOW_REQUEST_MS", 1000))
+# Добавлять заголовок Server-Timing к ответам.
+EQUIPMENT_SERVER_TIMING = os.getenv("EQUIPMENT_SERVER_TIMING", "") == "True"
+# Токен доступа к /metrics. Пустое значение - доступ без токена.
+EQUIPMENT_METRICS_TOKEN = os.getenv("EQUIPMENT_METRICS_TOKEN", "")
+# Алиас кэша и время жизни (секунды) пользователей JWT аутентификации.
+EQUIPMENT_AUTH_CACHE_ALIAS = "default"
+EQUIPMENT_AUTH_USER_CACHE_TTL = int(os.getenv("EQUIPMENT_AUTH_USER_CACHE_TTL",
+                                              60))
+# Создавать пользователя из полей JWT (TOKEN_USER_CLASS) без БД и кэша.
+EQUIPMENT_JWT_STATELESS_USER = os.getenv("EQUIPMENT_JWT_STATELESS_USER",
+                                         "") == "True"
+# Алиасы БД, с которых читают представления с read_from_replica.
+EQUIPMENT_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Сколько секунд после записи клиент читает с основной БД.
+EQUIPMENT_REPLICA_PIN_SECONDS = int(os.getenv("EQUIPMENT_REPLICA_PIN_SECONDS",
+                                              5))
+EQUIPMENT_REPLICA_PIN_COOKIE = "db_pin"
+# Наибольшее число серийных номеров в одной задаче создания оборудования.
+EQUIPMENT_JOB_MAX_SERIALS = int(os.getenv("EQUIPMENT_JOB_MAX_SERIALS",
+                                          100000))
+# Через сколько секунд без отметки обработчика задача захватывается заново.
+EQUIPMENT_JOB_STALE_SECONDS = int(os.getenv("EQUIPMENT_JOB_STALE_SECONDS",
+                                            300))
+# Наибольшее число серийных номеров, выдаваемых за один запрос.
+EQUIPMENT_SERIAL_ALLOCATE_MAX = int(os.getenv("EQUIPMENT_SERIAL_ALLOCATE_MAX",
+                                              10000))
+# Сколько секунд выданные серийные номера зарезервированы за клиентом.
+EQUIPMENT_SERIAL_RESERVATION_SECONDS = int(
+    os.getenv("EQUIPMENT_SERIAL_RESERVATION_SECONDS", 3600))
+# Ответы короче этого размера (байты) не сжимаются.
+EQUIPMENT_COMPRESS_MIN_BYTES = int(os.getenv("EQUIPMENT_COMPRESS_MIN_BYTES",
+                                             1024))
+# Уровень сжатия brotli (0-11): меньше - быстрее.
+EQUIPMENT_BROTLI_QUALITY = int(os.getenv("EQUIPMENT_BROTLI_QUALITY", 4))
+# Через сколько секунд после записи изменение видно в журнале изменений:
+# транзакции записи оборудования должны укладываться в это время.
+EQUIPMENT_CHANGES_SETTLE_SECONDS = int(
+    os.getenv("EQUIPMENT_CHANGES_SETTLE_SECONDS", 5))
+# Сколько дней хранятся строки журнала изменений.
+EQUIPMENT_CHANGES_RETENTION_DAYS = int(
+    os.getenv("EQUIPMENT_CHANGES_RETENTION_DAYS", 30))
+# Наибольшее число строк журнала изменений в одном ответе.
+EQUIPMENT_CHANGES_MAX_BATCH = int(os.getenv("EQUIPMENT_CHANGES_MAX_BATCH",
+                                            1000))
+# Через сколько дней после списания оборудование переносится в архив
+# командой archive_equipment.
+EQUIPMENT_ARCHIVE_AFTER_DAYS = int(os.getenv("EQUIPMENT_ARCHIVE_AFTER_DAYS",
+                                             30))
+# Наибольшее число серийных номеров в одном запросе проверки.
+EQUIPMENT_VALIDATE_MAX_SERIALS = int(
+    os.getenv("EQUIPMENT_VALIDATE_MAX_SERIALS", 100000))
+# Наибольшее число серийных номеров в одном запросе поиска по номерам.
+EQUIPMENT_LOOKUP_MAX_SERIALS = int(os.getenv("EQUIPMENT_LOOKUP_MAX_SERIALS",
+                                             10000))
+# Алиас кэша, в котором пользователь JWT закрепляется за основной БД
+# после записи: должен быть общим для всех процессов.
+EQUIPMENT_REPLICA_PIN_CACHE_ALIAS = "default"